@@ -0,0 +1,218 @@
+import bisect
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# 요청 경로에서 쓰는 계측은 perf_counter 두 번 + 락 한 번 정도라 운영에서도 켜 둘 수 있음
+_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+_SERVER_TIMING = os.getenv("SERVER_TIMING", "1") != "0"  # 응답에 Server-Timing 헤더 추가
+
+# 초 단위 히스토그램 버킷 (임베딩 수 ms ~ LLM 수십 초)
+_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+STAGE_SECONDS = "kauni_stage_duration_seconds"
+HTTP_SECONDS = "kauni_http_request_duration_seconds"
+
+LabelKey = Tuple[Tuple[str, str], ...]
+# 조회 시점에 값을 만드는 수집기: (이름, 타입, 라벨, 값) 목록
+Collector = Callable[[], Iterable[Tuple[str, str, Dict[str, str], float]]]
+
+_HELP = {
+    STAGE_SECONDS: "Time spent in each request-path stage",
+    HTTP_SECONDS: "HTTP request latency by route",
+    "kauni_fallback_total": "Requests answered by a fallback path",
+    "kauni_guardrail_rejects_total": "Queries rejected as off-topic",
+    "kauni_llm_tokens_total": "LLM tokens used (estimated for streams)",
+}
+
+# 현재 요청에서 측정한 (단계, 초) 목록 (Server-Timing 헤더용, 요청마다 새 리스트)
+_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("server_timings", default=None)
+
+
+def _key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    parts = [f'{k}="{_escape(v)}"' for k, v in labels]
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metrics:
+    """프로세스 전역 카운터/히스토그램 저장소 (Prometheus 텍스트 형식으로 내보냄)"""
+
+    def __init__(self, buckets: Tuple[float, ...] = _BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        # 시리즈마다 [버킷별 개수..., +Inf 개수, 합계]
+        self._histograms: Dict[str, Dict[LabelKey, List[float]]] = {}
+        self._collectors: List[Collector] = []
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1.0, **labels: Any) -> None:
+        if not _ENABLED:
+            return
+        key = _key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, seconds: float, **labels: Any) -> None:
+        if not _ENABLED:
+            return
+        key = _key(labels)
+        i = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            row = series.get(key)
+            if row is None:
+                row = series[key] = [0.0] * (len(self.buckets) + 2)
+            row[i] += 1
+            row[-1] += seconds
+
+    def add_collector(self, collector: Collector) -> None:
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Prometheus 텍스트 노출 형식 (version 0.0.4)"""
+        with self._lock:
+            counters = {n: dict(s) for n, s in self._counters.items()}
+            histograms = {n: {k: list(r) for k, r in s.items()} for n, s in self._histograms.items()}
+            collectors = list(self._collectors)
+        lines: List[str] = []
+        for name in sorted(counters):
+            self._header(lines, name, "counter")
+            for key, value in sorted(counters[name].items()):
+                lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+        for name in sorted(histograms):
+            self._header(lines, name, "histogram")
+            for key, row in sorted(histograms[name].items()):
+                cumulative = 0.0
+                for bound, count in zip(self.buckets + (float("inf"),), row[:-1]):
+                    cumulative += count
+                    labels = _format_labels(key + (("le", _format_value(bound)),))
+                    lines.append(f"{name}_bucket{labels} {_format_value(cumulative)}")
+                lines.append(f"{name}_sum{_format_labels(key)} {row[-1]!r}")
+                lines.append(f"{name}_count{_format_labels(key)} {_format_value(cumulative)}")
+        collected: Dict[str, Tuple[str, List[str]]] = {}
+        for collector in collectors:
+            try:
+                samples = list(collector())
+            except Exception as e:
+                print(f"Metrics collector failed: {e}")
+                continue
+            for name, kind, labels, value in samples:
+                collected.setdefault(name, (kind, []))[1].append(
+                    f"{name}{_format_labels(sorted((k, str(v)) for k, v in labels.items()))} {_format_value(value)}"
+                )
+        for name in sorted(collected):
+            kind, samples = collected[name]
+            self._header(lines, name, kind)
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _header(lines: List[str], name: str, kind: str) -> None:
+        if name in _HELP:
+            lines.append(f"# HELP {name} {_HELP[name]}")
+        lines.append(f"# TYPE {name} {kind}")
+
+
+_metrics = Metrics()
+
+
+def get_metrics() -> Metrics:
+    return _metrics
+
+
+def inc(name: str, value: float = 1.0, **labels: Any) -> None:
+    _metrics.inc(name, value, **labels)
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    """단계 소요 시간 기록 (히스토그램 + 현재 요청의 Server-Timing)"""
+    _metrics.observe(STAGE_SECONDS, seconds, stage=stage)
+    timings = _timings.get()
+    if timings is not None:
+        timings.append((stage, seconds))
+
+
+class _Span:
+    __slots__ = ("stage", "_start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self._start = 0.0
+
+    def __enter__(self) -> "_Span":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        observe_stage(self.stage, time.perf_counter() - self._start)
+
+
+def span(stage: str) -> _Span:
+    """with span("retrieval"): ... 형태로 단계 시간을 측정 (예외가 나도 기록)"""
+    return _Span(stage)
+
+
+def _server_timing(timings: List[Tuple[str, float]], total: float) -> bytes:
+    # 같은 단계가 여러 번이면 합산 (순서는 처음 나온 순서)
+    merged: Dict[str, float] = {}
+    for stage, seconds in timings:
+        merged[stage] = merged.get(stage, 0.0) + seconds
+    parts = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in merged.items()]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts).encode("latin-1")
+
+
+class MetricsMiddleware:
+    """요청별 지연 히스토그램 기록 + Server-Timing 헤더 추가 (순수 ASGI라 스트리밍 응답도 그대로 통과)
+
+    Server-Timing에는 응답 헤더를 보내기 전까지 끝난 단계만 들어간다 (스트리밍이면 첫 바이트 전까지).
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or not _ENABLED:
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        timings: List[Tuple[str, float]] = []
+        token = _timings.set(timings)
+        status = 500
+
+        async def send_with_timing(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if _SERVER_TIMING:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", _server_timing(timings, time.perf_counter() - start)))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _timings.reset(token)
+            route = scope.get("route")
+            # 경로 템플릿으로 묶어서 라벨 수가 늘어나지 않게 함 (매칭 안 된 요청은 하나로)
+            path = getattr(route, "path", None) or "unmatched"
+            _metrics.observe(HTTP_SECONDS, time.perf_counter() - start, method=scope["method"], route=path, status=status)
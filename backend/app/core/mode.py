@@ -0,0 +1,9 @@
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# full: 챗/검색/수집까지 전체 기능, lite: 모델/벡터 DB 없이 health, persona, crowding만 제공
+APP_MODE = os.getenv("APP_MODE", "full").strip().lower()
+LITE_MODE = APP_MODE == "lite"
@@ -0,0 +1,107 @@
+import asyncio
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+_MAX_WAITERS = int(os.getenv("SINGLEFLIGHT_MAX_WAITERS", "256"))  # 키 하나에 합류할 수 있는 최대 대기 요청 수
+_TRACKED_KEYS = 256  # 키별 통계를 유지할 최근 키 수
+
+
+class SingleFlight:
+    """같은 키로 동시에 들어온 비동기 작업을 하나로 합침
+
+    첫 요청(leader)이 계산을 태스크로 시작하고, 계산이 끝나기 전에 들어온 같은 키의 요청은 그 결과를 함께 기다린다.
+    계산은 별도 태스크라서 leader 요청이 취소돼도 나머지 대기자에게는 결과가 전달된다.
+    대기자가 max_waiters를 넘으면 그 이후 요청은 합류하지 않고 직접 계산한다.
+    결과는 계산이 끝나면 바로 잊는다 (캐시가 아님).
+    """
+
+    def __init__(self, name: str, max_waiters: int = _MAX_WAITERS):
+        self.name = name
+        self.max_waiters = max(0, max_waiters)
+        self._inflight: Dict[Hashable, "asyncio.Task[Any]"] = {}
+        self._waiters: Dict[Hashable, int] = {}
+        self._keys: "OrderedDict[Hashable, Dict[str, int]]" = OrderedDict()
+        self._lock = threading.Lock()  # 통계 조회는 다른 스레드에서도 가능
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        self.overflow = 0
+        self.errors = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda t, key=key: self._done(key, t))
+            self._count(key, "executions")
+        elif self._waiters[key] >= self.max_waiters:
+            self._count(key, "overflow")
+            return await fn()
+        else:
+            self._waiters[key] += 1
+            self._count(key, "coalesced")
+        # 대기자가 취소돼도 공유 계산은 계속되도록 shield
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hot = sorted(self._keys.items(), key=lambda kv: kv[1]["coalesced"], reverse=True)[:10]
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "overflow": self.overflow,
+                "errors": self.errors,
+                "inflight": len(self._inflight),
+                "hot_keys": [{"key": str(k), **v} for k, v in hot if v["coalesced"]],
+            }
+
+    def _done(self, key: Hashable, task: "asyncio.Task[Any]") -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            del self._waiters[key]
+        if task.cancelled() or task.exception() is not None:
+            self._count(key, "errors")
+
+    def _count(self, key: Hashable, field: str) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+            per_key = self._keys.get(key)
+            if per_key is None:
+                per_key = self._keys[key] = {"calls": 0, "executions": 0, "coalesced": 0, "overflow": 0, "errors": 0}
+                if len(self._keys) > _TRACKED_KEYS:
+                    self._keys.popitem(last=False)
+            else:
+                self._keys.move_to_end(key)
+            per_key[field] += 1
+            if field != "errors":
+                self.calls += 1
+                per_key["calls"] += 1
+
+
+_groups: Dict[str, SingleFlight] = {}
+_groups_lock = threading.Lock()
+
+
+def get_singleflight(name: str) -> SingleFlight:
+    """이름별 공유 SingleFlight 그룹 (health에서 통계를 모아 보여줌)"""
+    group: Optional[SingleFlight] = _groups.get(name)
+    if group is not None:
+        return group
+    with _groups_lock:
+        group = _groups.get(name)
+        if group is None:
+            group = _groups[name] = SingleFlight(name)
+    return group
+
+
+def singleflight_stats() -> Dict[str, Dict[str, Any]]:
+    with _groups_lock:
+        groups = list(_groups.values())
+    return {g.name: g.stats() for g in groups}
@@ -0,0 +1,15 @@
+import json
+from typing import Any
+
+# 프록시(nginx 등)가 이벤트를 모아서 보내지 않도록 버퍼링 비활성화
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",
+}
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Server-Sent Events 한 프레임 직렬화 (data는 JSON)"""
+    payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    return f"event: {event}\ndata: {payload}\n\n"
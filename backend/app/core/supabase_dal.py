@@ -0,0 +1,294 @@
+import asyncio
+import os
+import random
+import threading
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+from .supabase_client import supabase_credentials
+
+if TYPE_CHECKING:
+    import httpx
+
+_MAX_CONNECTIONS = int(os.getenv("SUPABASE_MAX_CONNECTIONS", "32"))
+_MAX_CONCURRENCY = int(os.getenv("SUPABASE_MAX_CONCURRENCY", "16"))  # 동시에 보내는 PostgREST 요청 수
+_MAX_RETRIES = int(os.getenv("SUPABASE_MAX_RETRIES", "2"))  # 5xx/429/연결 오류 시 재시도 횟수
+_CONNECT_TIMEOUT_SEC = 5.0
+_RETRY_BASE_SEC = 0.2
+_RETRY_MAX_SEC = 5.0
+# in.(...) 필터는 URL에 들어가므로 한 요청에 넣는 값 수를 제한 (따옴표로 감싼 uuid 150개면 인코딩 후 약 6.8KB)
+_IN_FILTER_BATCH = 150
+# 작업 종류별 타임아웃 (검색은 짧게, 대량 쓰기는 길게)
+_TIMEOUTS = {
+    "match": float(os.getenv("SUPABASE_MATCH_TIMEOUT_SEC", "5")),
+    "read": float(os.getenv("SUPABASE_READ_TIMEOUT_SEC", "10")),
+    "write": float(os.getenv("SUPABASE_WRITE_TIMEOUT_SEC", "30")),
+}
+
+
+class SupabaseError(RuntimeError):
+    """PostgREST가 오류 상태 코드를 돌려줌"""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"Supabase {status_code}: {message}")
+        self.status_code = status_code
+
+
+def _in_filter(values: Sequence[str]) -> str:
+    # PostgREST in 필터: 쉼표/괄호가 들어간 id도 깨지지 않도록 큰따옴표로 감쌈
+    quoted = ('"' + str(v).replace("\\", "\\\\").replace('"', '\\"') + '"' for v in values)
+    return "in.(" + ",".join(quoted) + ")"
+
+
+def _parse_count(content_range: Optional[str]) -> Optional[int]:
+    """Content-Range "0-9/123" 또는 "*/123" -> 123"""
+    if not content_range or "/" not in content_range:
+        return None
+    total = content_range.rsplit("/", 1)[1]
+    return int(total) if total.isdigit() else None
+
+
+class SupabaseDAL:
+    """Supabase(PostgREST) 비동기 데이터 접근 계층 (프로세스 전역)
+
+    하나의 httpx.AsyncClient로 keep-alive 연결을 풀링하고, 동시 요청 수와 작업별 타임아웃을 제한한다.
+    이벤트 루프를 막지 않으므로 라우트/검색 경로에서 바로 await 한다.
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        key: Optional[str] = None,
+        max_connections: int = _MAX_CONNECTIONS,
+        max_concurrency: int = _MAX_CONCURRENCY,
+        max_retries: int = _MAX_RETRIES,
+    ):
+        import httpx  # DAL을 실제로 만들 때만 로드 (lite 모드에서는 불필요)
+
+        if url is None or key is None:
+            url, key = supabase_credentials()
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max(0, max_retries)
+        self._client = httpx.AsyncClient(
+            base_url=f"{url.rstrip('/')}/rest/v1",
+            headers={"apikey": key, "Authorization": f"Bearer {key}"},
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=httpx.Timeout(_TIMEOUTS["read"], connect=_CONNECT_TIMEOUT_SEC),
+        )
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.retries = 0
+        self.inflight = 0
+
+    # 공개 API
+
+    async def match(self, function: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """벡터 검색 RPC 호출 (예: match_documents)"""
+        res = await self._request("POST", f"/rpc/{function}", "match", json=params)
+        return res.json() or []
+
+    async def select(
+        self, table: str, columns: str = "*", limit: Optional[int] = None, offset: int = 0
+    ) -> List[Dict[str, Any]]:
+        params: Dict[str, Any] = {"select": columns}
+        if limit is not None:
+            params["limit"] = limit
+        if offset:
+            params["offset"] = offset
+        res = await self._request("GET", f"/{table}", "read", params=params)
+        return res.json() or []
+
+    async def upsert(
+        self, table: str, rows: List[Dict[str, Any]], on_conflict: str = "id", ignore_duplicates: bool = False
+    ) -> None:
+        """on_conflict 키가 같은 행은 덮어씀 (ignore_duplicates면 기존 행을 그대로 두고 건너뜀)"""
+        if rows:
+            resolution = "ignore-duplicates" if ignore_duplicates else "merge-duplicates"
+            await self._request(
+                "POST", f"/{table}", "write",
+                params={"on_conflict": on_conflict},
+                json=rows,
+                headers={"Prefer": f"resolution={resolution},return=minimal"},
+            )
+
+    async def update(self, table: str, values: Dict[str, Any], value: str, column: str = "id") -> None:
+        """column = value인 행의 일부 컬럼만 변경 (없는 행은 무시)"""
+        await self._request(
+            "PATCH", f"/{table}", "write",
+            params={column: f"eq.{value}"},
+            json=values,
+            headers={"Prefer": "return=minimal"},
+        )
+
+    async def delete(self, table: str, ids: Sequence[str], column: str = "id") -> None:
+        """column 값이 ids에 있는 행 삭제 (URL 길이 한도 때문에 _IN_FILTER_BATCH개씩 나눠 보냄)"""
+        for i in range(0, len(ids), _IN_FILTER_BATCH):
+            await self._request(
+                "DELETE", f"/{table}", "write",
+                params={column: _in_filter(ids[i:i + _IN_FILTER_BATCH])},
+                headers={"Prefer": "return=minimal"},
+            )
+
+    async def count(self, table: str) -> Optional[int]:
+        """정확한 행 수 (본문 없이 Content-Range 헤더만 받음)"""
+        res = await self._request(
+            "HEAD", f"/{table}", "read",
+            params={"select": "*"},
+            headers={"Prefer": "count=exact", "Range-Unit": "items", "Range": "0-0"},
+        )
+        return _parse_count(res.headers.get("content-range"))
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "retries": self.retries,
+            "inflight": self.inflight,
+            "max_concurrency": self.max_concurrency,
+        }
+
+    # 내부
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        # 이벤트 루프 안에서 처음 쓸 때 생성
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        return self._slots
+
+    async def _request(self, method: str, path: str, op: str, **kwargs: Any) -> "httpx.Response":
+        """일시적인 실패(5xx/429/연결 오류)는 지수 백오프로 재시도 (공개 메서드는 모두 같은 요청을 반복해도 안전함)"""
+        import httpx
+
+        attempt = 0
+        while True:
+            try:
+                res = await self._send(method, path, op, **kwargs)
+            except httpx.TransportError:
+                if attempt >= self.max_retries:
+                    raise
+                retry_after = None
+            else:
+                if res.status_code < 400:
+                    return res
+                if not _is_retryable(res.status_code) or attempt >= self.max_retries:
+                    raise SupabaseError(res.status_code, _error_message(res))
+                retry_after = _retry_after(res)
+            self.retries += 1
+            # 대기하는 동안에는 동시 요청 슬롯을 잡고 있지 않음
+            delay = _RETRY_BASE_SEC * (2 ** attempt) * (0.5 + random.random())
+            await asyncio.sleep(min(max(delay, retry_after or 0.0), _RETRY_MAX_SEC))
+            attempt += 1
+
+    async def _send(self, method: str, path: str, op: str, **kwargs: Any) -> "httpx.Response":
+        import httpx
+
+        timeout = _TIMEOUTS[op]
+        async with self._get_slots():
+            self.requests += 1
+            self.inflight += 1
+            try:
+                res = await self._client.request(
+                    method, path, timeout=httpx.Timeout(timeout, connect=_CONNECT_TIMEOUT_SEC), **kwargs
+                )
+            except httpx.TimeoutException:
+                self.timeouts += 1
+                raise
+            except httpx.HTTPError:
+                self.errors += 1
+                raise
+            finally:
+                self.inflight -= 1
+        if res.status_code >= 400:
+            self.errors += 1
+        return res
+
+
+def _is_retryable(status_code: int) -> bool:
+    return status_code >= 500 or status_code == 429
+
+
+def _retry_after(res: "httpx.Response") -> Optional[float]:
+    value = res.headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _error_message(res: "httpx.Response") -> str:
+    if not res.content:
+        return res.reason_phrase  # HEAD 요청 등 본문이 없는 응답
+    try:
+        body = res.json()
+    except ValueError:
+        return res.text[:200]
+    if isinstance(body, dict):
+        return str(body.get("message") or body.get("hint") or body)
+    return str(body)[:200]
+
+
+_dal: Optional[SupabaseDAL] = None
+_dal_lock = threading.Lock()
+# 이벤트 루프 밖(배치 쓰기 스레드, CLI)에서 쓰는 DAL과 그 DAL을 돌리는 전용 루프
+_blocking: Optional[Tuple[asyncio.AbstractEventLoop, SupabaseDAL, threading.Thread]] = None
+
+T = TypeVar("T")
+
+
+def get_supabase_dal() -> SupabaseDAL:
+    """공유 DAL (보통 lifespan에서 미리 만들어 두고, 없으면 처음 쓸 때 생성)"""
+    global _dal
+    if _dal is not None:
+        return _dal
+    with _dal_lock:
+        if _dal is None:
+            _dal = SupabaseDAL()
+    return _dal
+
+
+def supabase_stats() -> Optional[Dict[str, Any]]:
+    """DAL을 아직 만들지 않았으면 None (health 조회가 클라이언트를 생성하지 않도록)"""
+    dal = _dal
+    return dal.stats() if dal is not None else None
+
+
+def _get_blocking() -> Tuple[asyncio.AbstractEventLoop, SupabaseDAL, threading.Thread]:
+    global _blocking
+    with _dal_lock:
+        if _blocking is None:
+            # httpx.AsyncClient는 처음 쓴 루프에 묶이므로 요청 루프의 DAL을 공유하지 않고 전용 루프에 따로 둠
+            dal = SupabaseDAL()
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="supabase-dal", daemon=True)
+            thread.start()
+            _blocking = (loop, dal, thread)
+    return _blocking
+
+
+def run_supabase_dal(fn: Callable[[SupabaseDAL], Awaitable[T]]) -> T:
+    """동기 코드에서 DAL 호출 (전용 루프 스레드에서 fn(dal)을 실행하고 결과를 기다림)
+
+    여러 쓰기 스레드가 동시에 불러도 하나의 연결 풀과 동시 요청 한도를 함께 쓴다.
+    """
+    loop, dal, _ = _get_blocking()
+    return asyncio.run_coroutine_threadsafe(fn(dal), loop).result()
+
+
+async def shutdown_supabase_dal() -> None:
+    global _dal, _blocking
+    with _dal_lock:
+        dal, _dal = _dal, None
+        blocking, _blocking = _blocking, None
+    if dal is not None:
+        await dal.aclose()
+    if blocking is not None:
+        loop, blocking_dal, thread = blocking
+        await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(blocking_dal.aclose(), loop))
+        loop.call_soon_threadsafe(loop.stop)
+        await asyncio.get_running_loop().run_in_executor(None, thread.join)
+        loop.close()
@@ -1,10 +1,87 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
+
+from .core.mode import LITE_MODE
+from .core.executors import shutdown_executors
+from .core.metrics import MetricsMiddleware
+from .routes import health, persona, crowding, metrics
+from .services.crowding.simulator import start_simulator, stop_simulator
+from .services.crowding.forecast import start_forecaster, stop_forecaster
+from .services.crowding.push import start_push_hub, stop_push_hub
+
+# lite 모드에서는 임베딩 모델/검색 색인/DB 클라이언트를 쓰는 모듈을 import하지 않음
+if not LITE_MODE:
+    from .routes import chat, ingest, search, feedback, db
+    from .services.rag.embeddings import preload_embedder
+    from .services.rag.batcher import shutdown_query_batcher
+    from .services.rag.vectorstore import flush_indexes, get_vector_backend
+    from .services.rag.lexical import get_lexical_index
+    from .services.rag.guardrail import get_centroid_classifier
+    from .services.rag.tokens import get_encoding
+    from .services.rag.llm import shutdown_llm_client
+    from .core.supabase_dal import get_supabase_dal, shutdown_supabase_dal
+    from .services.jobs import shutdown_job_runner
+    from .services.feedback import start_feedback_sink, stop_feedback_sink
+
+
+async def _start_rag() -> None:
+    # 임베딩 모델을 미리 로드/워밍업한 뒤에 요청을 받기 시작 (가드레일 중심 벡터도 함께 계산)
+    try:
+        await run_in_threadpool(preload_embedder)
+        await run_in_threadpool(get_centroid_classifier)
+    except Exception as e:
+        print(f"Embedding model preload failed: {e}")
+    # 토크나이저(인코딩 파일 다운로드 + BPE 파싱)도 첫 요청이 아니라 시작할 때 불러 둠
+    await run_in_threadpool(get_encoding)
+    # Supabase 설정이 있으면 풀링된 비동기 DAL을 미리 생성
+    try:
+        get_supabase_dal()
+    except Exception as e:
+        print(f"Supabase DAL init skipped: {e}")
+    # 로컬 백엔드는 여기서 인덱스를 memory-map으로 열어 둠
+    try:
+        await run_in_threadpool(get_vector_backend)
+    except Exception as e:
+        print(f"Vector backend init failed: {e}")
+    try:
+        await run_in_threadpool(get_lexical_index)
+    except Exception as e:
+        print(f"Lexical index load failed: {e}")
+    start_feedback_sink()
+
+
+async def _stop_rag() -> None:
+    # 남은 피드백은 DAL을 닫기 전에 저장
+    await stop_feedback_sink()
+    shutdown_job_runner()
+    flush_indexes()
+    shutdown_query_batcher()
+    await shutdown_llm_client()
+    await shutdown_supabase_dal()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if not LITE_MODE:
+        await _start_rag()
+    start_simulator()
+    start_forecaster()
+    start_push_hub()
+    yield
+    await stop_push_hub()
+    stop_forecaster()
+    stop_simulator()
+    if not LITE_MODE:
+        await _stop_rag()
+    shutdown_executors()
 
-from .routes import health, chat, ingest, search, persona, feedback, db, crowding
 
-app = FastAPI(title="Tourism AI Backend", version="0.1.0")
+app = FastAPI(title="Tourism AI Backend", version="0.1.0", lifespan=lifespan)
 
+app.add_middleware(MetricsMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -14,13 +91,16 @@ app.add_middleware(
 )
 
 app.include_router(health.router, prefix="/api")
-app.include_router(chat.router, prefix="/api")
-app.include_router(ingest.router, prefix="/api")
-app.include_router(search.router, prefix="/api")
+if not LITE_MODE:
+    app.include_router(chat.router, prefix="/api")
+    app.include_router(ingest.router, prefix="/api")
+    app.include_router(search.router, prefix="/api")
 app.include_router(persona.router, prefix="/api")
-app.include_router(feedback.router, prefix="/api")
-app.include_router(db.router, prefix="/api")
+if not LITE_MODE:
+    app.include_router(feedback.router, prefix="/api")
+    app.include_router(db.router, prefix="/api")
 app.include_router(crowding.router, prefix="/api")
+app.include_router(metrics.router, prefix="/api")
 
 @app.get("/")
 async def root():
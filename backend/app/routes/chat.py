@@ -1,11 +1,79 @@
+import asyncio
+import os
+import time
+from typing import AsyncIterator, Optional, Tuple
+
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+from app.core.sse import SSE_HEADERS, format_sse
 from app.schemas.models import ChatRequest, ChatResponse, Context
-from app.services.rag.pipeline import generate_answer
+from app.services.rag.pipeline import generate_answer_async, stream_answer_async
 
 router = APIRouter()
 
+# 토큰을 이 크기/간격만큼 모아서 한 프레임으로 전송 (첫 토큰은 바로 전송)
+_FLUSH_CHARS = int(os.getenv("SSE_FLUSH_CHARS", "24"))
+_FLUSH_INTERVAL = float(os.getenv("SSE_FLUSH_INTERVAL_MS", "50")) / 1000.0
+
 
 @router.post("/chat", response_model=ChatResponse)
 async def chat_endpoint(body: ChatRequest) -> ChatResponse:
-    res = generate_answer(body.query)
-    return ChatResponse(answer=res["answer"], contexts=[Context(**c) for c in res["contexts"]])
+    res = await generate_answer_async(body.query)
+    return ChatResponse(answer=res["answer"], contexts=[Context(**c) for c in res["contexts"]], source=res["source"])
+
+
+@router.post("/chat/stream")
+async def chat_stream_endpoint(body: ChatRequest) -> StreamingResponse:
+    """챗 답변을 SSE로 스트리밍 (contexts -> token... -> done)"""
+    return StreamingResponse(_chat_events(body.query), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+async def _chat_events(query: str) -> AsyncIterator[str]:
+    # 풀(pull) 방식 제너레이터라 클라이언트가 느리면 LLM 스트림도 그만큼 늦게 읽힘 (버퍼가 무한히 쌓이지 않음).
+    # 클라이언트가 끊기면 Starlette가 이 제너레이터를 취소하고, 하위 스트림은 finally에서 닫힘.
+    events = stream_answer_async(query)
+    buf: list[str] = []
+    buf_len = 0
+    last_flush = 0.0
+    pending: Optional["asyncio.Future[Tuple[str, object]]"] = None
+    try:
+        while True:
+            if buf:
+                # 모아 둔 토큰이 있으면 다음 토큰을 flush 간격까지만 기다리고, LLM이 멈춰 있으면 먼저 보냄
+                if pending is None:
+                    pending = asyncio.ensure_future(events.__anext__())
+                remaining = last_flush + _FLUSH_INTERVAL - time.monotonic()
+                done, _ = await asyncio.wait({pending}, timeout=max(0.0, remaining))
+                if not done:
+                    yield format_sse("token", {"text": "".join(buf)})
+                    buf, buf_len, last_flush = [], 0, time.monotonic()
+                    continue
+            if pending is not None:
+                item = await pending
+                pending = None
+            else:
+                item = await events.__anext__()
+            event, data = item
+            if event == "token":
+                buf.append(data)  # type: ignore[arg-type]
+                buf_len += len(data)  # type: ignore[arg-type]
+                now = time.monotonic()
+                if last_flush == 0.0 or buf_len >= _FLUSH_CHARS or now - last_flush >= _FLUSH_INTERVAL:
+                    yield format_sse("token", {"text": "".join(buf)})
+                    buf, buf_len, last_flush = [], 0, now
+                continue
+            if buf:
+                yield format_sse("token", {"text": "".join(buf)})
+                buf, buf_len = [], 0
+            if event == "contexts":
+                data = [Context(**c).model_dump() for c in data]  # type: ignore[union-attr]
+            yield format_sse(event, data)
+    except StopAsyncIteration:
+        if buf:
+            yield format_sse("token", {"text": "".join(buf)})
+    finally:
+        if pending is not None:
+            # 다음 토큰을 기다리던 중에 끊기면 그 대기를 취소해야 하위 스트림이 닫힘
+            pending.cancel()
+            await asyncio.wait({pending})
+        await events.aclose()
@@ -1,141 +1,65 @@
 from fastapi import APIRouter, Query
-from typing import List, Dict, Any
-from datetime import datetime, timedelta
-import random
-from app.core.supabase_client import get_supabase_client
+from fastapi.responses import Response, StreamingResponse
+
+from app.core.sse import SSE_HEADERS
+from app.schemas.models import CrowdingSamplesRequest, CrowdingSamplesResponse
+from app.services.crowding.forecast import get_forecaster
+from app.services.crowding.push import CrowdingPushHub, Subscriber, get_push_hub
+from app.services.crowding.store import get_crowding_store
 
 router = APIRouter()
 
-# 임시 혼잡도 데이터 (실제로는 DB에서 가져와야 함)
-def get_mock_crowding_data():
-    """임시 혼잡도 데이터 생성 (실제로는 DB에서 가져와야 함)"""
-    locations = [
-        {
-            "id": "science-museum",
-            "name": "국립중앙과학관",
-            "category": "museum",
-            "areas": [
-                {"id": "natural", "name": "자연사관", "max_capacity": 500},
-                {"id": "human", "name": "인류관", "max_capacity": 400},
-                {"id": "astronomy", "name": "천체관", "max_capacity": 200},
-                {"id": "children", "name": "어린이과학관", "max_capacity": 300}
-            ]
-        },
-        {
-            "id": "central-market",
-            "name": "대전중앙시장",
-            "category": "market",
-            "areas": [
-                {"id": "area1", "name": "1구역", "max_capacity": 200},
-                {"id": "area2", "name": "2구역", "max_capacity": 200},
-                {"id": "area3", "name": "3구역", "max_capacity": 200},
-                {"id": "area4", "name": "4구역", "max_capacity": 200},
-                {"id": "area5", "name": "5구역", "max_capacity": 200},
-                {"id": "area6", "name": "6구역", "max_capacity": 200}
-            ]
-        },
-        {
-            "id": "expo-park",
-            "name": "엑스포과학공원",
-            "category": "park",
-            "areas": [
-                {"id": "main", "name": "메인광장", "max_capacity": 1000},
-                {"id": "garden", "name": "정원", "max_capacity": 500}
-            ]
-        }
-    ]
-    
-    # 현재 시간 기준으로 혼잡도 시뮬레이션
-    now = datetime.now()
-    hour = now.hour
-    
-    # 시간대별 혼잡도 패턴 (오전 10-12시, 오후 2-6시가 혼잡)
-    if 10 <= hour <= 12 or 14 <= hour <= 18:
-        base_crowding = 0.7  # 70% 기본 혼잡도
-    elif 12 <= hour <= 14:
-        base_crowding = 0.9  # 점심시간 90%
-    else:
-        base_crowding = 0.3  # 그 외 시간 30%
-    
-    # 랜덤 변동 추가 (±20%)
-    variation = random.uniform(-0.2, 0.2)
-    current_crowding = max(0.1, min(0.95, base_crowding + variation))
-    
-    result = []
-    for location in locations:
-        location_data = {
-            "id": location["id"],
-            "name": location["name"],
-            "category": location["category"],
-            "total_visitors": 0,
-            "total_capacity": 0,
-            "congestion_level": "low",
-            "areas": [],
-            "updated_at": now.isoformat()
-        }
-        
-        for area in location["areas"]:
-            # 각 구역별로 약간 다른 혼잡도
-            area_variation = random.uniform(-0.1, 0.1)
-            area_crowding = max(0.05, min(0.95, current_crowding + area_variation))
-            current_visitors = int(area["max_capacity"] * area_crowding)
-            
-            # 혼잡도 레벨 결정
-            if area_crowding < 0.4:
-                congestion_level = "low"
-            elif area_crowding < 0.7:
-                congestion_level = "medium"
-            else:
-                congestion_level = "high"
-            
-            area_data = {
-                "id": area["id"],
-                "name": area["name"],
-                "current_visitors": current_visitors,
-                "max_capacity": area["max_capacity"],
-                "congestion_level": congestion_level,
-                "crowding_ratio": round(area_crowding, 2)
-            }
-            
-            location_data["areas"].append(area_data)
-            location_data["total_visitors"] += current_visitors
-            location_data["total_capacity"] += area["max_capacity"]
-        
-        # 전체 혼잡도 레벨 결정
-        total_ratio = location_data["total_visitors"] / location_data["total_capacity"]
-        if total_ratio < 0.4:
-            location_data["congestion_level"] = "low"
-        elif total_ratio < 0.7:
-            location_data["congestion_level"] = "medium"
-        else:
-            location_data["congestion_level"] = "high"
-        
-        result.append(location_data)
-    
-    return result
 
 @router.get("/crowding")
 async def get_crowding_data(location_id: str = Query(None, description="특정 장소 ID (선택사항)")):
-    """실시간 혼잡도 데이터 조회"""
+    """실시간 혼잡도 데이터 조회 (데이터가 바뀔 때만 다시 직렬화된 응답을 그대로 반환)"""
+    body = get_crowding_store().snapshot_json(location_id)
+    if body is None:
+        return {"error": f"Location {location_id} not found"}
+    return Response(content=body, media_type="application/json")
+
+
+@router.post("/crowding/samples", response_model=CrowdingSamplesResponse)
+async def ingest_crowding_samples(body: CrowdingSamplesRequest) -> CrowdingSamplesResponse:
+    """센서/출입 카운터의 구역별 인원 샘플 일괄 수신"""
+    stats = get_crowding_store().ingest(
+        (s.location_id, s.area_id, s.visitors, s.timestamp.timestamp() if s.timestamp else None)
+        for s in body.samples
+    )
+    return CrowdingSamplesResponse(**stats)
+
+
+# /crowding/{location_id}보다 먼저 등록해야 "forecast"가 장소 id로 잡히지 않음
+@router.get("/crowding/forecast")
+async def get_crowding_forecast(
+    hours: int = Query(6, ge=1, le=48, description="예측할 시간 수"),
+    location_id: str = Query(None, description="특정 장소 ID (선택사항)"),
+):
+    """구역별 앞으로 N시간의 혼잡도 예측 (모델은 백그라운드에서 주기적으로 갱신)"""
+    body = get_forecaster().forecast_json(hours, location_id)
+    if body is None:
+        return {"error": f"Location {location_id} not found"}
+    return Response(content=body, media_type="application/json")
+
+
+@router.get("/crowding/stream")
+async def stream_crowding(location_id: str = Query(None, description="특정 장소 ID (선택사항)")):
+    """혼잡도 변경 구독 (SSE: 처음에 snapshot, 이후 바뀐 구역만 담은 delta를 주기적으로 합쳐서 전송)"""
+    hub = get_push_hub()
+    sub = hub.subscribe(location_id)
+    if sub is None:
+        return {"error": f"Location {location_id} not found"}
+    return StreamingResponse(_crowding_events(hub, sub), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+async def _crowding_events(hub: CrowdingPushHub, sub: Subscriber):
+    # 클라이언트가 끊기면 Starlette가 제너레이터를 취소하므로 finally에서 구독 해제
     try:
-        # 실제 DB 연동 시 여기서 Supabase에서 데이터 조회
-        # sb = get_supabase_client()
-        # result = sb.table("crowding_data").select("*").execute()
-        
-        # 임시로 목 데이터 반환
-        all_data = get_mock_crowding_data()
-        
-        if location_id:
-            # 특정 장소 필터링
-            filtered_data = [loc for loc in all_data if loc["id"] == location_id]
-            if not filtered_data:
-                return {"error": f"Location {location_id} not found"}
-            return {"data": filtered_data[0]}
-        
-        return {"data": all_data}
-    
-    except Exception as e:
-        return {"error": str(e)}
+        async for frame in hub.events(sub):
+            yield frame
+    finally:
+        hub.unsubscribe(sub)
+
 
 @router.get("/crowding/{location_id}")
 async def get_crowding_by_location(location_id: str):
@@ -1,11 +1,12 @@
 from fastapi import APIRouter
 from app.schemas.models import FeedbackRequest, OkResponse
+from app.services.feedback import feedback_event, get_feedback_sink
 
 router = APIRouter()
 
 
 @router.post("/feedback", response_model=OkResponse)
 async def feedback(body: FeedbackRequest):
-    # TODO: DB 저장(Supabase 연동 가능)
-    return OkResponse(ok=True)
-
+    # 큐에 넣고 바로 응답 (저장은 백그라운드에서 배치로)
+    event = feedback_event(body.feedback, body.query, body.document_ids, body.answer_source)
+    return OkResponse(ok=get_feedback_sink().submit(event))
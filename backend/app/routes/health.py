@@ -1,7 +1,38 @@
 from fastapi import APIRouter
 
+from app.core.mode import APP_MODE, LITE_MODE
+from app.core.singleflight import singleflight_stats
+from app.core.supabase_dal import supabase_stats
+from app.services.crowding.push import get_push_hub
+
+# lite 모드에서는 모델/검색 스택을 import하지 않음
+if not LITE_MODE:
+    from app.services.rag.embeddings import is_embedder_ready
+    from app.services.rag.batcher import get_query_batcher
+    from app.services.rag.query_cache import get_query_cache
+    from app.services.rag.answer_cache import get_answer_cache
+    from app.services.rag.vectorstore import get_vector_backend
+    from app.services.rag.llm import get_llm_client
+    from app.services.feedback import get_feedback_sink
+
 router = APIRouter()
 
 @router.get("/health")
 async def health_check():
-    return {"status": "ok"}
+    if LITE_MODE:
+        return {"status": "ok", "mode": APP_MODE, "crowding_push": get_push_hub().stats()}
+    ready = is_embedder_ready()
+    return {
+        "status": "ok" if ready else "degraded",
+        "mode": APP_MODE,
+        "embedder": "ready" if ready else "unavailable",
+        "vector_backend": get_vector_backend().name,
+        "embedding_batcher": get_query_batcher().stats(),
+        "query_cache": get_query_cache().stats(),
+        "answer_cache": get_answer_cache().stats(),
+        "llm": get_llm_client().stats(),
+        "singleflight": singleflight_stats(),
+        "crowding_push": get_push_hub().stats(),
+        "supabase": supabase_stats(),
+        "feedback": get_feedback_sink().stats(),
+    }
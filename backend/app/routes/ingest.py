@@ -1,27 +1,60 @@
+import os
+from typing import Any, Callable, Dict, List
+
 from fastapi import APIRouter, HTTPException
-from app.schemas.models import IngestRequest, IngestResponse
-from app.services.rag.ingest import read_text_files
-from app.services.rag.vectorstore import add_texts
-import uuid
-from app.services.ingestors.kto_api import ingest_kto
+from app.schemas.models import IngestRequest, IngestJobResponse, IngestJobStatus
+from app.services.jobs import IngestJob, JobConflictError, get_job_runner
+from app.services.rag.ingest import index_directory
 
 router = APIRouter()
 
 
-@router.post("/ingest", response_model=IngestResponse)
+def _start_job(source: str, kind: str, fn: Callable[[IngestJob], Dict[str, Any]]) -> IngestJobResponse:
+    def run(job: IngestJob) -> Dict[str, Any]:
+        stats = fn(job)
+        if stats.get("failed"):
+            job.add_error(f"{stats['failed']} rows failed to upsert and will be retried on the next run")
+        return stats
+
+    try:
+        job = get_job_runner().submit(source, kind, run)
+    except JobConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return IngestJobResponse(job_id=job.id, status=job.status)
+
+
+@router.post("/ingest", response_model=IngestJobResponse, status_code=202)
 async def ingest(req: IngestRequest):
     if not req.path:
         raise HTTPException(status_code=400, detail="path is required")
-    texts, metas, _ids = read_text_files(req.path)
-    if not texts:
-        return IngestResponse(indexed=0)
-    ids = [str(uuid.uuid4()) for _ in texts]
-    add_texts(texts, metas, ids)
-    return IngestResponse(indexed=len(texts))
+    root = os.path.abspath(req.path)
+    return _start_job(f"files:{root}", "files", lambda job: index_directory(root, job=job))
 
 
-@router.post("/ingest/kto", response_model=IngestResponse)
+@router.post("/ingest/kto", response_model=IngestJobResponse, status_code=202)
 async def ingest_kto_api():
-    count = ingest_kto(num_rows=100)
-    return IngestResponse(indexed=count)
+    # requests 기반 수집기는 이 엔드포인트를 쓸 때만 로드
+    from app.services.ingestors.kto_api import ingest_kto
+
+    return _start_job("kto", "kto", lambda job: ingest_kto(num_rows=100, job=job))
+
+
+@router.get("/ingest/jobs", response_model=List[IngestJobStatus])
+async def list_ingest_jobs():
+    return [IngestJobStatus(**job.to_dict()) for job in get_job_runner().list()]
+
+
+@router.get("/ingest/jobs/{job_id}", response_model=IngestJobStatus)
+async def get_ingest_job(job_id: str):
+    job = get_job_runner().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"job {job_id} not found")
+    return IngestJobStatus(**job.to_dict())
+
 
+@router.post("/ingest/jobs/{job_id}/cancel", response_model=IngestJobStatus)
+async def cancel_ingest_job(job_id: str):
+    job = get_job_runner().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"job {job_id} not found")
+    return IngestJobStatus(**job.to_dict())
@@ -0,0 +1,54 @@
+from typing import Dict, Iterable, Tuple
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import get_metrics
+from app.core.mode import LITE_MODE
+from app.core.singleflight import singleflight_stats
+from app.services.crowding.push import get_push_hub
+
+if not LITE_MODE:
+    from app.services.rag.answer_cache import get_answer_cache
+    from app.services.rag.batcher import get_query_batcher
+    from app.services.rag.llm import get_llm_client
+    from app.services.rag.query_cache import get_query_cache
+    from app.services.feedback import get_feedback_sink
+
+router = APIRouter()
+
+Sample = Tuple[str, str, Dict[str, str], float]
+
+
+def _collect() -> Iterable[Sample]:
+    # health와 같은 통계를 조회 시점에 읽어서 변환 (요청 경로에는 비용 없음)
+    push = get_push_hub().stats()
+    yield "kauni_crowding_subscribers", "gauge", {}, push["subscribers"]
+    yield "kauni_crowding_push_dropped_total", "counter", {}, push["dropped"]
+    for group, s in singleflight_stats().items():
+        yield "kauni_singleflight_coalesced_total", "counter", {"group": group}, s["coalesced"]
+    if LITE_MODE:
+        return
+    for name, s in (("query_embedding", get_query_cache().stats()), ("answer", get_answer_cache().stats())):
+        yield "kauni_cache_hits_total", "counter", {"cache": name}, s["hits"]
+        yield "kauni_cache_misses_total", "counter", {"cache": name}, s["misses"]
+        yield "kauni_cache_entries", "gauge", {"cache": name}, s["entries"]
+    llm = get_llm_client().stats()
+    yield "kauni_llm_inflight", "gauge", {}, llm["inflight"]
+    yield "kauni_llm_circuit_open", "gauge", {}, 0 if llm["circuit"] == "closed" else 1
+    yield "kauni_llm_retries_total", "counter", {}, llm["retries"]
+    yield "kauni_llm_failures_total", "counter", {}, llm["failures"]
+    yield "kauni_embedding_batcher_pending", "gauge", {}, get_query_batcher().stats()["pending"]
+    feedback = get_feedback_sink().stats()
+    yield "kauni_feedback_queued", "gauge", {}, feedback["queued"]
+    yield "kauni_feedback_written_total", "counter", {}, feedback["written"]
+    yield "kauni_feedback_spilled_total", "counter", {}, feedback["spilled"]
+
+
+get_metrics().add_collector(_collect)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """Prometheus 스크레이프용 지표 (단계별 지연, 폴백/가드레일/토큰 카운터, 캐시 적중 등)"""
+    return PlainTextResponse(get_metrics().render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from datetime import datetime
+from pydantic import BaseModel, Field
 from typing import List, Optional
 
 class ChatRequest(BaseModel):
@@ -8,16 +9,39 @@ class ChatRequest(BaseModel):
 class Context(BaseModel):
     content: str
     metadata: Optional[dict] = None
+    id: Optional[str] = None
 
 class ChatResponse(BaseModel):
     answer: str
     contexts: List[Context]
+    source: Optional[str] = None
 
 class IngestRequest(BaseModel):
     path: str
 
 class IngestResponse(BaseModel):
     indexed: int
+    skipped: int = 0
+    deleted: int = 0
+    failed: int = 0
+
+class IngestJobResponse(BaseModel):
+    job_id: str
+    status: str
+
+class IngestJobStatus(BaseModel):
+    job_id: str
+    source: str
+    kind: str
+    status: str
+    processed: int
+    total: Optional[int] = None
+    rows_written: int
+    elapsed_sec: float
+    docs_per_sec: float
+    eta_sec: Optional[float] = None
+    errors: List[str]
+    result: Optional[IngestResponse] = None  # 작업이 성공하면 수집 통계
 
 class SearchResponse(BaseModel):
     results: List[Context]
@@ -41,6 +65,10 @@ class OkResponse(BaseModel):
 
 class FeedbackRequest(BaseModel):
     feedback: str
+    # 검색 튜닝용: 피드백 대상 답변의 질문, 검색된 문서 id(contexts[].id), 답변 출처(source)
+    query: Optional[str] = None
+    document_ids: List[str] = Field(default_factory=list, max_length=50)
+    answer_source: Optional[str] = None
 
 class FeedbackResponse(BaseModel):
     message: str
@@ -51,3 +79,16 @@ class CrowdingRequest(BaseModel):
 class CrowdingResponse(BaseModel):
     crowding_level: str
     message: str
+
+class CrowdingSample(BaseModel):
+    location_id: str
+    area_id: str
+    visitors: int = Field(ge=0)
+    timestamp: Optional[datetime] = None  # 없으면 수신 시각
+
+class CrowdingSamplesRequest(BaseModel):
+    samples: List[CrowdingSample]
+
+class CrowdingSamplesResponse(BaseModel):
+    accepted: int
+    rejected: int
@@ -0,0 +1,257 @@
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .registry import LocationInfo
+from .store import CrowdingStore, congestion_level, get_crowding_store
+
+_REFIT_SEC = float(os.getenv("CROWDING_FORECAST_REFIT_SEC", "300"))
+_PRIOR = 3.0  # 표본이 적은 (요일, 시) 칸을 상위 프로필 쪽으로 당기는 가상 표본 수
+_MAX_HOURS = 48
+_HOURS_PER_WEEK = 168
+
+# 혼잡도/방문 시기를 묻는 질문
+_TIMING_QUESTION = re.compile(r"언제|몇 ?시|혼잡|붐비|북적|사람 ?많|한산|한가|여유")
+
+
+def _local_offset() -> float:
+    return datetime.now().astimezone().utcoffset().total_seconds()
+
+
+def _week_hour(ts: np.ndarray, offset: float) -> np.ndarray:
+    """유닉스 시각 -> 주 단위 시간 칸 (월요일 0시 = 0, ..., 일요일 23시 = 167)"""
+    local_hours = np.floor((ts + offset) / 3600.0).astype(np.int64)
+    # 1970-01-01은 목요일(월요일 기준 3)
+    dow = (local_hours // 24 + 3) % 7
+    return dow * 24 + local_hours % 24
+
+
+class CrowdingForecaster:
+    """구역별 (요일 x 시간) 혼잡도 프로필을 이력에서 학습해 앞으로 N시간의 crowding_ratio를 예측
+
+    모든 구역을 한 번에 np.bincount로 집계하고, 재학습 때는 지난 학습 이후 새로 들어온 샘플만 더한다.
+    표본이 적은 칸은 (요일, 시) -> 시간대 -> 구역 평균 순으로 상위 프로필에 가깝게 보정한다.
+    """
+
+    def __init__(self, store: Optional[CrowdingStore] = None):
+        self.store = store or get_crowding_store()
+        n = len(self.store.registry.areas)
+        self._sums = np.zeros((n, _HOURS_PER_WEEK), dtype=np.float64)
+        self._counts = np.zeros((n, _HOURS_PER_WEEK), dtype=np.float64)
+        self._watermark = np.zeros(n, dtype=np.float64)  # 구역별로 학습에 반영한 마지막 샘플 시각
+        self._epochs = np.zeros(n, dtype=np.int64)  # 학습에 반영한 저장소 이력 세대
+        self._profile: Optional[np.ndarray] = None  # [A, 168] 보정된 예측 프로필
+        self._fitted_version = -1
+        self.fitted_at: Optional[float] = None
+        self.samples_seen = 0
+        self._cache: Dict[Tuple[Any, ...], bytes] = {}
+        self._lock = threading.Lock()
+
+    def refit(self) -> bool:
+        """새 샘플이 있으면 프로필 갱신 (바뀐 게 없으면 False)"""
+        version = self.store.version
+        if version == self._fitted_version:
+            return False
+        # 이력이 버려진 구역(시뮬레이터 값 -> 실제 센서)은 누적값을 비우고 남은 이력으로 다시 학습
+        # (세대를 이력보다 먼저 읽으므로, 그 사이에 버려져도 다음 학습에서 다시 맞춰짐)
+        epochs = self.store.epochs()
+        reset = epochs != self._epochs
+        prev_sums = np.where(reset[:, None], 0.0, self._sums)
+        prev_counts = np.where(reset[:, None], 0.0, self._counts)
+        prev_watermark = np.where(reset, 0.0, self._watermark)
+        ts, values, count = self.store.history()
+        valid = (np.arange(ts.shape[1])[None, :] < count[:, None]) & (ts > prev_watermark[:, None])
+        area_idx, col = np.nonzero(valid)
+        ratio = values[area_idx, col] / self.store.capacity[area_idx]
+        cells = area_idx * _HOURS_PER_WEEK + _week_hour(ts[area_idx, col], _local_offset())
+        size = self._sums.size
+        sums = prev_sums + np.bincount(cells, weights=ratio, minlength=size).reshape(self._sums.shape)
+        counts = prev_counts + np.bincount(cells, minlength=size).reshape(self._counts.shape)
+        watermark = np.maximum(prev_watermark, np.where(valid, ts, 0.0).max(axis=1))
+        profile = _smooth(sums, counts)
+        with self._lock:
+            self._sums, self._counts, self._watermark, self._epochs = sums, counts, watermark, epochs
+            self._profile = profile
+            self._fitted_version = version
+            self.fitted_at = time.time()
+            self.samples_seen += int(area_idx.size)
+            self._cache.clear()
+        return True
+
+    def predict(self, hours: int, start: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(각 시간의 시작 시각[N], 예측 crowding_ratio[A, N]) - 학습 전이면 ratio는 NaN"""
+        start = start or time.time()
+        hour_starts = (np.floor(start / 3600.0) + np.arange(1, hours + 1)) * 3600.0
+        with self._lock:
+            profile = self._profile
+        if profile is None:
+            return hour_starts, np.full((len(self.store.registry.areas), hours), np.nan)
+        return hour_starts, profile[:, _week_hour(hour_starts, _local_offset())]
+
+    def forecast_json(self, hours: int, location_id: Optional[str] = None) -> Optional[bytes]:
+        """/crowding/forecast 응답 본문 (같은 시간대/모델이면 캐시된 bytes 재사용, 모르는 장소면 None)"""
+        hours = max(1, min(_MAX_HOURS, hours))
+        registry = self.store.registry
+        if location_id is not None and registry.location(location_id) is None:
+            return None
+        key = (hours, location_id, int(time.time() // 3600))
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        locations = [registry.location(location_id)] if location_id else registry.locations
+        hour_starts, ratios = self.predict(hours)
+        data = [self._location_forecast(loc, hour_starts, ratios) for loc in locations]
+        body = json.dumps(
+            {
+                "data": data[0] if location_id else data,
+                "model_updated_at": datetime.fromtimestamp(self.fitted_at).isoformat() if self.fitted_at else None,
+            },
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
+        with self._lock:
+            if len(self._cache) > 64:
+                self._cache.clear()
+            self._cache[key] = body
+        return body
+
+    def describe(self, location: LocationInfo, hours: int = 12) -> Optional[str]:
+        """챗 답변용 요약 문장 (학습 전이면 None)"""
+        hour_starts, ratios = self.predict(hours)
+        fc = self._location_forecast(location, hour_starts, ratios)
+        if fc["best_time"] is None:
+            return None
+        timeline = ", ".join(
+            f"{datetime.fromisoformat(h['time']).hour}시 {h['congestion_level']}({h['crowding_ratio']:.0%})"
+            for h in fc["forecast"]
+        )
+        best = datetime.fromisoformat(fc["best_time"])
+        return (
+            f"{location.name} 혼잡도 예측 (최근 방문 기록의 요일/시간대 패턴 기준)\n"
+            f"앞으로 {hours}시간: {timeline}\n"
+            f"가장 한산할 것으로 예상되는 시간: {best.hour}시"
+        )
+
+    def _location_forecast(self, loc: LocationInfo, hour_starts: np.ndarray, ratios: np.ndarray) -> Dict[str, Any]:
+        slots = [a.slot for a in loc.areas]
+        area_ratios = ratios[slots]
+        # 장소 전체는 (예측이 있는 구역들의) 수용 인원 가중 평균
+        weights = np.where(np.isnan(area_ratios), 0.0, self.store.capacity[slots][:, None])
+        total = weights.sum(axis=0)
+        with np.errstate(invalid="ignore"):
+            loc_ratio = np.nansum(area_ratios * weights, axis=0) / total
+        loc_ratio[total == 0] = np.nan
+        times = [datetime.fromtimestamp(t).isoformat() for t in hour_starts]
+        best = int(np.nanargmin(loc_ratio)) if not np.all(np.isnan(loc_ratio)) else None
+        return {
+            "id": loc.id,
+            "name": loc.name,
+            "forecast": _series(times, loc_ratio),
+            "best_time": times[best] if best is not None else None,
+            "areas": [
+                {"id": a.id, "name": a.name, "forecast": _series(times, ratios[a.slot])}
+                for a in loc.areas
+            ],
+        }
+
+
+def _smooth(sums: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """(요일, 시) 평균을 시간대 평균과 구역 평균으로 보정한 [A, 168] 프로필"""
+    area_mean = sums.sum(axis=1) / np.maximum(counts.sum(axis=1), 1.0)  # [A]
+    hour_sums = sums.reshape(-1, 7, 24).sum(axis=1)  # [A, 24]
+    hour_counts = counts.reshape(-1, 7, 24).sum(axis=1)
+    hour_mean = (hour_sums + _PRIOR * area_mean[:, None]) / (hour_counts + _PRIOR)
+    hour_prior = np.tile(hour_mean, (1, 7))  # [A, 168]
+    profile = (sums + _PRIOR * hour_prior) / (counts + _PRIOR)
+    profile[counts.sum(axis=1) == 0] = np.nan  # 샘플이 하나도 없는 구역은 예측하지 않음
+    return np.clip(profile, 0.0, 1.0)
+
+
+def _series(times: List[str], ratios: np.ndarray) -> List[Dict[str, Any]]:
+    out = []
+    for t, r in zip(times, ratios):
+        if np.isnan(r):
+            out.append({"time": t, "crowding_ratio": None, "congestion_level": None})
+        else:
+            out.append({"time": t, "crowding_ratio": round(float(r), 2), "congestion_level": congestion_level(float(r))})
+    return out
+
+
+def forecast_context(query: str) -> Optional[Dict[str, Any]]:
+    """혼잡 시기를 묻는 질문이면 해당 장소의 예측을 검색 컨텍스트 형태로 반환"""
+    if not _TIMING_QUESTION.search(query):
+        return None
+    forecaster = get_forecaster()
+    location = forecaster.store.registry.match(query)
+    if location is None:
+        return None
+    text = forecaster.describe(location)
+    if text is None:
+        return None
+    return {
+        "id": f"crowding:{location.id}",
+        "content": text,
+        "metadata": {"source": "crowding_forecast", "location_id": location.id},
+    }
+
+
+class _RefitLoop:
+    """주기적으로 새 샘플을 반영하는 백그라운드 스레드 (요청 경로에서는 학습하지 않음)"""
+
+    def __init__(self, forecaster: CrowdingForecaster, interval_sec: float = _REFIT_SEC):
+        self.forecaster = forecaster
+        self.interval_sec = interval_sec
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="crowding-forecast", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.forecaster.refit()
+            except Exception as e:
+                print(f"Crowding forecast refit failed: {e}")
+            if self._stop.wait(self.interval_sec):
+                return
+
+
+_forecaster: Optional[CrowdingForecaster] = None
+_forecaster_lock = threading.Lock()
+_loop: Optional[_RefitLoop] = None
+
+
+def get_forecaster() -> CrowdingForecaster:
+    global _forecaster
+    if _forecaster is not None:
+        return _forecaster
+    with _forecaster_lock:
+        if _forecaster is None:
+            _forecaster = CrowdingForecaster()
+    return _forecaster
+
+
+def start_forecaster() -> None:
+    global _loop
+    if _loop is None:
+        _loop = _RefitLoop(get_forecaster())
+        _loop.start()
+
+
+def stop_forecaster() -> None:
+    global _loop
+    loop, _loop = _loop, None
+    if loop is not None:
+        loop.stop()
@@ -0,0 +1,219 @@
+import asyncio
+import json
+import os
+from typing import AsyncIterator, Dict, Optional, Set
+
+import numpy as np
+
+from .store import CrowdingStore, get_crowding_store
+
+_INTERVAL_SEC = float(os.getenv("CROWDING_PUSH_INTERVAL_SEC", "1.0"))  # 이 간격 동안의 변경을 한 프레임으로 합침
+_QUEUE_SIZE = int(os.getenv("CROWDING_PUSH_QUEUE_SIZE", "8"))  # 구독자별로 쌓아 둘 최대 프레임 수
+_MAX_LAG = int(os.getenv("CROWDING_PUSH_MAX_LAG", "3"))  # 연속으로 밀린 횟수가 이보다 많으면 연결을 끊음
+_HEARTBEAT_SEC = float(os.getenv("CROWDING_PUSH_HEARTBEAT_SEC", "15"))
+
+_PING = b": ping\n\n"
+
+
+def _frame(event: str, version: int, data: bytes) -> bytes:
+    # data는 이미 직렬화된 JSON (구독자 수와 관계없이 프레임당 한 번만 인코딩)
+    return b"event: " + event.encode() + b"\nid: " + str(version).encode() + b"\ndata: " + data + b"\n\n"
+
+
+class Subscriber:
+    """구독 하나 (location_id가 None이면 전체 장소)"""
+
+    __slots__ = ("location_id", "queue", "lagged")
+
+    def __init__(self, location_id: Optional[str], queue_size: int):
+        self.location_id = location_id
+        self.queue: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue(max(1, queue_size))
+        self.lagged = 0
+
+
+class CrowdingPushHub:
+    """혼잡도 변경을 SSE 구독자에게 밀어 주는 브로드캐스터
+
+    interval마다 저장소 version을 확인하고, 바뀐 구역만 담은 delta 프레임을 장소별로 한 번씩 만들어
+    해당 장소/전체 구독자의 큐에 넣는다. 큐가 가득 찬 느린 구독자는 밀린 프레임을 버리고 최신 snapshot 하나로
+    대체하며, 그래도 계속 밀리면 연결을 끊는다 (구독자당 메모리는 queue_size 프레임으로 제한).
+    """
+
+    def __init__(
+        self,
+        store: Optional[CrowdingStore] = None,
+        interval_sec: float = _INTERVAL_SEC,
+        queue_size: int = _QUEUE_SIZE,
+        max_lag: int = _MAX_LAG,
+    ):
+        self.store = store or get_crowding_store()
+        self.interval_sec = interval_sec
+        self.queue_size = queue_size
+        self.max_lag = max_lag
+        self._topics: Dict[Optional[str], Set[Subscriber]] = {}
+        self._version, self._visitors = self.store.current()
+        self._task: Optional["asyncio.Task[None]"] = None
+        self.frames = 0
+        self.resyncs = 0
+        self.dropped = 0
+
+    # 구독
+
+    def subscribe(self, location_id: Optional[str] = None) -> Optional[Subscriber]:
+        """모르는 장소면 None"""
+        if location_id is not None and self.store.registry.location(location_id) is None:
+            return None
+        sub = Subscriber(location_id, self.queue_size)
+        self._topics.setdefault(location_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        subs = self._topics.get(sub.location_id)
+        if subs is not None:
+            subs.discard(sub)
+            if not subs:
+                del self._topics[sub.location_id]
+
+    async def events(self, sub: Subscriber) -> AsyncIterator[bytes]:
+        """snapshot 한 번 -> delta... (구독 해제는 호출한 쪽이 finally에서)"""
+        yield self._snapshot(sub.location_id)
+        while True:
+            frame = await sub.queue.get()
+            if frame is None:
+                return
+            if sub.queue.empty():
+                sub.lagged = 0  # 밀린 프레임을 다 따라잡음
+            yield frame
+
+    # 브로드캐스트
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        for subs in list(self._topics.values()):
+            for sub in list(subs):
+                self._close(sub)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "subscribers": sum(len(s) for s in self._topics.values()),
+            "topics": len(self._topics),
+            "version": self._version,
+            "frames": self.frames,
+            "resyncs": self.resyncs,
+            "dropped": self.dropped,
+        }
+
+    async def _run(self) -> None:
+        since_ping = 0.0
+        while True:
+            await asyncio.sleep(self.interval_sec)
+            try:
+                sent = self.tick()
+            except Exception as e:
+                print(f"Crowding push failed: {e}")
+                sent = False
+            since_ping = 0.0 if sent else since_ping + self.interval_sec
+            if since_ping >= _HEARTBEAT_SEC:
+                # 프록시가 유휴 연결을 끊지 않도록 주석 프레임 전송
+                since_ping = 0.0
+                for subs in list(self._topics.values()):
+                    for sub in list(subs):
+                        self._publish(sub, _PING)
+
+    def tick(self) -> bool:
+        """마지막 브로드캐스트 이후 바뀐 구역을 delta로 전송 (보낸 게 있으면 True)"""
+        version, visitors = self.store.current()
+        if version == self._version:
+            return False
+        changed = np.nonzero(visitors != self._visitors)[0]
+        self._version, self._visitors = version, visitors
+        if changed.size == 0 or not self._topics:
+            return False
+        registry = self.store.registry
+        changed_areas: Dict[str, Set[str]] = {}
+        for slot in changed:
+            area = registry.areas[int(slot)]
+            changed_areas.setdefault(area.location_id, set()).add(area.id)
+        parts: Dict[str, bytes] = {}
+        for location_id, area_ids in changed_areas.items():
+            payload = self.store.location_payload(location_id)
+            payload["areas"] = [a for a in payload["areas"] if a["id"] in area_ids]
+            parts[location_id] = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        prefix = b'{"version":' + str(version).encode() + b',"data":['
+        sent = False
+        for topic, subs in list(self._topics.items()):
+            if topic is None:
+                body = b",".join(parts.values())
+            elif topic in parts:
+                body = parts[topic]
+            else:
+                continue
+            frame = _frame("delta", version, prefix + body + b"]}")
+            self.frames += 1
+            for sub in list(subs):
+                self._publish(sub, frame)
+            sent = True
+        return sent
+
+    def _publish(self, sub: Subscriber, frame: bytes) -> None:
+        try:
+            sub.queue.put_nowait(frame)
+            return
+        except asyncio.QueueFull:
+            pass
+        sub.lagged += 1
+        if sub.lagged > self.max_lag:
+            self.dropped += 1
+            self._close(sub)
+            return
+        # 밀린 delta는 버리고 현재 상태 전체로 대체 (클라이언트는 snapshot을 받으면 화면을 통째로 갱신)
+        self.resyncs += 1
+        _drain(sub.queue)
+        sub.queue.put_nowait(self._snapshot(sub.location_id))
+
+    def _snapshot(self, location_id: Optional[str]) -> bytes:
+        self.frames += 1
+        return _frame("snapshot", self.store.version, self.store.snapshot_json(location_id) or b"{}")
+
+    def _close(self, sub: Subscriber) -> None:
+        self.unsubscribe(sub)
+        _drain(sub.queue)
+        sub.queue.put_nowait(None)
+
+
+def _drain(queue: "asyncio.Queue[Optional[bytes]]") -> None:
+    while not queue.empty():
+        queue.get_nowait()
+
+
+_hub: Optional[CrowdingPushHub] = None
+
+
+def get_push_hub() -> CrowdingPushHub:
+    # 이벤트 루프 안에서만 쓰이므로 락 없이 생성
+    global _hub
+    if _hub is None:
+        _hub = CrowdingPushHub()
+    return _hub
+
+
+def start_push_hub() -> None:
+    """lifespan에서 호출 (실행 중인 이벤트 루프 필요)"""
+    get_push_hub().start()
+
+
+async def stop_push_hub() -> None:
+    global _hub
+    hub, _hub = _hub, None
+    if hub is not None:
+        await hub.stop()
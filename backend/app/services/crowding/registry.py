@@ -0,0 +1,97 @@
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+
+class AreaInfo(NamedTuple):
+    slot: int  # 저장소 배열에서의 행 번호
+    location_id: str
+    id: str
+    name: str
+    max_capacity: int
+
+
+class LocationInfo(NamedTuple):
+    index: int
+    id: str
+    name: str
+    category: str
+    areas: Tuple[AreaInfo, ...]
+    aliases: Tuple[str, ...] = ()
+
+
+# 혼잡도를 집계하는 장소/구역 정의 (실제 센서가 붙으면 같은 id로 샘플을 보냄)
+LOCATIONS = [
+    {
+        "id": "science-museum",
+        "name": "국립중앙과학관",
+        "category": "museum",
+        "aliases": ["과학관", "중앙과학관"],
+        "areas": [
+            {"id": "natural", "name": "자연사관", "max_capacity": 500},
+            {"id": "human", "name": "인류관", "max_capacity": 400},
+            {"id": "astronomy", "name": "천체관", "max_capacity": 200},
+            {"id": "children", "name": "어린이과학관", "max_capacity": 300}
+        ]
+    },
+    {
+        "id": "central-market",
+        "name": "대전중앙시장",
+        "category": "market",
+        "aliases": ["중앙시장"],
+        "areas": [
+            {"id": "area1", "name": "1구역", "max_capacity": 200},
+            {"id": "area2", "name": "2구역", "max_capacity": 200},
+            {"id": "area3", "name": "3구역", "max_capacity": 200},
+            {"id": "area4", "name": "4구역", "max_capacity": 200},
+            {"id": "area5", "name": "5구역", "max_capacity": 200},
+            {"id": "area6", "name": "6구역", "max_capacity": 200}
+        ]
+    },
+    {
+        "id": "expo-park",
+        "name": "엑스포과학공원",
+        "category": "park",
+        "aliases": ["엑스포", "엑스포공원", "한빛탑"],
+        "areas": [
+            {"id": "main", "name": "메인광장", "max_capacity": 1000},
+            {"id": "garden", "name": "정원", "max_capacity": 500}
+        ]
+    }
+]
+
+
+class Registry:
+    """장소/구역을 id로 바로 찾기 위한 색인 (구역마다 고정된 배열 slot 번호를 부여)"""
+
+    def __init__(self, locations: List[Dict] = LOCATIONS):
+        self.locations: List[LocationInfo] = []
+        self.areas: List[AreaInfo] = []
+        self._locations: Dict[str, LocationInfo] = {}
+        self._areas: Dict[Tuple[str, str], AreaInfo] = {}
+        for loc in locations:
+            areas = []
+            for a in loc["areas"]:
+                area = AreaInfo(len(self.areas), loc["id"], a["id"], a["name"], int(a["max_capacity"]))
+                self.areas.append(area)
+                self._areas[(loc["id"], a["id"])] = area
+                areas.append(area)
+            aliases = (loc["name"], *loc.get("aliases", ()))
+            info = LocationInfo(len(self.locations), loc["id"], loc["name"], loc["category"], tuple(areas), aliases)
+            self.locations.append(info)
+            self._locations[info.id] = info
+        # 질문 속 장소 이름 찾기용 (긴 이름부터 매칭)
+        self._by_alias = {alias: info for info in self.locations for alias in info.aliases}
+        self._alias_pattern = re.compile(
+            "|".join(re.escape(a) for a in sorted(self._by_alias, key=len, reverse=True))
+        )
+
+    def location(self, location_id: str) -> Optional[LocationInfo]:
+        return self._locations.get(location_id)
+
+    def area(self, location_id: str, area_id: str) -> Optional[AreaInfo]:
+        return self._areas.get((location_id, area_id))
+
+    def match(self, text: str) -> Optional[LocationInfo]:
+        """문장에 언급된 장소 (이름 또는 별칭)"""
+        m = self._alias_pattern.search(text)
+        return self._by_alias[m.group(0)] if m else None
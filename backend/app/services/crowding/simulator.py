@@ -0,0 +1,92 @@
+import os
+import random
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from .store import CrowdingStore, Sample, get_crowding_store
+
+# 실제 센서 데이터가 없을 때 예전 목 데이터와 같은 패턴으로 샘플을 만들어 넣음 (개발/벤치마크용, CROWDING_SIMULATOR=1이면 켬)
+# 실제 샘플을 받은 장소는 그때부터 시뮬레이션하지 않음
+_ENABLED = os.getenv("CROWDING_SIMULATOR", "0") != "0"
+_INTERVAL_SEC = float(os.getenv("CROWDING_SIM_INTERVAL_SEC", "30"))
+_BACKFILL_DAYS = int(os.getenv("CROWDING_SIM_BACKFILL_DAYS", "7"))  # 시작 시 채워 둘 과거 이력 (예측용)
+_BACKFILL_STEP_SEC = 300
+
+
+def _base_crowding(hour: int) -> float:
+    # 시간대별 혼잡도 패턴 (오전 10-12시, 오후 2-6시가 혼잡)
+    if 10 <= hour <= 12 or 14 <= hour <= 18:
+        return 0.7  # 70% 기본 혼잡도
+    elif 12 <= hour <= 14:
+        return 0.9  # 점심시간 90%
+    return 0.3  # 그 외 시간 30%
+
+
+def simulate_samples(store: CrowdingStore, ts: Optional[float] = None) -> List[Sample]:
+    """모든 구역의 한 시점 샘플 생성 (시간대 기본값 ±20%, 구역별 ±10%)"""
+    ts = ts or time.time()
+    base = _base_crowding(datetime.fromtimestamp(ts).hour)
+    current = max(0.1, min(0.95, base + random.uniform(-0.2, 0.2)))
+    samples = []
+    for area in store.registry.areas:
+        ratio = max(0.05, min(0.95, current + random.uniform(-0.1, 0.1)))
+        samples.append((area.location_id, area.id, int(area.max_capacity * ratio), ts))
+    return samples
+
+
+class CrowdingSimulator:
+    """주기적으로 가상 샘플을 저장소에 넣는 백그라운드 스레드"""
+
+    def __init__(self, store: Optional[CrowdingStore] = None, interval_sec: float = _INTERVAL_SEC):
+        self.store = store or get_crowding_store()
+        self.interval_sec = interval_sec
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="crowding-sim", daemon=True)
+
+    def start(self) -> None:
+        if self.store.version == 0:
+            self.backfill(_BACKFILL_DAYS)
+        else:
+            print("Crowding store already has samples, skipping simulator backfill")
+        self.store.ingest(simulate_samples(self.store), simulated=True)  # 첫 조회 전에 데이터가 있도록 바로 한 번
+        self._thread.start()
+
+    def backfill(self, days: int) -> None:
+        """과거 days일치 샘플을 5분 간격으로 채움"""
+        now = time.time()
+        start = now - days * 86400
+        samples: List[Sample] = []
+        for ts in range(int(start), int(now), _BACKFILL_STEP_SEC):
+            samples.extend(simulate_samples(self.store, float(ts)))
+        self.store.ingest(samples, simulated=True)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_sec):
+            try:
+                self.store.ingest(simulate_samples(self.store), simulated=True)
+            except Exception as e:
+                print(f"Crowding simulator failed: {e}")
+
+
+_simulator: Optional[CrowdingSimulator] = None
+
+
+def start_simulator() -> None:
+    """lifespan에서 호출 (CROWDING_SIMULATOR=1일 때만 시작)"""
+    global _simulator
+    if _ENABLED and _simulator is None:
+        _simulator = CrowdingSimulator()
+        _simulator.start()
+
+
+def stop_simulator() -> None:
+    global _simulator
+    simulator, _simulator = _simulator, None
+    if simulator is not None:
+        simulator.stop()
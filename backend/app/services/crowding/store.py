@@ -0,0 +1,203 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .registry import LocationInfo, Registry
+
+_HISTORY_SIZE = int(os.getenv("CROWDING_HISTORY_SIZE", "4032"))  # 구역당 보관 샘플 수 (5분 간격이면 2주)
+
+# (location_id, area_id, visitors, timestamp) - timestamp가 None이면 수신 시각
+Sample = Tuple[str, str, int, Optional[float]]
+
+
+def congestion_level(ratio: float) -> str:
+    if ratio < 0.4:
+        return "low"
+    if ratio < 0.7:
+        return "medium"
+    return "high"
+
+
+class CrowdingStore:
+    """구역별 혼잡도 시계열 저장소
+
+    구역마다 고정 크기 링 버퍼(numpy 배열)에 (시각, 인원) 샘플을 쌓고,
+    최신 인원과 장소별 합계는 샘플이 들어올 때 증분으로 갱신한다.
+    조회 응답은 장소별로 직렬화된 JSON bytes를 캐시해 두고, 데이터가 바뀐 장소만 다시 만든다.
+    """
+
+    def __init__(self, registry: Optional[Registry] = None, history_size: int = _HISTORY_SIZE):
+        self.registry = registry or Registry()
+        self.history_size = max(1, history_size)
+        n_areas = len(self.registry.areas)
+        n_locs = len(self.registry.locations)
+        self.capacity = np.array([a.max_capacity for a in self.registry.areas], dtype=np.float32)
+        self._area_loc = np.array(
+            [self.registry.location(a.location_id).index for a in self.registry.areas], dtype=np.int64
+        )
+        self.visitors = np.zeros(n_areas, dtype=np.int64)
+        self.updated_at = np.zeros(n_areas, dtype=np.float64)  # 0이면 아직 샘플 없음
+        self._ts = np.zeros((n_areas, self.history_size), dtype=np.float64)
+        self._values = np.zeros((n_areas, self.history_size), dtype=np.float32)
+        self._head = np.zeros(n_areas, dtype=np.int64)
+        self._count = np.zeros(n_areas, dtype=np.int64)
+        self._epoch = np.zeros(n_areas, dtype=np.int64)  # 이력을 버릴 때마다 증가 (예측 모델이 누적값을 다시 만들도록)
+        self._loc_visitors = np.zeros(n_locs, dtype=np.int64)
+        self._loc_capacity = np.bincount(self._area_loc, weights=self.capacity, minlength=n_locs).astype(np.int64)
+        self._loc_updated = np.zeros(n_locs, dtype=np.float64)
+        self._loc_real = np.zeros(n_locs, dtype=bool)  # 실제 샘플을 한 번이라도 받은 장소
+        self._loc_json: List[Optional[bytes]] = [None] * n_locs
+        self._all_json: Optional[bytes] = None
+        self.version = 0
+        self._lock = threading.Lock()
+
+    # 쓰기
+
+    def ingest(self, samples: Iterable[Sample], simulated: bool = False) -> Dict[str, int]:
+        """센서/카운터 샘플 일괄 반영 -> {"accepted", "rejected"} (모르는 장소/구역은 rejected)
+
+        simulated=True는 시뮬레이터 샘플로, 실제 샘플을 받은 장소에는 반영하지 않는다.
+        장소에 처음 실제 샘플이 들어오면 그때까지 시뮬레이터가 채운 값과 이력은 버린다.
+        """
+        accepted = rejected = 0
+        now = time.time()
+        with self._lock:
+            changed = set()
+            for location_id, area_id, visitors, ts in samples:
+                area = self.registry.area(location_id, area_id)
+                if area is None:
+                    rejected += 1
+                    continue
+                loc = self._area_loc[area.slot]
+                if simulated and self._loc_real[loc]:
+                    rejected += 1
+                    continue
+                if not simulated and not self._loc_real[loc]:
+                    self._loc_real[loc] = True
+                    self._reset_location(int(loc))
+                accepted += 1
+                slot = area.slot
+                ts = float(ts) if ts else now
+                visitors = max(0, int(visitors))
+                h = self._head[slot]
+                self._ts[slot, h] = ts
+                self._values[slot, h] = visitors
+                self._head[slot] = (h + 1) % self.history_size
+                self._count[slot] = min(self._count[slot] + 1, self.history_size)
+                if ts < self.updated_at[slot]:
+                    continue  # 늦게 도착한 과거 샘플은 이력에만 반영
+                self._loc_visitors[loc] += visitors - self.visitors[slot]
+                self.visitors[slot] = visitors
+                self.updated_at[slot] = ts
+                self._loc_updated[loc] = max(self._loc_updated[loc], ts)
+                changed.add(int(loc))
+            for loc in changed:
+                self._loc_json[loc] = None
+            if changed:
+                self._all_json = None
+                self.version += 1
+        return {"accepted": accepted, "rejected": rejected}
+
+    def _reset_location(self, loc: int) -> None:
+        slots = [a.slot for a in self.registry.locations[loc].areas]
+        self.visitors[slots] = 0
+        self.updated_at[slots] = 0.0
+        self._head[slots] = 0
+        self._count[slots] = 0
+        self._epoch[slots] += 1
+        self._loc_visitors[loc] = 0
+        self._loc_updated[loc] = 0.0
+        self._loc_json[loc] = None
+        self._all_json = None
+
+    # 읽기
+
+    def snapshot_json(self, location_id: Optional[str] = None) -> Optional[bytes]:
+        """{"data": ...} 응답 본문 (장소 id가 없으면 전체, 모르는 장소면 None)"""
+        with self._lock:
+            if location_id is None:
+                if self._all_json is None:
+                    parts = [self._location_json(loc) for loc in self.registry.locations]
+                    self._all_json = b'{"data":[' + b",".join(parts) + b"]}"
+                return self._all_json
+            loc = self.registry.location(location_id)
+            if loc is None:
+                return None
+            return b'{"data":' + self._location_json(loc) + b"}"
+
+    def location_payload(self, location_id: str) -> Optional[Dict[str, Any]]:
+        loc = self.registry.location(location_id)
+        if loc is None:
+            return None
+        with self._lock:
+            return self._location_payload(loc)
+
+    def current(self) -> Tuple[int, np.ndarray]:
+        """(version, 구역별 최신 인원[A] 복사본)"""
+        with self._lock:
+            return self.version, self.visitors.copy()
+
+    def history(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(timestamps[A, H], visitors[A, H], count[A]) 복사본 (링 버퍼 순서 그대로, 유효 샘플 수는 count)"""
+        with self._lock:
+            return self._ts.copy(), self._values.copy(), self._count.copy()
+
+    def epochs(self) -> np.ndarray:
+        """구역별 이력 세대 번호 복사본 (값이 바뀐 구역은 그 전 이력이 버려진 것)"""
+        with self._lock:
+            return self._epoch.copy()
+
+    def _location_json(self, loc: LocationInfo) -> bytes:
+        cached = self._loc_json[loc.index]
+        if cached is None:
+            payload = self._location_payload(loc)
+            cached = self._loc_json[loc.index] = json.dumps(
+                payload, ensure_ascii=False, separators=(",", ":")
+            ).encode("utf-8")
+        return cached
+
+    def _location_payload(self, loc: LocationInfo) -> Dict[str, Any]:
+        areas = []
+        for a in loc.areas:
+            visitors = int(self.visitors[a.slot])
+            ratio = visitors / a.max_capacity if a.max_capacity else 0.0
+            areas.append({
+                "id": a.id,
+                "name": a.name,
+                "current_visitors": visitors,
+                "max_capacity": a.max_capacity,
+                "congestion_level": congestion_level(ratio),
+                "crowding_ratio": round(ratio, 2),
+            })
+        total_visitors = int(self._loc_visitors[loc.index])
+        total_capacity = int(self._loc_capacity[loc.index])
+        updated = self._loc_updated[loc.index]
+        return {
+            "id": loc.id,
+            "name": loc.name,
+            "category": loc.category,
+            "total_visitors": total_visitors,
+            "total_capacity": total_capacity,
+            "congestion_level": congestion_level(total_visitors / total_capacity if total_capacity else 0.0),
+            "areas": areas,
+            "updated_at": datetime.fromtimestamp(updated).isoformat() if updated else None,
+        }
+
+
+_store: Optional[CrowdingStore] = None
+_store_lock = threading.Lock()
+
+
+def get_crowding_store() -> CrowdingStore:
+    global _store
+    if _store is not None:
+        return _store
+    with _store_lock:
+        if _store is None:
+            _store = CrowdingStore()
+    return _store
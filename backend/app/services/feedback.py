@@ -0,0 +1,272 @@
+import asyncio
+import json
+import os
+import random
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+_TABLE = os.getenv("FEEDBACK_TABLE", "feedback")
+_QUEUE_SIZE = int(os.getenv("FEEDBACK_QUEUE_SIZE", "1000"))  # 메모리에 쌓아 둘 최대 이벤트 수 (넘치면 바로 spill 파일로)
+_BATCH_SIZE = int(os.getenv("FEEDBACK_BATCH_SIZE", "50"))
+_FLUSH_INTERVAL_SEC = float(os.getenv("FEEDBACK_FLUSH_INTERVAL_SEC", "2.0"))  # 배치가 덜 차도 이 시간이 지나면 씀
+_MAX_RETRIES = int(os.getenv("FEEDBACK_MAX_RETRIES", "3"))
+_DRAIN_TIMEOUT_SEC = float(os.getenv("FEEDBACK_DRAIN_TIMEOUT_SEC", "5.0"))  # 종료 시 남은 이벤트를 쓰는 데 기다릴 최대 시간
+_SPILL_PATH = os.getenv("FEEDBACK_SPILL_PATH", ".feedback_spill.jsonl")
+_RETRY_BASE_SEC = 0.5
+
+Event = Dict[str, Any]
+Writer = Callable[[List[Event]], Awaitable[None]]
+
+
+def feedback_event(
+    feedback: str,
+    query: Optional[str] = None,
+    document_ids: Optional[List[str]] = None,
+    answer_source: Optional[str] = None,
+) -> Event:
+    """feedback 테이블 행 하나 (id는 재시도/재전송으로 같은 이벤트가 두 번 들어가도 걸러낼 수 있게 미리 정함)"""
+    return {
+        "id": str(uuid.uuid4()),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "feedback": feedback,
+        "query": query,
+        "document_ids": list(document_ids or []),
+        "answer_source": answer_source,
+    }
+
+
+async def _write_supabase(rows: List[Event]) -> None:
+    from app.core.supabase_dal import get_supabase_dal
+
+    # 타임아웃 뒤 실제로는 커밋된 배치를 재시도/재전송해도 409로 배치 전체가 실패하지 않게 이미 있는 id는 건너뜀
+    await get_supabase_dal().upsert(_TABLE, rows, on_conflict="id", ignore_duplicates=True)
+
+
+class FeedbackSink:
+    """피드백 write-behind 큐: 요청 경로에서는 큐에 넣기만 하고 백그라운드 태스크가 배치로 저장
+
+    batch_size개가 모이거나 첫 이벤트 후 flush_interval_sec가 지나면 한 번에 쓰고, 실패하면 지수 백오프로
+    재시도한다. 그래도 실패한 배치와 큐가 가득 찼을 때 들어온 이벤트는 spill 파일(JSON Lines)에 덧붙여 두었다가
+    저장소 쓰기가 다시 성공하면 재전송한다. 종료 시에는 drain_timeout_sec 동안 남은 이벤트를 쓰고, 못 쓴 것은 spill.
+    """
+
+    def __init__(
+        self,
+        writer: Writer = _write_supabase,
+        queue_size: int = _QUEUE_SIZE,
+        batch_size: int = _BATCH_SIZE,
+        flush_interval_sec: float = _FLUSH_INTERVAL_SEC,
+        max_retries: int = _MAX_RETRIES,
+        spill_path: str = _SPILL_PATH,
+    ):
+        self.writer = writer
+        self.batch_size = max(1, batch_size)
+        self.flush_interval_sec = flush_interval_sec
+        self.max_retries = max_retries
+        self.spill_path = spill_path
+        self._queue: "asyncio.Queue[Optional[Event]]" = asyncio.Queue(max(1, queue_size))
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._stopping = False
+        self._inflight: List[Event] = []
+        # 이전 실행에서 남긴 spill 파일도 다음 쓰기 성공 후 재전송
+        self._spill_pending = os.path.exists(spill_path) or os.path.exists(spill_path + ".replay")
+        self.submitted = 0
+        self.written = 0
+        self.batches = 0
+        self.retries = 0
+        self.overflow = 0
+        self.spilled = 0
+        self.replayed = 0
+
+    def submit(self, event: Event) -> bool:
+        """이벤트를 큐에 넣고 바로 반환 (큐가 가득 차면 spill 파일에 씀, 그것도 실패하면 False)"""
+        self.submitted += 1
+        if not self._stopping:
+            try:
+                self._queue.put_nowait(event)
+                return True
+            except asyncio.QueueFull:
+                self.overflow += 1
+        return self._spill([event])
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self, timeout: float = _DRAIN_TIMEOUT_SEC) -> None:
+        """새 이벤트를 받지 않고 남은 이벤트를 저장 (timeout 안에 못 쓰면 spill 파일로)"""
+        task, self._task = self._task, None
+        self._stopping = True
+        if task is None:
+            self._spill(self._take_all())
+            return
+        try:
+            self._queue.put_nowait(None)  # 대기 중인 get()을 깨움 (가득 차 있으면 어차피 깨어 있음)
+        except asyncio.QueueFull:
+            pass
+        try:
+            await asyncio.wait_for(task, timeout)
+        except asyncio.TimeoutError:
+            print(f"Feedback drain timed out after {timeout}s, spilling remaining events")
+            self._spill(self._inflight + self._take_all())
+            self._inflight = []
+        except Exception as e:
+            print(f"Feedback sink stopped with error: {e}")
+            self._spill(self._inflight + self._take_all())
+            self._inflight = []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize(),
+            "submitted": self.submitted,
+            "written": self.written,
+            "batches": self.batches,
+            "retries": self.retries,
+            "overflow": self.overflow,
+            "spilled": self.spilled,
+            "replayed": self.replayed,
+        }
+
+    async def _run(self) -> None:
+        while not (self._stopping and self._queue.empty()):
+            batch = await self._collect()
+            if batch:
+                await self._flush(batch)
+
+    async def _collect(self) -> List[Event]:
+        """첫 이벤트를 기다린 뒤 batch_size개가 되거나 flush_interval_sec가 지날 때까지 모음"""
+        loop = asyncio.get_running_loop()
+        batch: List[Event] = []
+        deadline: Optional[float] = None
+        while len(batch) < self.batch_size:
+            if self._stopping:
+                # 종료 중에는 기다리지 않고 남은 것만 가져감
+                batch.extend(self._take_all(self.batch_size - len(batch)))
+                break
+            try:
+                if deadline is None:
+                    event = await self._queue.get()
+                else:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    event = await asyncio.wait_for(self._queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            if event is None:
+                continue
+            batch.append(event)
+            if deadline is None:
+                deadline = loop.time() + self.flush_interval_sec
+        return batch
+
+    async def _flush(self, batch: List[Event]) -> None:
+        # 종료 시 drain이 시간 초과로 취소되면 stop()이 _inflight를 spill하므로 여기서는 끝난 뒤에만 비움
+        self._inflight = batch
+        ok = await self._write(batch, self.max_retries)
+        self._inflight = []
+        if not ok:
+            self._spill(batch)
+            return
+        if self._spill_pending:
+            await self._replay()
+
+    async def _write(self, rows: List[Event], max_retries: int) -> bool:
+        for attempt in range(max_retries + 1):
+            try:
+                await self.writer(rows)
+                break
+            except Exception as e:
+                if attempt == max_retries:
+                    print(f"Feedback batch failed after {attempt + 1} attempts: {e}")
+                    return False
+                self.retries += 1
+                await asyncio.sleep(_RETRY_BASE_SEC * (2 ** attempt) * (0.5 + random.random()))
+        self.written += len(rows)
+        self.batches += 1
+        return True
+
+    async def _replay(self) -> None:
+        """저장소가 다시 살아났으면 spill 파일을 배치로 재전송 (실패한 나머지는 다시 spill)"""
+        replay_path = self.spill_path + ".replay"
+        self._spill_pending = False
+        try:
+            if not os.path.exists(replay_path):
+                if not os.path.exists(self.spill_path):
+                    return
+                # 재전송 중에 새로 spill되는 이벤트와 섞이지 않게 파일을 떼어 냄
+                os.replace(self.spill_path, replay_path)
+            events = await asyncio.to_thread(_read_jsonl, replay_path)
+        except OSError as e:
+            print(f"Feedback spill replay failed: {e}")
+            return
+        for i in range(0, len(events), self.batch_size):
+            if not await self._write(events[i:i + self.batch_size], 0):
+                self._spill(events[i:])
+                break
+            self.replayed += len(events[i:i + self.batch_size])
+        try:
+            os.remove(replay_path)
+        except OSError as e:
+            print(f"Feedback spill cleanup failed: {e}")
+
+    def _spill(self, events: List[Event]) -> bool:
+        # 한 줄씩 덧붙이기만 하므로 이벤트 루프에서 바로 써도 짧음 (저장소 장애/과부하 때만 사용)
+        if not events:
+            return True
+        try:
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                for event in events:
+                    f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"Feedback spill failed, dropping {len(events)} events: {e}")
+            return False
+        self.spilled += len(events)
+        self._spill_pending = True
+        return True
+
+    def _take_all(self, limit: Optional[int] = None) -> List[Event]:
+        events: List[Event] = []
+        while not self._queue.empty() and (limit is None or len(events) < limit):
+            event = self._queue.get_nowait()
+            if event is not None:
+                events.append(event)
+        return events
+
+
+def _read_jsonl(path: str) -> List[Event]:
+    events: List[Event] = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError:
+                print(f"Skipping corrupt feedback spill line: {line[:80]}")
+    return events
+
+
+_sink: Optional[FeedbackSink] = None
+
+
+def get_feedback_sink() -> FeedbackSink:
+    # 이벤트 루프 안에서만 쓰이므로 락 없이 생성
+    global _sink
+    if _sink is None:
+        _sink = FeedbackSink()
+    return _sink
+
+
+def start_feedback_sink() -> None:
+    """lifespan에서 호출 (실행 중인 이벤트 루프 필요)"""
+    get_feedback_sink().start()
+
+
+async def stop_feedback_sink() -> None:
+    global _sink
+    sink, _sink = _sink, None
+    if sink is not None:
+        await sink.stop()
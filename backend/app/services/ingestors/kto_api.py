@@ -1,32 +1,138 @@
 import os
-from typing import List, Dict, Any
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, List, Dict, Any, Iterator, Optional, Set, Tuple
+from urllib.parse import urlsplit
 import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 
-from app.services.rag.vectorstore import add_texts
+from app.services.rag.ingest import IncrementalIndexer
+from app.services.rag.manifest import IngestManifest, content_hash
+
+if TYPE_CHECKING:
+    from app.services.jobs import IngestJob
 
 load_dotenv()
 
 
-KTO_BASE_1 = "http://apis.data.go.kr/B551011/LocgoHubTarService1/areaBasedList1"
-KTO_BASE_2 = "http://apis.data.go.kr/B551011/TarRlteTarService1/areaBasedList1"
+# 로컬 가짜 서버로 테스트할 수 있도록 호스트는 환경변수로 바꿀 수 있음
+KTO_API_BASE = os.getenv("KTO_API_BASE", "http://apis.data.go.kr/B551011")
+KTO_BASE_1 = f"{KTO_API_BASE}/LocgoHubTarService1/areaBasedList1"
+KTO_BASE_2 = f"{KTO_API_BASE}/TarRlteTarService1/areaBasedList1"
 
+_MAX_CONCURRENCY = int(os.getenv("KTO_MAX_CONCURRENCY", "4"))  # 호스트당 동시 요청 수
+_TIMEOUT = (5.0, float(os.getenv("KTO_TIMEOUT_SEC", "30")))  # (connect, read)
+_MAX_RETRIES = int(os.getenv("KTO_MAX_RETRIES", "4"))
+_RETRY_BASE_SEC = 0.5
+_RETRY_STATUS = {429, 500, 502, 503, 504}
 
-def _fetch_kto(url: str, page: int = 1, num_rows: int = 100) -> List[Dict[str, Any]]:
-    key = os.getenv("KTO_SERVICE_KEY")
-    if not key:
-        raise RuntimeError("KTO_SERVICE_KEY가 .env에 필요합니다")
-    params = {
-        "serviceKey": key,
-        "numOfRows": str(num_rows),
-        "pageNo": str(page),
-        "MobileOS": "ETC",
-        "MobileApp": "Kauni",
-        "_type": "json",
-    }
-    r = requests.get(url, params=params, timeout=60)
-    r.raise_for_status()
-    data = r.json()
+
+class KtoHarvester:
+    """KTO(data.go.kr) 목록 API 전체 페이지 수집기
+
+    첫 페이지의 totalCount로 페이지 수를 구하고 나머지 페이지를 keep-alive 세션으로 동시에 가져온다.
+    호스트별 동시 요청 수를 제한하고, 일시적 오류는 지수 백오프로 재시도한다.
+    항목은 페이지가 도착하는 대로 yield되므로 전체 목록을 메모리에 모으지 않는다.
+    """
+
+    def __init__(self, session: Optional[requests.Session] = None, max_concurrency: int = _MAX_CONCURRENCY):
+        self.max_concurrency = max(1, max_concurrency)
+        self.session = session or self._new_session()
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._slots_lock = threading.Lock()
+        self.pages = 0
+        self.failed_pages = 0
+        self.total_items = 0  # 지금까지 확인한 endpoint들의 totalCount 합
+
+    def _new_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.max_concurrency)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    @property
+    def complete(self) -> bool:
+        """모든 페이지를 빠짐없이 가져왔는지"""
+        return self.failed_pages == 0
+
+    def iter_items(self, url: str, num_rows: int = 100) -> Iterator[Dict[str, Any]]:
+        items, total = self.fetch_page(url, 1, num_rows)
+        self.total_items += total
+        yield from items
+        last_page = max(1, -(-total // num_rows))
+        if last_page == 1:
+            return
+        # 소비 속도보다 너무 앞서 가져오지 않도록 동시 요청 수의 2배까지만 미리 요청
+        window = self.max_concurrency * 2
+        pages = iter(range(2, last_page + 1))
+        with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="kto") as pool:
+            inflight: List[Future] = []
+            for page in pages:
+                inflight.append(pool.submit(self._fetch_page_safe, url, page, num_rows))
+                if len(inflight) >= window:
+                    break
+            while inflight:
+                page_items = inflight.pop(0).result()
+                nxt = next(pages, None)
+                if nxt is not None:
+                    inflight.append(pool.submit(self._fetch_page_safe, url, nxt, num_rows))
+                yield from page_items
+
+    def fetch_page(self, url: str, page: int, num_rows: int) -> Tuple[List[Dict[str, Any]], int]:
+        """한 페이지 조회 -> (items, totalCount)"""
+        key = os.getenv("KTO_SERVICE_KEY")
+        if not key:
+            raise RuntimeError("KTO_SERVICE_KEY가 .env에 필요합니다")
+        params = {
+            "serviceKey": key,
+            "numOfRows": str(num_rows),
+            "pageNo": str(page),
+            "MobileOS": "ETC",
+            "MobileApp": "Kauni",
+            "_type": "json",
+        }
+        for attempt in range(_MAX_RETRIES + 1):
+            try:
+                with self._host_slot(url):
+                    r = self.session.get(url, params=params, timeout=_TIMEOUT)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error: Exception = e
+            else:
+                if r.status_code not in _RETRY_STATUS:
+                    r.raise_for_status()
+                    data = r.json()
+                    break
+                error = requests.HTTPError(f"{r.status_code} from {url}", response=r)
+            if attempt == _MAX_RETRIES:
+                raise error
+            time.sleep(_RETRY_BASE_SEC * (2 ** attempt) * (0.5 + random.random()))
+        with self._slots_lock:
+            self.pages += 1
+        return _parse_items(data), _parse_total(data)
+
+    def _fetch_page_safe(self, url: str, page: int, num_rows: int) -> List[Dict[str, Any]]:
+        try:
+            return self.fetch_page(url, page, num_rows)[0]
+        except Exception as e:
+            print(f"KTO page {page} failed: {e}")
+            with self._slots_lock:
+                self.failed_pages += 1
+            return []
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with self._slots_lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = self._host_slots[host] = threading.BoundedSemaphore(self.max_concurrency)
+        return slot
+
+
+def _parse_items(data: Dict[str, Any]) -> List[Dict[str, Any]]:
     # 방어적으로 items 파싱
     try:
         items = (
@@ -44,6 +150,13 @@ def _fetch_kto(url: str, page: int = 1, num_rows: int = 100) -> List[Dict[str, A
     return items
 
 
+def _parse_total(data: Dict[str, Any]) -> int:
+    try:
+        return int(data.get("response", {}).get("body", {}).get("totalCount") or 0)
+    except (AttributeError, TypeError, ValueError):
+        return 0
+
+
 def _item_to_doc(item: Dict[str, Any]) -> Dict[str, Any]:
     # 가능한 필드를 모아 텍스트 구성 (필드명이 다를 수 있어 최대한 유연하게)
     title = item.get("title") or item.get("name") or item.get("facltNm") or ""
@@ -69,16 +182,54 @@ def _item_to_doc(item: Dict[str, Any]) -> Dict[str, Any]:
     return {"text": text, "metadata": meta}
 
 
-def ingest_kto(num_rows: int = 100) -> int:
-    items1 = _fetch_kto(KTO_BASE_1, page=1, num_rows=num_rows)
-    items2 = _fetch_kto(KTO_BASE_2, page=1, num_rows=num_rows)
-    all_items = items1 + items2
-    if not all_items:
-        return 0
-    docs = [_item_to_doc(it) for it in all_items]
-    texts = [d["text"] for d in docs]
-    metas = [d["metadata"] for d in docs]
-    add_texts(texts, metas, ids=None)
-    return len(docs)
+def _item_source(item: Dict[str, Any], text: str) -> str:
+    """KTO 항목의 안정적인 source 키 (콘텐츠 id가 없으면 제목+주소)"""
+    key = item.get("contentid") or item.get("contentId") or item.get("hubTatsCd")
+    if not key:
+        title = item.get("title") or item.get("name") or item.get("hubTatsNm") or ""
+        addr = item.get("addr1") or item.get("addr") or item.get("address") or ""
+        key = content_hash(f"{title}|{addr}" if title or addr else text)[:32]
+    return f"kto:{key}"
 
 
+def ingest_kto(
+    num_rows: int = 100,
+    harvester: Optional[KtoHarvester] = None,
+    job: Optional["IngestJob"] = None,
+) -> Dict[str, int]:
+    """두 KTO 목록 API의 전체 페이지를 수집해 증분 색인하고 {"indexed", "skipped", "deleted", "failed"} 반환
+
+    job이 주어지면 항목 단위로 진행률을 보고하고 취소 요청을 확인한다.
+    """
+    harvester = harvester or KtoHarvester()
+    writer_options: Dict[str, Any] = {}
+    if job is not None:
+        writer_options["on_progress"] = lambda st: job.report_rows(st["rows"])
+    indexer = IncrementalIndexer(IngestManifest("kto"), **writer_options)
+    seen = 0
+    # 같은 contentid가 두 목록 API에 모두 나올 수 있으므로 이번 실행에서 이미 처리한 source는 건너뜀
+    seen_sources: Set[str] = set()
+    try:
+        for url in (KTO_BASE_1, KTO_BASE_2):
+            for item in harvester.iter_items(url, num_rows=num_rows):
+                if job is not None:
+                    job.check_cancelled()
+                seen += 1
+                doc = _item_to_doc(item)
+                source = _item_source(item, doc["text"])
+                if source not in seen_sources:
+                    seen_sources.add(source)
+                    h = content_hash(doc["text"])
+                    if indexer.visit(source, h):
+                        indexer.add_source(source, h, [(doc["text"], doc["metadata"])])
+                if job is not None:
+                    job.report(seen, harvester.total_items)
+        # 모든 페이지를 받았을 때만, 이번 수집에 없는 항목을 원본에서 사라진 것으로 보고 삭제
+        if seen and harvester.complete:
+            indexer.remove_missing(prefix="kto:")
+    except BaseException:
+        indexer.abort()
+        raise
+    if job is not None and not harvester.complete:
+        job.add_error(f"{harvester.failed_pages} KTO pages failed; stale rows were not removed")
+    return indexer.finish()
@@ -0,0 +1,177 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+_MAX_WORKERS = int(os.getenv("INGEST_MAX_JOBS", "2"))
+_KEEP_FINISHED = 100  # 조회용으로 보관할 완료 작업 수
+_MAX_ERRORS = 20
+
+
+class JobCancelled(Exception):
+    """작업이 취소 요청을 받아 중단됨"""
+
+
+class JobConflictError(RuntimeError):
+    """같은 source의 작업이 이미 실행 중"""
+
+
+class IngestJob:
+    """백그라운드 수집 작업 상태 (진행률/처리량/ETA/오류)"""
+
+    def __init__(self, source: str, kind: str):
+        self.id = uuid.uuid4().hex
+        self.source = source
+        self.kind = kind
+        self.status = "queued"  # queued | running | succeeded | failed | cancelled
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.processed = 0
+        self.total: Optional[int] = None
+        self.rows_written = 0
+        self.errors: List[str] = []
+        self.result: Optional[Dict[str, Any]] = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    def report(self, processed: int, total: Optional[int] = None) -> None:
+        with self._lock:
+            self.processed = processed
+            if total is not None:
+                self.total = total
+
+    def report_rows(self, rows: int) -> None:
+        with self._lock:
+            self.rows_written = rows
+
+    def add_error(self, message: str) -> None:
+        with self._lock:
+            if len(self.errors) < _MAX_ERRORS:
+                self.errors.append(message)
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    def check_cancelled(self) -> None:
+        """취소가 요청됐으면 JobCancelled 발생 (작업 루프에서 주기적으로 호출)"""
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            end = self.finished_at or time.time()
+            elapsed = end - self.started_at if self.started_at else 0.0
+            rate = self.processed / elapsed if elapsed > 0 else 0.0
+            eta = None
+            if self.status == "running" and self.total and rate > 0:
+                eta = round(max(0, self.total - self.processed) / rate, 1)
+            return {
+                "job_id": self.id,
+                "source": self.source,
+                "kind": self.kind,
+                "status": self.status,
+                "processed": self.processed,
+                "total": self.total,
+                "rows_written": self.rows_written,
+                "elapsed_sec": round(elapsed, 3),
+                "docs_per_sec": round(rate, 2),
+                "eta_sec": eta,
+                "errors": list(self.errors),
+                "result": self.result,
+            }
+
+
+class IngestJobRunner:
+    """수집 작업을 제한된 워커 풀에서 실행 (source당 동시에 하나만)"""
+
+    def __init__(self, max_workers: int = _MAX_WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="ingest-job")
+        self._jobs: "OrderedDict[str, IngestJob]" = OrderedDict()
+        self._active: Dict[str, str] = {}  # source -> job id
+        self._lock = threading.Lock()
+
+    def submit(self, source: str, kind: str, fn: Callable[[IngestJob], Dict[str, Any]]) -> IngestJob:
+        with self._lock:
+            active_id = self._active.get(source)
+            if active_id is not None:
+                raise JobConflictError(f"job {active_id} is already running for {source}")
+            job = IngestJob(source, kind)
+            self._jobs[job.id] = job
+            self._active[source] = job.id
+            self._prune()
+        self._pool.submit(self._run, job, fn)
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[IngestJob]:
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def cancel(self, job_id: str) -> Optional[IngestJob]:
+        job = self.get(job_id)
+        if job is not None and job.status in ("queued", "running"):
+            job.cancel()
+        return job
+
+    def shutdown(self) -> None:
+        for job in self.list():
+            job.cancel()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job: IngestJob, fn: Callable[[IngestJob], Dict[str, Any]]) -> None:
+        job.started_at = time.time()
+        status = "failed"
+        try:
+            job.check_cancelled()
+            job.status = "running"
+            job.result = fn(job)
+            status = "succeeded"
+        except JobCancelled:
+            status = "cancelled"
+        except Exception as e:
+            job.add_error(str(e))
+        finally:
+            # 끝난 상태가 보이면 같은 source를 바로 다시 제출할 수 있도록 점유를 먼저 풂
+            with self._lock:
+                if self._active.get(job.source) == job.id:
+                    del self._active[job.source]
+                job.finished_at = time.time()
+                job.status = status
+
+    def _prune(self) -> None:
+        finished = [jid for jid, j in self._jobs.items() if j.finished_at is not None]
+        for jid in finished[: max(0, len(finished) - _KEEP_FINISHED)]:
+            del self._jobs[jid]
+
+
+_runner: Optional[IngestJobRunner] = None
+_runner_lock = threading.Lock()
+
+
+def get_job_runner() -> IngestJobRunner:
+    global _runner
+    if _runner is not None:
+        return _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = IngestJobRunner()
+    return _runner
+
+
+def shutdown_job_runner() -> None:
+    global _runner
+    with _runner_lock:
+        runner, _runner = _runner, None
+    if runner is not None:
+        runner.shutdown()
@@ -0,0 +1,147 @@
+import copy
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+
+import numpy as np
+
+_CAPACITY = int(os.getenv("ANSWER_CACHE_SIZE", "1024"))
+_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92"))  # 코사인 유사도
+_TTL_SEC = float(os.getenv("ANSWER_CACHE_TTL_SEC", "3600"))  # 0이면 만료 없음
+
+
+class SemanticAnswerCache:
+    """쿼리 임베딩 기준 시맨틱 답변 캐시
+
+    새 쿼리가 캐시된 쿼리와 코사인 유사도 threshold 이상이면 저장된 답변/컨텍스트를 그대로 반환.
+    벡터는 정규화되어 있다고 가정하므로 내적 = 코사인 유사도.
+    """
+
+    def __init__(self, capacity: int = _CAPACITY, threshold: float = _THRESHOLD, ttl_sec: float = _TTL_SEC):
+        self.capacity = max(1, capacity)
+        self.threshold = threshold
+        self.ttl_sec = ttl_sec
+        self._vectors: Optional[np.ndarray] = None  # (capacity, dim) float32, 첫 저장 시 할당
+        self._valid = np.zeros(self.capacity, dtype=bool)
+        self._last_used = np.zeros(self.capacity, dtype=np.float64)
+        self._entries: List[Optional[Dict[str, Any]]] = [None] * self.capacity
+        self._doc_slots: Dict[str, Set[int]] = {}  # 문서 id -> 해당 문서를 참조하는 슬롯
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def lookup(self, vector: Sequence[float]) -> Optional[Dict[str, Any]]:
+        """유사한 쿼리의 캐시된 결과 반환 (없으면 None)"""
+        q = np.asarray(vector, dtype=np.float32)
+        now = time.monotonic()
+        with self._lock:
+            if self._vectors is None or not self._valid.any() or q.shape[0] != self._vectors.shape[1]:
+                self.misses += 1
+                return None
+            sims = self._vectors @ q
+            sims[~self._valid] = -np.inf
+            slot = int(np.argmax(sims))
+            entry = self._entries[slot]
+            if sims[slot] < self.threshold or entry is None:
+                self.misses += 1
+                return None
+            if entry["expires_at"] and entry["expires_at"] < now:
+                self._drop(slot)
+                self.misses += 1
+                return None
+            self._last_used[slot] = now
+            self.hits += 1
+            return copy.deepcopy(entry["result"])
+
+    def store(self, vector: Sequence[float], result: Dict[str, Any]) -> None:
+        q = np.asarray(vector, dtype=np.float32)
+        doc_ids = [str(c["id"]) for c in result.get("contexts", []) if c.get("id") is not None]
+        now = time.monotonic()
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != q.shape[0]:
+                self._vectors = np.zeros((self.capacity, q.shape[0]), dtype=np.float32)
+                self._valid[:] = False
+                self._entries = [None] * self.capacity
+                self._doc_slots.clear()
+            free = np.flatnonzero(~self._valid)
+            if free.size:
+                slot = int(free[0])
+            else:
+                # 가장 오래 사용되지 않은 항목 교체
+                slot = int(np.argmin(self._last_used))
+                self._drop(slot)
+                self.evictions += 1
+            self._vectors[slot] = q
+            self._valid[slot] = True
+            self._last_used[slot] = now
+            self._entries[slot] = {
+                "result": copy.deepcopy(result),
+                "doc_ids": doc_ids,
+                "expires_at": now + self.ttl_sec if self.ttl_sec > 0 else 0.0,
+            }
+            for doc_id in doc_ids:
+                self._doc_slots.setdefault(doc_id, set()).add(slot)
+
+    def invalidate_documents(self, ids: Iterable[Any]) -> int:
+        """해당 문서를 컨텍스트로 사용한 캐시 항목 제거 (문서가 갱신/삭제된 경우)"""
+        removed = 0
+        with self._lock:
+            for doc_id in ids:
+                for slot in list(self._doc_slots.get(str(doc_id), ())):
+                    if self._valid[slot]:
+                        self._drop(slot)
+                        removed += 1
+            self.invalidations += removed
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self.invalidations += int(self._valid.sum())
+            self._valid[:] = False
+            self._entries = [None] * self.capacity
+            self._doc_slots.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": int(self._valid.sum()),
+                "capacity": self.capacity,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+    def _drop(self, slot: int) -> None:
+        entry = self._entries[slot]
+        if entry is not None:
+            for doc_id in entry["doc_ids"]:
+                slots = self._doc_slots.get(doc_id)
+                if slots is not None:
+                    slots.discard(slot)
+                    if not slots:
+                        del self._doc_slots[doc_id]
+        self._entries[slot] = None
+        self._valid[slot] = False
+        self._last_used[slot] = 0.0
+
+
+_cache: Optional[SemanticAnswerCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> SemanticAnswerCache:
+    """공유 시맨틱 답변 캐시 반환"""
+    global _cache
+    if _cache is not None:
+        return _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SemanticAnswerCache()
+    return _cache
@@ -0,0 +1,12 @@
+from .base import DocumentRow, MetadataRow, SearchResult, StoredDocument, VectorBackend
+
+
+def create_backend(name: str, dim: int) -> VectorBackend:
+    """VECTOR_BACKEND 값으로 벡터 저장소 백엔드 생성 (supabase | local)"""
+    if name == "local":
+        from .local import LocalVectorBackend
+        return LocalVectorBackend(dim=dim)
+    if name == "supabase":
+        from .supabase import SupabaseVectorBackend
+        return SupabaseVectorBackend()
+    raise ValueError(f"Unknown VECTOR_BACKEND: {name}")
@@ -0,0 +1,73 @@
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, TypedDict
+
+from app.core.executors import run_blocking
+
+
+class DocumentRow(TypedDict):
+    """저장할 행"""
+
+    id: str
+    content: str
+    metadata: Dict[str, Any]
+    embedding: Sequence[float]
+
+
+class MetadataRow(TypedDict):
+    """메타데이터만 바꿀 행"""
+
+    id: str
+    metadata: Dict[str, Any]
+
+
+class StoredDocument(TypedDict):
+    """저장된 문서 (임베딩 제외)"""
+
+    id: str
+    content: str
+    metadata: Optional[Dict[str, Any]]
+
+
+class SearchResult(StoredDocument):
+    """검색 결과 (distance = 1 - 코사인 유사도)"""
+
+    distance: float
+
+
+class VectorBackend:
+    """벡터 저장소 백엔드 인터페이스
+
+    쓰기는 DocumentRow/MetadataRow, 검색은 SearchResult, 전체 순회는 StoredDocument 형식을 쓴다.
+    """
+
+    name = "base"
+
+    def match(self, vector: Sequence[float], top_k: int) -> List[SearchResult]:
+        """쿼리 벡터와 가장 가까운 문서 top_k개"""
+        raise NotImplementedError
+
+    def sample(self, top_k: int) -> List[SearchResult]:
+        """임의 문서 top_k개 (벡터 검색이 실패했을 때의 대체용)"""
+        raise NotImplementedError
+
+    def upsert(self, rows: List[DocumentRow]) -> None:
+        raise NotImplementedError
+
+    def delete(self, ids: Iterable[str]) -> None:
+        raise NotImplementedError
+
+    def update_metadata(self, rows: List[MetadataRow]) -> None:
+        """{"id", "metadata"} 행의 메타데이터만 교체 (내용/임베딩은 그대로, 없는 id는 무시)"""
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        """쓰기 후 지연된 영속화 작업이 있으면 마무리"""
+
+    def iter_documents(self, page_size: int = 500) -> Iterator[List[StoredDocument]]:
+        """저장된 모든 문서를 페이지 단위로 (어휘 색인 재구성용)"""
+        raise NotImplementedError
+
+    async def match_async(self, vector: Sequence[float], top_k: int) -> List[SearchResult]:
+        return await run_blocking(self.match, vector, top_k)
+
+    async def sample_async(self, top_k: int) -> List[SearchResult]:
+        return await run_blocking(self.sample, top_k)
@@ -0,0 +1,386 @@
+import argparse
+import itertools
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from .base import DocumentRow, MetadataRow, SearchResult, StoredDocument, VectorBackend
+
+_INDEX_DIR = os.getenv("LOCAL_INDEX_DIR", ".vector_index")
+_NPROBE = int(os.getenv("LOCAL_INDEX_NPROBE", "8"))
+# 이 행 수 이상일 때만 IVF 사용 (그보다 작으면 전수 내적이 더 빠름)
+_IVF_MIN_ROWS = int(os.getenv("LOCAL_INDEX_IVF_MIN_ROWS", "4096"))
+_KMEANS_ITERS = 10
+_KMEANS_SAMPLE = 20000
+_MIN_CAPACITY = 1024
+
+_VECTORS_FILE = "vectors.npy"
+_DOCS_FILE = "docs.jsonl"
+_IVF_FILE = "ivf.npz"
+
+
+def _normalize(m: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(m, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return m / norms
+
+
+def _train_centroids(vectors: np.ndarray, nlist: int, seed: int = 0) -> np.ndarray:
+    """구면(spherical) k-means로 IVF 코어스 센트로이드 학습"""
+    rng = np.random.default_rng(seed)
+    sample = vectors
+    if len(vectors) > _KMEANS_SAMPLE:
+        sample = vectors[rng.choice(len(vectors), _KMEANS_SAMPLE, replace=False)]
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+    for _ in range(_KMEANS_ITERS):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, sample)
+        empty = np.bincount(assign, minlength=nlist) == 0
+        sums[empty] = centroids[empty]  # 비어 있는 클러스터는 이전 센트로이드 유지
+        centroids = _normalize(sums).astype(np.float32)
+    return centroids
+
+
+class LocalVectorBackend(VectorBackend):
+    """프로세스 내 벡터 인덱스: float32 임베딩 행렬 + IVF 근사 최근접 이웃
+
+    행렬은 가득 차면 용량을 두 배로 늘리는 버퍼에 두므로 배치 추가 비용이 전체 행 수와 무관하다.
+    디스크 저장(.npy/.jsonl/.npz)은 flush 때만 하고, 시작 시 임베딩 행렬은 memory-map으로 연다.
+    """
+
+    name = "local"
+
+    def __init__(self, index_dir: str = _INDEX_DIR, dim: int = 384, nprobe: int = _NPROBE):
+        self.index_dir = index_dir
+        self.dim = dim
+        self.nprobe = max(1, nprobe)
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()  # 저장 순서 보장 (파일 쓰기 중에는 _lock을 잡지 않음)
+        # 행 단위 버퍼 (앞쪽 len(self._ids)행만 사용, 나머지는 여유 용량)
+        self._vec_buf = np.zeros((0, dim), dtype=np.float32)
+        self._alive_buf = np.zeros(0, dtype=bool)
+        self._assign_buf = np.zeros(0, dtype=np.int32)
+        self._ids: List[str] = []
+        self._docs: List[Optional[Dict[str, Any]]] = []  # 삭제된 행은 None
+        self._pos: Dict[str, int] = {}
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[np.ndarray] = []
+        self._trained_rows = 0
+        self._dirty = False
+        self._load()
+
+    @property
+    def _vectors(self) -> np.ndarray:
+        return self._vec_buf[: len(self._ids)]
+
+    @property
+    def _alive(self) -> np.ndarray:
+        return self._alive_buf[: len(self._ids)]
+
+    @property
+    def _assign(self) -> np.ndarray:
+        return self._assign_buf[: len(self._ids)]
+
+    # 검색
+
+    def match(self, vector: Sequence[float], top_k: int) -> List[SearchResult]:
+        q = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            if not self._pos:
+                return []
+            if self._centroids is None:
+                cand = None
+                sims = self._vectors @ q
+            else:
+                probe = np.argsort(-(self._centroids @ q))[: self.nprobe]
+                cand = np.concatenate([self._lists[c] for c in probe])
+                sims = self._vectors[cand] @ q if cand.size else np.zeros(0, dtype=np.float32)
+            rows = cand if cand is not None else np.arange(len(sims))
+            alive = self._alive[rows]
+            rows, sims = rows[alive], sims[alive]
+            if not rows.size:
+                return []
+            k = min(top_k, rows.size)
+            top = np.argpartition(-sims, k - 1)[:k]
+            top = top[np.argsort(-sims[top])]
+            return [self._result(int(rows[i]), float(sims[i])) for i in top]
+
+    def sample(self, top_k: int) -> List[SearchResult]:
+        with self._lock:
+            return [self._result(pos, None) for pos in itertools.islice(self._pos.values(), top_k)]
+
+    def iter_documents(self, page_size: int = 500) -> Iterator[List[StoredDocument]]:
+        with self._lock:
+            positions = list(self._pos.values())
+        for i in range(0, len(positions), page_size):
+            yield [self._result(pos, None) for pos in positions[i:i + page_size]]
+
+    # 쓰기
+
+    def upsert(self, rows: List[DocumentRow]) -> None:
+        if not rows:
+            return
+        new_vecs = _normalize(np.asarray([r["embedding"] for r in rows], dtype=np.float32))
+        if new_vecs.shape[1] != self.dim:
+            raise ValueError(f"embedding dim {new_vecs.shape[1]} != index dim {self.dim}")
+        with self._lock:
+            self._reserve(len(self._ids))  # mmap(읽기 전용)으로 열린 행렬이면 메모리로 복사
+            appended = []
+            updated: List[int] = []
+            for row, vec in zip(rows, new_vecs):
+                doc_id = str(row.get("id") or os.urandom(16).hex())
+                doc = {"content": row.get("content", ""), "metadata": row.get("metadata") or {}}
+                pos = self._pos.get(doc_id)
+                if pos is not None and pos >= len(self._ids):
+                    appended[pos - len(self._ids)] = (doc_id, doc, vec)  # 같은 배치 안의 중복 id
+                elif pos is not None:
+                    self._vectors[pos] = vec
+                    self._docs[pos] = doc
+                    updated.append(pos)
+                else:
+                    self._pos[doc_id] = len(self._ids) + len(appended)
+                    appended.append((doc_id, doc, vec))
+            if updated:
+                self._reassign(np.array(updated, dtype=np.int64))
+            if appended:
+                start, end = len(self._ids), len(self._ids) + len(appended)
+                self._reserve(end)
+                self._vec_buf[start:end] = np.stack([v for _, _, v in appended])
+                self._alive_buf[start:end] = True
+                self._assign_buf[start:end] = -1
+                self._ids.extend(doc_id for doc_id, _, _ in appended)
+                self._docs.extend(doc for _, doc, _ in appended)
+                self._reassign(np.arange(start, end))
+            self._maybe_train()
+            self._dirty = True
+
+    def delete(self, ids: Iterable[str]) -> None:
+        with self._lock:
+            removed = False
+            for doc_id in ids:
+                pos = self._pos.pop(str(doc_id), None)
+                if pos is not None:
+                    self._docs[pos] = None
+                    self._alive[pos] = False
+                    removed = True
+            if removed:
+                if len(self._pos) < 0.8 * len(self._ids):
+                    self._compact()
+                self._dirty = True
+
+    def update_metadata(self, rows: List[MetadataRow]) -> None:
+        with self._lock:
+            for row in rows:
+                pos = self._pos.get(str(row["id"]))
+                if pos is not None:
+                    self._docs[pos] = {**self._docs[pos], "metadata": row.get("metadata") or {}}
+                    self._dirty = True
+
+    def flush(self) -> None:
+        """변경 사항을 디스크에 저장 (스냅샷만 잠금 안에서 뜨고 파일 쓰기 중에도 검색/쓰기는 계속됨)"""
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                snapshot = self._snapshot()
+                self._dirty = False
+            try:
+                self._save(**snapshot)
+            except BaseException:
+                self._dirty = True
+                raise
+
+    # 내부
+
+    def _result(self, pos: int, sim: Optional[float]) -> SearchResult:
+        doc = self._docs[pos] or {}
+        return {
+            "id": self._ids[pos],
+            "content": doc.get("content", ""),
+            "metadata": doc.get("metadata"),
+            "distance": round(1.0 - sim, 6) if sim is not None else 0.0,
+        }
+
+    def _reassign(self, positions: np.ndarray) -> None:
+        """행들을 가장 가까운 IVF 리스트에 배정 (인덱스가 학습된 경우)
+
+        리스트가 바뀐 행만 이전/새 리스트에서 빼고 넣으므로 비용은 전체 행 수가 아니라 건드린 리스트 크기에 비례한다.
+        """
+        if self._centroids is None or not positions.size:
+            return
+        positions = np.unique(positions)
+        new = np.argmax(self._vectors[positions] @ self._centroids.T, axis=1).astype(np.int32)
+        old = self._assign[positions]
+        self._assign[positions] = new
+        moved = old != new
+        if not moved.any():
+            return
+        positions, old, new = positions[moved].astype(np.int32), old[moved], new[moved]
+        # 리스트는 행 번호 오름차순을 유지 (검색 시 후보 행렬을 순서대로 읽도록)
+        for c in np.unique(old[old >= 0]):
+            lst = self._lists[c]
+            self._lists[c] = lst[~np.isin(lst, positions[old == c], assume_unique=True)]
+        for c in np.unique(new):
+            self._lists[c] = np.union1d(self._lists[c], positions[new == c]).astype(np.int32)
+
+    def _reserve(self, rows: int) -> None:
+        """버퍼에 rows행이 들어갈 자리를 확보 (부족하면 두 배로 늘려 복사하므로 추가 비용은 분할 상환 O(1))"""
+        capacity = len(self._vec_buf)
+        if rows <= capacity and self._vec_buf.flags.writeable:
+            return
+        if rows > capacity:
+            capacity = max(rows, 2 * capacity, _MIN_CAPACITY)
+        n = len(self._ids)
+        vectors = np.empty((capacity, self.dim), dtype=np.float32)
+        vectors[:n] = self._vec_buf[:n]
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:n] = self._alive_buf[:n]
+        assign = np.full(capacity, -1, dtype=np.int32)
+        assign[:n] = self._assign_buf[:n]
+        self._vec_buf, self._alive_buf, self._assign_buf = vectors, alive, assign
+
+    def _rebuild_lists(self) -> None:
+        """_assign 전체로 IVF 리스트를 다시 만듦 (학습/압축/로드 시 한 번, 정렬 한 번으로 O(N log N))"""
+        nlist = len(self._centroids)
+        order = np.argsort(self._assign, kind="stable")
+        bounds = np.searchsorted(self._assign[order], np.arange(nlist + 1))
+        self._lists = [order[bounds[c]:bounds[c + 1]].astype(np.int32) for c in range(nlist)]
+
+    def _maybe_train(self) -> None:
+        n = len(self._pos)
+        if n < _IVF_MIN_ROWS:
+            self._centroids = None
+            return
+        # 학습 이후 데이터가 2배로 늘었으면 재학습
+        if self._centroids is not None and n < 2 * self._trained_rows:
+            return
+        alive = np.fromiter(self._pos.values(), dtype=np.int64)
+        nlist = int(min(4096, max(16, np.sqrt(n))))
+        self._centroids = _train_centroids(self._vectors[alive], nlist)
+        self._trained_rows = n
+        self._assign_buf[: len(self._ids)] = np.argmax(self._vectors @ self._centroids.T, axis=1)
+        self._rebuild_lists()
+
+    def _compact(self) -> None:
+        keep = np.array(sorted(self._pos.values()), dtype=np.int64)
+        self._vec_buf = np.ascontiguousarray(self._vectors[keep])
+        self._assign_buf = self._assign[keep]
+        self._alive_buf = np.ones(len(keep), dtype=bool)
+        self._ids = [self._ids[p] for p in keep]
+        self._docs = [self._docs[p] for p in keep]
+        self._pos = {doc_id: i for i, doc_id in enumerate(self._ids)}
+        if self._centroids is not None:
+            self._rebuild_lists()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.index_dir, name)
+
+    def _snapshot(self) -> Dict[str, Any]:
+        # 행 벡터는 갱신 시 제자리에서 바뀌므로 복사, 문서 dict/센트로이드는 교체만 되므로 참조로 충분
+        return {
+            "vectors": np.array(self._vectors),
+            "ids": list(self._ids),
+            "docs": list(self._docs),
+            "centroids": self._centroids,
+            "assign": np.array(self._assign),
+            "trained_rows": self._trained_rows,
+        }
+
+    def _save(
+        self,
+        vectors: np.ndarray,
+        ids: List[str],
+        docs: List[Optional[Dict[str, Any]]],
+        centroids: Optional[np.ndarray],
+        assign: np.ndarray,
+        trained_rows: int,
+    ) -> None:
+        os.makedirs(self.index_dir, exist_ok=True)
+        # 임시 파일에 쓰고 교체해서 중간에 죽어도 이전 인덱스가 깨지지 않게 함
+        tmp = self._path(_VECTORS_FILE + ".tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, vectors)
+        os.replace(tmp, self._path(_VECTORS_FILE))
+        tmp = self._path(_DOCS_FILE + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for doc_id, doc in zip(ids, docs):
+                f.write(json.dumps({"id": doc_id, "doc": doc}, ensure_ascii=False) + "\n")
+        os.replace(tmp, self._path(_DOCS_FILE))
+        if centroids is not None:
+            tmp = self._path(_IVF_FILE + ".tmp.npz")
+            np.savez(tmp, centroids=centroids, assign=assign, trained_rows=trained_rows)
+            os.replace(tmp, self._path(_IVF_FILE))
+        elif os.path.exists(self._path(_IVF_FILE)):
+            os.remove(self._path(_IVF_FILE))
+
+    def _load(self) -> None:
+        if not os.path.exists(self._path(_VECTORS_FILE)):
+            return
+        vectors = np.load(self._path(_VECTORS_FILE), mmap_mode="r")
+        ids, docs = [], []
+        with open(self._path(_DOCS_FILE), "r", encoding="utf-8") as f:
+            for line in f:
+                rec = json.loads(line)
+                ids.append(rec["id"])
+                docs.append(rec["doc"])
+        if vectors.shape[0] != len(ids):
+            raise RuntimeError(f"local index is inconsistent: {vectors.shape[0]} vectors, {len(ids)} docs")
+        if vectors.shape[1] != self.dim:
+            # 다른 임베딩 모델로 만든 인덱스는 검색 결과가 무의미하므로 조용히 쓰지 않음
+            raise RuntimeError(
+                f"local index dim {vectors.shape[1]} != embedding dim {self.dim}: "
+                f"rebuild {self.index_dir} with the current embedding model"
+            )
+        self._vec_buf, self._ids, self._docs = vectors, ids, docs
+        self._pos = {doc_id: i for i, (doc_id, doc) in enumerate(zip(ids, docs)) if doc is not None}
+        self._alive_buf = np.array([doc is not None for doc in docs], dtype=bool)
+        self._assign_buf = np.full(len(ids), -1, dtype=np.int32)
+        if os.path.exists(self._path(_IVF_FILE)):
+            ivf = np.load(self._path(_IVF_FILE))
+            self._centroids = ivf["centroids"]
+            self._assign_buf = ivf["assign"].astype(np.int32)
+            self._trained_rows = int(ivf["trained_rows"])
+            self._rebuild_lists()
+        print(f"Local vector index loaded: {len(self._pos)} docs from {self.index_dir}")
+
+
+def _export_from_supabase(backend: LocalVectorBackend, page_size: int = 500) -> int:
+    """Supabase documents 테이블을 로컬 인덱스로 복사"""
+    from app.core.supabase_client import get_supabase_client
+
+    sb = get_supabase_client()
+    total, start = 0, 0
+    while True:
+        res = sb.table("documents").select("id,content,metadata,embedding").range(start, start + page_size - 1).execute()
+        data = res.data or []
+        if not data:
+            break
+        rows = []
+        for d in data:
+            emb = d.get("embedding")
+            if isinstance(emb, str):  # pgvector는 "[0.1,...]" 문자열로 반환
+                emb = json.loads(emb)
+            rows.append({"id": d["id"], "content": d.get("content", ""), "metadata": d.get("metadata"), "embedding": emb})
+        backend.upsert(rows)
+        total += len(rows)
+        start += page_size
+    backend.flush()
+    return total
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--export-from-supabase", action="store_true", help="Supabase documents 테이블을 로컬 인덱스로 복사")
+    ap.add_argument("--dir", default=_INDEX_DIR, help="로컬 인덱스 디렉토리")
+    args = ap.parse_args()
+    backend = LocalVectorBackend(index_dir=args.dir)
+    if args.export_from_supabase:
+        print(f"Exported {_export_from_supabase(backend)} docs.")
+
+
+if __name__ == "__main__":
+    main()
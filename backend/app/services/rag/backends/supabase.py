@@ -0,0 +1,90 @@
+import asyncio
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, TypedDict, cast
+
+from app.core.supabase_dal import get_supabase_dal, run_supabase_dal
+from .base import DocumentRow, MetadataRow, SearchResult, StoredDocument, VectorBackend
+
+_TABLE = "documents"
+_RPC_MATCH = "match_documents"
+
+
+class _DocumentRecord(TypedDict, total=False):
+    """documents 테이블 / match_documents RPC가 돌려주는 행"""
+
+    id: str
+    content: str
+    text: str
+    metadata: Optional[Dict[str, Any]]
+    distance: float
+
+
+def _to_context(d: _DocumentRecord) -> SearchResult:
+    return {
+        "id": d.get("id", ""),
+        "content": d.get("content", d.get("text", "")),  # RPC는 text, 테이블은 content 컬럼
+        "metadata": d.get("metadata"),
+        "distance": d.get("distance", 0.0),
+    }
+
+
+def _vector_literal(vector: Sequence[float]) -> str:
+    """pgvector 텍스트 표현 "[0.0123,...]" (유효숫자 6자리로 JSON 페이로드를 작게 유지)"""
+    return "[" + ",".join("%.6g" % x for x in vector) + "]"
+
+
+def _match_params(vector: Sequence[float], top_k: int) -> Dict[str, Any]:
+    return {"query_embedding": _vector_literal(vector), "match_count": top_k}
+
+
+class SupabaseVectorBackend(VectorBackend):
+    """Supabase(pgvector) documents 테이블 + match_documents RPC
+
+    모든 요청은 supabase_dal을 거친다. 비동기 경로는 요청 루프의 DAL을 바로 await 하고,
+    동기 메서드(배치 쓰기 스레드, CLI)는 run_supabase_dal로 전용 루프의 DAL에 넘긴다.
+    """
+
+    name = "supabase"
+
+    def match(self, vector: Sequence[float], top_k: int) -> List[SearchResult]:
+        data = run_supabase_dal(lambda dal: dal.match(_RPC_MATCH, _match_params(vector, top_k)))
+        return [_to_context(d) for d in cast(List[_DocumentRecord], data)]
+
+    async def match_async(self, vector: Sequence[float], top_k: int) -> List[SearchResult]:
+        # 비동기 경로는 스레드 풀 대신 풀링된 httpx 연결로 바로 호출
+        data = await get_supabase_dal().match(_RPC_MATCH, _match_params(vector, top_k))
+        return [_to_context(d) for d in cast(List[_DocumentRecord], data)]
+
+    async def sample_async(self, top_k: int) -> List[SearchResult]:
+        data = await get_supabase_dal().select(_TABLE, limit=top_k)
+        return [_to_context(d) for d in cast(List[_DocumentRecord], data)]
+
+    def sample(self, top_k: int) -> List[SearchResult]:
+        data = run_supabase_dal(lambda dal: dal.select(_TABLE, limit=top_k))
+        return [_to_context(d) for d in cast(List[_DocumentRecord], data)]
+
+    def upsert(self, rows: List[DocumentRow]) -> None:
+        # float32 리스트 대신 문자열로 보내서 JSON 직렬화 문제와 페이로드 크기를 함께 해결
+        payload = [{**row, "embedding": _vector_literal(row["embedding"])} for row in rows]
+        run_supabase_dal(lambda dal: dal.upsert(_TABLE, payload))
+
+    def delete(self, ids: Iterable[str]) -> None:
+        ids = list(ids)
+        run_supabase_dal(lambda dal: dal.delete(_TABLE, ids))
+
+    def update_metadata(self, rows: List[MetadataRow]) -> None:
+        # 행마다 값이 달라서 id 하나씩 PATCH (내용이 바뀐 source의 유지된 청크에만 쓰임, 동시 요청 수는 DAL이 제한)
+        async def update(dal):
+            await asyncio.gather(*(dal.update(_TABLE, {"metadata": row.get("metadata") or {}}, row["id"]) for row in rows))
+
+        run_supabase_dal(update)
+
+    def iter_documents(self, page_size: int = 500) -> Iterator[List[StoredDocument]]:
+        offset = 0
+        while True:
+            data = run_supabase_dal(
+                lambda dal: dal.select(_TABLE, "id,content,metadata", limit=page_size, offset=offset)
+            )
+            if not data:
+                return
+            yield [_to_context(d) for d in cast(List[_DocumentRecord], data)]
+            offset += page_size
@@ -0,0 +1,146 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+from .embeddings import LocalEmbeddings, get_default_embedder
+
+_MAX_BATCH_SIZE = int(os.getenv("EMBED_BATCH_MAX_SIZE", "32"))
+_MAX_WAIT_MS = float(os.getenv("EMBED_BATCH_MAX_WAIT_MS", "5"))
+
+_Item = Tuple[str, Future, float]
+
+
+class EmbeddingBatcher:
+    """동시에 들어온 단건 쿼리 임베딩 요청을 짧게 모아 한 번에 encode하는 마이크로 배처"""
+
+    def __init__(
+        self,
+        embedder: Optional[LocalEmbeddings] = None,
+        max_batch_size: int = _MAX_BATCH_SIZE,
+        max_wait_ms: float = _MAX_WAIT_MS,
+    ):
+        self._embedder = embedder
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: "queue.Queue[Optional[_Item]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        # 튜닝용 지표
+        self._batches = 0
+        self._items = 0
+        self._batch_size_buckets: Dict[int, int] = {}
+        self._queue_delay_total = 0.0
+        self._queue_delay_max = 0.0
+
+    def submit(self, text: str) -> Future:
+        """쿼리 하나를 큐에 넣고 결과 벡터를 담을 Future 반환"""
+        fut: Future = Future()
+        self._ensure_started()
+        self._queue.put((text, fut, time.perf_counter()))
+        return fut
+
+    def embed(self, text: str) -> List[float]:
+        return self.submit(text).result()
+
+    def stop(self) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout=5)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "batches": self._batches,
+                "items": self._items,
+                "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+                "batch_size_buckets": dict(sorted(self._batch_size_buckets.items())),
+                "avg_queue_delay_ms": round(self._queue_delay_total / self._items * 1000, 3) if self._items else 0.0,
+                "max_queue_delay_ms": round(self._queue_delay_max * 1000, 3),
+                "pending": self._queue.qsize(),
+            }
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch = [first]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._process(batch)
+
+    def _process(self, batch: List[_Item]) -> None:
+        started = time.perf_counter()
+        # 이미 취소된 요청은 인코딩하지 않음
+        live = [it for it in batch if it[1].set_running_or_notify_cancel()]
+        if not live:
+            return
+        try:
+            embedder = self._embedder or get_default_embedder()
+            vectors = embedder.embed([text for text, _, _ in live])
+        except Exception as e:
+            for _, fut, _ in live:
+                fut.set_exception(e)
+        else:
+            for (_, fut, _), vec in zip(live, vectors):
+                fut.set_result(vec)
+        self._record(live, started)
+
+    def _record(self, batch: List[_Item], started: float) -> None:
+        delays = [started - enqueued for _, _, enqueued in batch]
+        bucket = 1
+        while bucket < len(batch):
+            bucket *= 2
+        with self._lock:
+            self._batches += 1
+            self._items += len(batch)
+            self._batch_size_buckets[bucket] = self._batch_size_buckets.get(bucket, 0) + 1
+            self._queue_delay_total += sum(delays)
+            self._queue_delay_max = max(self._queue_delay_max, max(delays))
+
+
+_batcher: Optional[EmbeddingBatcher] = None
+_batcher_lock = threading.Lock()
+
+
+def get_query_batcher() -> EmbeddingBatcher:
+    """공유 쿼리 임베딩 배처 반환"""
+    global _batcher
+    if _batcher is not None:
+        return _batcher
+    with _batcher_lock:
+        if _batcher is None:
+            _batcher = EmbeddingBatcher()
+    return _batcher
+
+
+def shutdown_query_batcher() -> None:
+    global _batcher
+    with _batcher_lock:
+        batcher, _batcher = _batcher, None
+    if batcher is not None:
+        batcher.stop()
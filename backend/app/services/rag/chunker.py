@@ -0,0 +1,95 @@
+import os
+import re
+from typing import IO, Iterable, Iterator, List, NamedTuple, Tuple
+
+# all-MiniLM-L6-v2는 256 토큰까지만 보므로 한국어 기준 수백 자 단위로 자름
+_CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "400"))  # 문자 수
+_CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "80"))  # 문자 수
+_READ_BLOCK = 64 * 1024
+
+# 문장 경계: 종결 부호(. ! ? 。 … 등) + 닫는 따옴표/괄호 + 공백, 또는 줄바꿈
+_BOUNDARY = re.compile(r"[.!?。！？…]+[\"'”’)\]]*\s+|\n+")
+
+
+class Chunk(NamedTuple):
+    text: str
+    index: int
+    start: int  # 파일 내 시작 문자 오프셋
+    end: int  # 파일 내 끝 문자 오프셋 (exclusive)
+
+
+def iter_sentences(f: IO[str], max_len: int = _CHUNK_SIZE) -> Iterator[Tuple[str, int]]:
+    """파일을 블록 단위로 읽으며 (문장, 시작 오프셋)을 yield
+
+    경계가 없는 아주 긴 줄도 max_len 단위로 잘라 내보내므로 메모리 사용량이 파일 크기와 무관하다.
+    """
+    buf, buf_start = "", 0
+    while True:
+        block = f.read(_READ_BLOCK)
+        if not block:
+            break
+        buf += block
+        last = 0
+        for m in _BOUNDARY.finditer(buf):
+            if m.end() == len(buf):
+                break  # 블록 끝에 걸친 경계는 다음 블록을 보고 판단
+            yield buf[last:m.end()], buf_start + last
+            last = m.end()
+        while len(buf) - last > max(max_len, _READ_BLOCK):
+            yield buf[last:last + max_len], buf_start + last
+            last += max_len
+        buf, buf_start = buf[last:], buf_start + last
+    if buf:
+        yield buf, buf_start
+
+
+def iter_chunks(
+    sentences: Iterable[Tuple[str, int]],
+    chunk_size: int = _CHUNK_SIZE,
+    overlap: int = _CHUNK_OVERLAP,
+) -> Iterator[Chunk]:
+    """문장들을 chunk_size 이하로 묶고, 앞 청크의 마지막 문장들을 overlap만큼 이어 붙임"""
+    parts: List[Tuple[str, int]] = []
+    length = 0
+    fresh = False  # 마지막 청크 이후 새 문장이 들어왔는지
+    index = 0
+
+    def emit() -> Chunk:
+        # parts는 파일에서 연속된 구간이므로 앞쪽 공백을 잘라낸 만큼 시작 오프셋을 옮기면 text와 정확히 대응함
+        raw = "".join(p for p, _ in parts)
+        text = raw.strip()
+        start = parts[0][1] + len(raw) - len(raw.lstrip())
+        return Chunk(text, index, start, start + len(text))
+
+    for sent, start in sentences:
+        # 청크보다 긴 문장은 강제로 자름
+        pieces = [(sent[i:i + chunk_size], start + i) for i in range(0, len(sent), chunk_size)] or [(sent, start)]
+        for piece, piece_start in pieces:
+            if parts and fresh and length + len(piece) > chunk_size:
+                chunk = emit()
+                if chunk.text:
+                    yield chunk
+                    index += 1
+                # 겹침 꼬리 + 이번 조각이 chunk_size를 넘지 않도록 꼬리 길이를 제한
+                budget = min(overlap, chunk_size - len(piece))
+                keep: List[Tuple[str, int]] = []
+                kept = 0
+                for p in reversed(parts):
+                    if kept + len(p[0]) > budget:
+                        break
+                    keep.insert(0, p)
+                    kept += len(p[0])
+                parts, length, fresh = keep, kept, False
+            parts.append((piece, piece_start))
+            length += len(piece)
+            fresh = fresh or bool(piece.strip())
+    if parts and fresh:
+        chunk = emit()
+        if chunk.text:
+            yield chunk
+
+
+def iter_file_chunks(path: str, chunk_size: int = _CHUNK_SIZE, overlap: int = _CHUNK_OVERLAP) -> Iterator[Chunk]:
+    """텍스트 파일을 스트리밍으로 읽어 청크 단위로 yield"""
+    with open(path, "r", encoding="utf-8") as f:
+        yield from iter_chunks(iter_sentences(f, max_len=chunk_size), chunk_size, overlap)
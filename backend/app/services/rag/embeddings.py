@@ -1,28 +1,63 @@
 import os
-from typing import List
+import threading
+from typing import List, Optional
 from dotenv import load_dotenv
 
 load_dotenv()
 
-try:
-    from sentence_transformers import SentenceTransformer
-except Exception:
-    SentenceTransformer = None  # type: ignore
-
 _MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+_WARMUP_TEXT = "대전 관광지 추천해줘"
+
+# 프로세스 전역 임베딩 모델 (한 번만 로드해서 검색/챗/수집 경로가 공유)
+_embedder: Optional["LocalEmbeddings"] = None
+_embedder_lock = threading.Lock()
+_ready = False
 
 
 class LocalEmbeddings:
-    def __init__(self):
-        if SentenceTransformer is None:
-            raise RuntimeError("sentence-transformers 설치 필요")
-        self.model = SentenceTransformer(_MODEL)
+    def __init__(self, model_name: str = _MODEL):
+        # torch까지 함께 올라오는 무거운 import라 모델을 실제로 만들 때만 불러옴
+        try:
+            from sentence_transformers import SentenceTransformer
+        except Exception as e:
+            raise RuntimeError("sentence-transformers 설치 필요") from e
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name)
 
     def embed(self, texts: List[str]) -> List[List[float]]:
         return [list(v) for v in self.model.encode(texts, normalize_embeddings=True)]
 
-
-def get_default_embedder() -> LocalEmbeddings:
-    return LocalEmbeddings()
+    def warmup(self) -> None:
+        """첫 요청이 지연되지 않도록 더미 문장을 한 번 인코딩"""
+        self.embed([_WARMUP_TEXT])
 
 
+def get_default_embedder() -> LocalEmbeddings:
+    """공유 임베딩 모델 반환 (최초 호출 시 한 번만 로드, thread-safe)"""
+    global _embedder
+    if _embedder is not None:
+        return _embedder
+    with _embedder_lock:
+        if _embedder is None:
+            _embedder = LocalEmbeddings()
+    return _embedder
+
+
+def set_default_embedder(embedder: LocalEmbeddings) -> None:
+    """공유 임베딩 모델 교체 (벤치마크 등 모델 없이 돌릴 때, embed/warmup만 있으면 됨)"""
+    global _embedder
+    with _embedder_lock:
+        _embedder = embedder
+
+
+def preload_embedder() -> LocalEmbeddings:
+    """앱 시작 시 모델 로드 + 워밍업 (lifespan에서 호출)"""
+    global _ready
+    embedder = get_default_embedder()
+    embedder.warmup()
+    _ready = True
+    return embedder
+
+
+def is_embedder_ready() -> bool:
+    return _ready
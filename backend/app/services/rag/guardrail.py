@@ -0,0 +1,124 @@
+import os
+import re
+import threading
+from typing import Optional, Sequence
+
+import numpy as np
+
+from .embeddings import get_default_embedder
+
+# 0보다 크면 관광 중심과 비관광 중심 유사도 차이가 이 값 이상일 때만 관광 질문으로 판단
+_MARGIN = float(os.getenv("GUARDRAIL_MARGIN", "0.0"))
+
+# 관광 관련 키워드 (예전 pipeline/prompt 두 목록의 합집합 + 자주 쓰는 표현과 대전 명소)
+TOURISM_KEYWORDS = (
+    '관광', '여행', '대전', '맛집', '숙박', '교통', '축제', '박물관',
+    '공원', '쇼핑', '문화', '역사', '자연', '레저', '힐링', '과학관',
+    '시장', '카페', '레스토랑', '호텔', '펜션', '캠핑', '등산', '수영',
+    '스키', '골프', '낚시', '피크닉', '산책', '드라이브',
+    '가볼만', '가볼 만', '놀러', '데이트', '나들이', '볼거리', '먹거리', '입장료',
+    '운영시간', '주차', '전시', '공연', '체험', '명소', '코스',
+    '유성', '온천', '엑스포', '한빛탑', '성심당', '수목원', '계족산', '대청호', '꿈돌이',
+)
+
+# 명백히 범위 밖인 주제 (관광 키워드가 없을 때만 적용)
+OFF_TOPIC_KEYWORDS = (
+    '주식', '코인', '비트코인', '정치', '대통령', '선거', '종교', '코딩', '프로그래밍',
+    '숙제', '과제', '대출', '도박', '비밀번호', '주민등록',
+)
+
+# 임베딩 중심 분류에 쓰는 예시 문장
+_ON_TOPIC_EXAMPLES = (
+    "대전에서 가볼 만한 곳 추천해줘",
+    "주말에 아이랑 놀러 갈 데 있어?",
+    "근처에 맛있는 식당 알려줘",
+    "여기 입장료랑 운영시간이 어떻게 돼?",
+    "데이트하기 좋은 장소 어디야?",
+    "비 오는 날 실내에서 구경할 곳",
+    "빵집 투어 코스 짜줘",
+    "버스로 가는 방법 알려줘",
+    "근처 숙소 추천해줘",
+    "이번 달에 열리는 행사 있어?",
+)
+_OFF_TOPIC_EXAMPLES = (
+    "주식 뭐 사야 돼?",
+    "파이썬 코드 짜줘",
+    "수학 문제 풀어줘",
+    "요즘 정치 어떻게 생각해?",
+    "연애 상담 좀 해줘",
+    "리포트 대신 써줘",
+    "비트코인 시세 알려줘",
+    "영어 번역해줘",
+)
+
+
+def _compile(keywords: Sequence[str]) -> "re.Pattern[str]":
+    # 긴 키워드부터 시도하도록 정렬한 하나의 정규식 (목록 순회 대신 한 번의 스캔)
+    return re.compile("|".join(re.escape(k) for k in sorted(set(keywords), key=len, reverse=True)))
+
+
+_TOURISM = _compile(TOURISM_KEYWORDS)
+_OFF_TOPIC = _compile(OFF_TOPIC_KEYWORDS)
+
+
+def has_tourism_keyword(query: str) -> bool:
+    return _TOURISM.search(query.lower()) is not None
+
+
+def keyword_verdict(query: str) -> Optional[bool]:
+    """키워드만으로 판단: True(관광), False(범위 밖), None(판단 불가 -> 임베딩으로 판단)"""
+    q = query.lower()
+    if _TOURISM.search(q):
+        return True
+    if _OFF_TOPIC.search(q):
+        return False
+    return None
+
+
+class CentroidClassifier:
+    """관광/비관광 예시 문장 임베딩의 중심과 쿼리 벡터를 비교하는 분류기"""
+
+    def __init__(self, margin: float = _MARGIN):
+        self.margin = margin
+        vectors = get_default_embedder().embed(list(_ON_TOPIC_EXAMPLES + _OFF_TOPIC_EXAMPLES))
+        m = np.asarray(vectors, dtype=np.float32)
+        on = m[: len(_ON_TOPIC_EXAMPLES)].mean(axis=0)
+        off = m[len(_ON_TOPIC_EXAMPLES):].mean(axis=0)
+        self._centroids = np.stack([on / np.linalg.norm(on), off / np.linalg.norm(off)])
+
+    def is_on_topic(self, query_vector: Sequence[float]) -> bool:
+        v = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(v)
+        if norm == 0:
+            return False
+        on, off = self._centroids @ (v / norm)
+        return float(on - off) >= self.margin
+
+
+_classifier: Optional[CentroidClassifier] = None
+_classifier_lock = threading.Lock()
+
+
+def get_centroid_classifier() -> CentroidClassifier:
+    """공유 중심 분류기 (최초 호출 시 예시 문장을 한 번 임베딩)"""
+    global _classifier
+    if _classifier is not None:
+        return _classifier
+    with _classifier_lock:
+        if _classifier is None:
+            _classifier = CentroidClassifier()
+    return _classifier
+
+
+def is_tourism_query(query: str, query_vector: Optional[Sequence[float]] = None) -> bool:
+    """관광 질문 여부: 키워드로 먼저 판단하고, 애매하면 검색용으로 계산한 쿼리 벡터를 재사용해 판단"""
+    verdict = keyword_verdict(query)
+    if verdict is not None:
+        return verdict
+    if query_vector is None:
+        return False
+    try:
+        return get_centroid_classifier().is_on_topic(query_vector)
+    except Exception as e:
+        print(f"Guardrail classifier unavailable: {e}")
+        return False
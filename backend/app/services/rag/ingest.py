@@ -1,37 +1,184 @@
 import os
 import argparse
-import uuid
+import hashlib
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
-from .vectorstore import add_texts
+from .chunker import iter_file_chunks
+from .manifest import IngestManifest, content_hash, document_id, file_hash
+from .tokens import count_tokens
+from .vectorstore import delete_texts, flush_indexes, get_vector_backend, open_writer, update_metadata
 
+if TYPE_CHECKING:
+    from app.services.jobs import IngestJob
 
-def read_text_files(root: str):
-    texts, metas, ids = [], [], []
+class IncrementalIndexer:
+    """source 단위 증분 색인
+
+    내용이 바뀐 source의 새 청크만 임베딩/업서트하고, 그대로 남은 청크는 메타데이터(위치)만 갱신하며,
+    없어진 청크와 사라진 source의 행은 삭제한다.
+    매니페스트는 모든 쓰기가 끝난 뒤(finish)에만 저장되고, 쓰기에 실패한 source는 다음 실행에서 다시 처리된다.
+    """
+
+    def __init__(self, manifest: IngestManifest, **writer_options: Any):
+        self.manifest = manifest
+        self.stats = {"indexed": 0, "skipped": 0, "deleted": 0, "failed": 0}
+        self._writer = open_writer(**writer_options)
+        self._seen: Set[str] = set()
+        # (source, hash, 새 id 목록, 삭제할 이전 id 목록, 메타데이터만 갱신할 유지 청크)
+        self._pending: List[Tuple[str, str, List[str], List[str], List[Dict[str, Any]]]] = []
+        self._stale: List[str] = []
+
+    def visit(self, source: str, source_hash: str) -> bool:
+        """source를 확인하고 다시 색인해야 하면 True (내용이 그대로면 False)"""
+        self._seen.add(source)
+        if self.manifest.hash(source) == source_hash:
+            self.stats["skipped"] += 1
+            return False
+        return True
+
+    def add_source(self, source: str, source_hash: str, chunks: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+        old_ids = set(self.manifest.ids(source))
+        ids: List[str] = []
+        seen_ids: Set[str] = set()
+        retained: List[Dict[str, Any]] = []
+        for text, meta in chunks:
+            doc_id = document_id(source, content_hash(text))
+            if doc_id in seen_ids:
+                continue  # 같은 source 안의 완전히 같은 청크
+            seen_ids.add(doc_id)
+            ids.append(doc_id)
+            if doc_id not in old_ids:
+                self._writer.add(text, meta, doc_id)
+            else:
+                # writer가 쓰는 메타데이터와 같은 형식 (토큰 수 포함)
+                retained.append({"id": doc_id, "metadata": {**meta, "token_count": count_tokens(text)}})
+        self._pending.append((source, source_hash, ids, list(old_ids - seen_ids), retained))
+
+    def remove_missing(self, prefix: str = "") -> None:
+        """prefix로 시작하지만 이번 실행에서 보이지 않은 source의 행 삭제"""
+        for source in self.manifest.sources():
+            if source.startswith(prefix) and source not in self._seen:
+                self._stale.extend(self.manifest.remove(source))
+
+    def finish(self) -> Dict[str, int]:
+        write_stats = self._writer.close()
+        if self._writer.errors:
+            print(f"Ingest finished with upsert errors: {self._writer.errors[-1]}")
+        failed = set(self._writer.failed_ids)
+        self.stats["indexed"] += write_stats["rows"]
+        self.stats["failed"] += len(failed)
+        retained: List[Dict[str, Any]] = []
+        for source, source_hash, ids, stale, kept in self._pending:
+            if failed.intersection(ids):
+                # 일부 청크 쓰기에 실패한 source는 매니페스트를 갱신하지 않아 다음 실행에서 다시 처리
+                continue
+            self.manifest.set(source, source_hash, ids)
+            self._stale.extend(stale)
+            retained.extend(kept)
+        self._pending = []
+        update_metadata(retained)
+        if self._stale:
+            delete_texts(self._stale)
+            self.stats["deleted"] += len(self._stale)
+            self._stale = []
+        flush_indexes()
+        self.manifest.save()
+        return dict(self.stats)
+
+    def abort(self) -> None:
+        """중단: 진행 중인 쓰기만 마무리하고 매니페스트는 저장하지 않음 (다음 실행에서 다시 처리)"""
+        self._writer.close()
+        flush_indexes()
+
+
+def iter_text_files(root: str) -> Iterator[Tuple[str, str]]:
     for dirpath, _, filenames in os.walk(root):
         for fn in filenames:
             if fn.lower().endswith((".txt", ".md")):
-                path = os.path.join(dirpath, fn)
-                with open(path, "r", encoding="utf-8") as f:
-                    content = f.read()
-                texts.append(content)
-                metas.append({"path": path, "filename": fn})
-                ids.append(str(uuid.uuid4()))
-    return texts, metas, ids
+                yield os.path.join(dirpath, fn), fn
+
+
+def iter_text_chunks(path: str, filename: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """파일을 스트리밍으로 청크 단위 (text, metadata)로 yield"""
+    for chunk in iter_file_chunks(path):
+        yield chunk.text, {
+            "path": path,
+            "filename": filename,
+            "chunk_index": chunk.index,
+            "start_char": chunk.start,
+            "end_char": chunk.end,
+        }
+
+
+def _cancellable(items: Iterable[Any], job: "IngestJob") -> Iterator[Any]:
+    """큰 파일 하나를 처리하는 중에도 취소 요청에 반응하도록 항목마다 확인"""
+    for item in items:
+        job.check_cancelled()
+        yield item
+
+
+def index_directory(root: str, job: Optional["IngestJob"] = None) -> Dict[str, int]:
+    """폴더의 .txt/.md 파일을 증분 색인하고 {"indexed", "skipped", "deleted", "failed"} 반환
+
+    job이 주어지면 파일 단위로 진행률을 보고하고 취소 요청을 확인한다.
+    """
+    root = os.path.abspath(root)
+    # 폴더마다 매니페스트를 따로 둬서 다른 폴더 수집과 충돌하지 않게 함
+    name = "files-" + hashlib.sha1(root.encode("utf-8")).hexdigest()[:16]
+    writer_options: Dict[str, Any] = {}
+    if job is not None:
+        job.report(0, sum(1 for _ in iter_text_files(root)))  # 파일 이름만 훑어서 전체 개수 파악
+        writer_options["on_progress"] = lambda st: job.report_rows(st["rows"])
+    indexer = IncrementalIndexer(IngestManifest(name), **writer_options)
+    try:
+        for n, (path, fn) in enumerate(iter_text_files(root), 1):
+            if job is not None:
+                job.check_cancelled()
+            h = file_hash(path)
+            if indexer.visit(path, h):
+                chunks = iter_text_chunks(path, fn)
+                indexer.add_source(path, h, _cancellable(chunks, job) if job is not None else chunks)
+            if job is not None:
+                job.report(n)
+        indexer.remove_missing(prefix=root + os.sep)
+    except BaseException:
+        indexer.abort()
+        raise
+    return indexer.finish()
+
+
+def backfill_token_counts() -> int:
+    """token_count 메타데이터가 없는 예전 행에 토큰 수를 채움 (재임베딩 없이 메타데이터만 갱신)"""
+    updated = 0
+    for page in get_vector_backend().iter_documents():
+        rows = [
+            {"id": d["id"], "metadata": {**(d.get("metadata") or {}), "token_count": count_tokens(d.get("content") or "")}}
+            for d in page
+            if not isinstance((d.get("metadata") or {}).get("token_count"), int)
+        ]
+        update_metadata(rows)
+        updated += len(rows)
+    flush_indexes()
+    return updated
 
 
 def main():
     ap = argparse.ArgumentParser()
-    ap.add_argument("--path", required=True, help="폴더 경로(.txt/.md)")
+    ap.add_argument("--path", help="폴더 경로(.txt/.md)")
+    ap.add_argument("--backfill-tokens", action="store_true", help="token_count가 없는 저장된 행에 토큰 수를 채움")
     args = ap.parse_args()
-    texts, metas, ids = read_text_files(args.path)
-    if not texts:
+    if args.backfill_tokens:
+        print(f"Backfilled token_count for {backfill_token_counts()} rows.")
+    if not args.path:
+        if not args.backfill_tokens:
+            ap.error("--path is required")
+        return
+    stats = index_directory(args.path)
+    if not any(stats.values()):
         print("No files found.")
         return
-    add_texts(texts, metas, ids)
-    print(f"Indexed {len(texts)} docs.")
+    print(f"Indexed {stats['indexed']} chunks, skipped {stats['skipped']} unchanged files, deleted {stats['deleted']} rows.")
 
 
 if __name__ == "__main__":
     main()
-
-
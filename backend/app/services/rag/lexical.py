@@ -0,0 +1,338 @@
+import argparse
+import heapq
+import json
+import math
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+_INDEX_PATH = os.getenv("LEXICAL_INDEX_PATH", ".lexical_index/docs.jsonl")
+_FLUSH_ROWS = 2000  # 저장 대기 문서가 이만큼 쌓이면 flush를 기다리지 않고 파일에 추가
+_COMPACT_MIN_ROWS = 1000  # 파일 레코드가 이보다 많고 살아 있는 문서의 2배를 넘으면 다시 씀
+_K1 = 1.2
+_B = 0.75
+
+_WORD = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """문자 bigram 토큰화 (형태소 분석 없이도 "한밭수목원", "으능정이" 같은 고유명사가 매칭되도록)"""
+    tokens: List[str] = []
+    for word in _WORD.findall(unicodedata.normalize("NFKC", text).lower()):
+        if len(word) == 1:
+            tokens.append(word)
+        else:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+class NgramIndex:
+    """문자 n-gram 역색인 + BM25 점수 (증분 추가/삭제 지원)
+
+    포스팅은 term -> {slot: tf} 딕셔너리로 갱신하고, 검색 시에는 term별 numpy 배열(캐시)로 점수를 한 번에 계산한다.
+    본문은 메모리에 두지 않고 저장 파일(추가 전용 jsonl 로그)의 위치만 기억했다가 검색 결과와 삭제 때 읽는다.
+    아직 저장하지 않은 문서(path가 없으면 전부)만 본문을 메모리에 들고 있는다.
+    """
+
+    def __init__(self, path: Optional[str] = _INDEX_PATH):
+        self.path = path
+        self._postings: Dict[str, Dict[int, int]] = {}  # term -> {slot: tf}
+        self._arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}  # term -> (slots, tf) 검색용 캐시
+        self._slots: Dict[str, int] = {}  # doc id -> slot
+        self._ids: List[Optional[str]] = []  # slot -> doc id (빈 슬롯은 None)
+        self._meta: List[Optional[Dict[str, Any]]] = []  # slot -> metadata
+        self._offsets: List[int] = []  # slot -> 저장 파일 안 레코드 위치 (-1이면 아직 저장 안 됨)
+        self._sizes: List[int] = []  # slot -> 레코드 바이트 수
+        self._lengths: List[int] = []
+        self._free: List[int] = []
+        self._total_length = 0
+        self._norm: Optional[np.ndarray] = None  # BM25 길이 정규화 항 (쓰기 후 다시 계산)
+        # 저장 대기: slot -> (변경 번호, 본문). 본문이 None이면 메타데이터만 바뀐 것 (본문은 파일에 있음)
+        self._pending: Dict[int, Tuple[int, Optional[str]]] = {}
+        self._deleted: Set[str] = set()  # 파일에 삭제 표시를 남겨야 하는 id
+        self._seq = 0
+        self._log_rows = 0  # 파일의 레코드 수 (덮어쓴/삭제된 레코드 포함)
+        self._reader: Optional[BinaryIO] = None
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()  # 파일 추가/압축은 한 번에 하나씩 (검색은 막지 않음)
+        self._read_lock = threading.Lock()
+        if path and os.path.exists(path):
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def upsert(self, rows: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            for row in rows:
+                doc_id = row.get("id")
+                if not doc_id:
+                    continue
+                doc_id = str(doc_id)
+                self._remove(doc_id)
+                slot = self._add(doc_id, row.get("content", ""), row.get("metadata"))
+                self._deleted.discard(doc_id)
+                self._pending[slot] = (self._next_seq(), row.get("content", ""))
+        if self.path and len(self._pending) >= _FLUSH_ROWS:
+            # 대량 수집 중에도 저장 대기 본문이 한없이 쌓이지 않도록 (파일 쓰기는 잠금 밖에서)
+            self.flush()
+
+    def update_metadata(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """메타데이터만 교체 (내용이 같으므로 포스팅은 그대로)"""
+        with self._lock:
+            for row in rows:
+                slot = self._slots.get(str(row.get("id")))
+                if slot is not None:
+                    self._meta[slot] = row.get("metadata")
+                    pending = self._pending.get(slot)
+                    self._pending[slot] = (self._next_seq(), pending[1] if pending else None)
+
+    def delete(self, ids: Iterable[str]) -> None:
+        with self._lock:
+            for doc_id in ids:
+                doc_id = str(doc_id)
+                if doc_id not in self._slots:
+                    continue
+                if self.path:
+                    # 저장 대기 중인 새 버전만 지워도 파일에 예전 버전이 남아 있을 수 있음
+                    self._deleted.add(doc_id)
+                self._remove(doc_id)
+
+    def search(self, query: str, top_k: int) -> List[Dict[str, Any]]:
+        terms = set(tokenize(query))
+        with self._lock:
+            n = len(self._slots)
+            if not n or not terms:
+                return []
+            if self._norm is None:
+                lengths = np.asarray(self._lengths, dtype=np.float32)
+                self._norm = _K1 * (1 - _B + _B * lengths / (self._total_length / n))
+            scores = np.zeros(len(self._ids), dtype=np.float32)
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                slots, tf = self._term_arrays(term, postings)
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                scores[slots] += idf * tf * (_K1 + 1) / (tf + self._norm[slots])
+            hits = np.flatnonzero(scores)
+            if hits.size > top_k:
+                hits = hits[np.argpartition(-scores[hits], top_k - 1)[:top_k]]
+            hits = hits[np.argsort(-scores[hits])]
+            return [
+                {
+                    "id": self._ids[slot],
+                    "content": self._content(slot),
+                    "metadata": self._meta[slot],
+                    "bm25": round(float(scores[slot]), 4),
+                }
+                for slot in hits
+            ]
+
+    def flush(self) -> None:
+        """저장 대기 중인 변경을 파일 끝에 추가 (잠금 밖에서 쓰고, 쓴 위치만 잠금 안에서 반영)"""
+        if not self.path:
+            return
+        with self._save_lock:
+            with self._lock:
+                if not self._pending and not self._deleted:
+                    return
+                deleted = set(self._deleted)
+                records = [
+                    (slot, seq, self._ids[slot], content, self._meta[slot], self._offsets[slot], self._sizes[slot])
+                    for slot, (seq, content) in self._pending.items()
+                ]
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            written: List[Tuple[int, int, int, int]] = []
+            with open(self.path, "ab") as f:
+                pos = f.tell()
+                for doc_id in deleted:
+                    line = _encode({"id": doc_id, "deleted": True})
+                    f.write(line)
+                    pos += len(line)
+                for slot, seq, doc_id, content, metadata, offset, size in records:
+                    if content is None:
+                        content = self._read(offset, size)["content"]
+                    line = _encode({"id": doc_id, "content": content, "metadata": metadata})
+                    f.write(line)
+                    written.append((slot, seq, pos, len(line)))
+                    pos += len(line)
+            with self._lock:
+                self._deleted -= deleted
+                for slot, seq, offset, size in written:
+                    # 쓰는 동안 다시 바뀐 문서는 다음 flush에서 저장
+                    if self._pending.get(slot, (None,))[0] == seq:
+                        del self._pending[slot]
+                        self._offsets[slot], self._sizes[slot] = offset, size
+                self._log_rows += len(deleted) + len(written)
+                compact = self._log_rows > _COMPACT_MIN_ROWS and self._log_rows > 2 * len(self._slots)
+            if compact:
+                self._compact()
+
+    def _compact(self) -> None:
+        """덮어쓴/삭제된 레코드를 빼고 파일을 다시 씀 (_save_lock 안에서 호출)"""
+        with self._lock:
+            live = [(slot, self._offsets[slot], self._sizes[slot]) for slot in self._slots.values() if self._offsets[slot] >= 0]
+        tmp = self.path + ".tmp"
+        moved: Dict[int, Tuple[int, int]] = {}
+        with open(tmp, "wb") as f:
+            for slot, offset, size in live:
+                moved[offset] = (f.tell(), size)
+                f.write(self._read_bytes(offset, size))
+        with self._lock:
+            with self._read_lock:
+                for slot in self._slots.values():
+                    if self._offsets[slot] in moved:
+                        self._offsets[slot] = moved[self._offsets[slot]][0]
+                if self._reader is not None:
+                    self._reader.close()
+                    self._reader = None
+                os.replace(tmp, self.path)
+            # 압축 전에 저장된 레코드의 삭제 표시는 더 필요 없음 (압축 중 삭제된 문서는 다음 flush에서 표시)
+            self._log_rows = len(moved)
+        print(f"Lexical index compacted: {len(moved)} docs in {self.path}")
+
+    def _next_seq(self) -> int:
+        self._seq += 1
+        return self._seq
+
+    def _content(self, slot: int) -> str:
+        pending = self._pending.get(slot)
+        if pending is not None and pending[1] is not None:
+            return pending[1]
+        return self._read(self._offsets[slot], self._sizes[slot]).get("content", "")
+
+    def _read(self, offset: int, size: int) -> Dict[str, Any]:
+        return json.loads(self._read_bytes(offset, size))
+
+    def _read_bytes(self, offset: int, size: int) -> bytes:
+        with self._read_lock:
+            if self._reader is None:
+                self._reader = open(self.path, "rb")
+            self._reader.seek(offset)
+            return self._reader.read(size)
+
+    def _term_arrays(self, term: str, postings: Dict[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+        arrays = self._arrays.get(term)
+        if arrays is None:
+            slots = np.fromiter(postings.keys(), dtype=np.int64, count=len(postings))
+            tf = np.fromiter(postings.values(), dtype=np.float32, count=len(postings))
+            arrays = self._arrays[term] = (slots, tf)
+        return arrays
+
+    def _add(
+        self, doc_id: str, content: str, metadata: Optional[Dict[str, Any]], offset: int = -1, size: int = 0
+    ) -> int:
+        counts = Counter(tokenize(content))
+        length = sum(counts.values())
+        if self._free:
+            slot = self._free.pop()
+            self._ids[slot], self._meta[slot], self._lengths[slot] = doc_id, metadata, length
+            self._offsets[slot], self._sizes[slot] = offset, size
+        else:
+            slot = len(self._ids)
+            self._ids.append(doc_id)
+            self._meta.append(metadata)
+            self._lengths.append(length)
+            self._offsets.append(offset)
+            self._sizes.append(size)
+        self._slots[doc_id] = slot
+        for term, tf in counts.items():
+            self._postings.setdefault(term, {})[slot] = tf
+            self._arrays.pop(term, None)
+        self._total_length += length
+        self._norm = None
+        return slot
+
+    def _remove(self, doc_id: str) -> None:
+        slot = self._slots.get(doc_id)
+        if slot is None:
+            return
+        for term in set(tokenize(self._content(slot))):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(slot, None)
+                self._arrays.pop(term, None)
+                if not postings:
+                    del self._postings[term]
+        del self._slots[doc_id]
+        self._pending.pop(slot, None)
+        self._total_length -= self._lengths[slot]
+        self._ids[slot], self._meta[slot], self._lengths[slot] = None, None, 0
+        self._offsets[slot], self._sizes[slot] = -1, 0
+        self._free.append(slot)
+        self._norm = None
+
+    def _load(self) -> None:
+        with open(self.path, "rb") as f:
+            offset = 0
+            for line in f:
+                rec = json.loads(line)
+                self._remove(rec["id"])
+                if not rec.get("deleted"):
+                    self._add(rec["id"], rec.get("content", ""), rec.get("metadata"), offset, len(line))
+                offset += len(line)
+                self._log_rows += 1
+        print(f"Lexical index loaded: {len(self._slots)} docs from {self.path}")
+        if self._log_rows > _COMPACT_MIN_ROWS and self._log_rows > 2 * len(self._slots):
+            with self._save_lock:
+                self._compact()
+
+
+def _encode(record: Dict[str, Any]) -> bytes:
+    return (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def reciprocal_rank_fusion(result_lists: List[List[Dict[str, Any]]], top_k: int, k: int = 60) -> List[Dict[str, Any]]:
+    """여러 검색 결과를 순위 기반(RRF)으로 합침: score = sum(1 / (k + rank))"""
+    scores: Dict[str, float] = {}
+    merged: Dict[str, Dict[str, Any]] = {}
+    for results in result_lists:
+        for rank, doc in enumerate(results, 1):
+            doc_id = str(doc.get("id"))
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+            # 먼저 나온 결과(벡터 검색)의 필드(distance 등)를 우선 유지
+            merged[doc_id] = {**doc, **merged.get(doc_id, {})}
+    best = heapq.nlargest(top_k, scores.items(), key=lambda kv: kv[1])
+    return [{**merged[doc_id], "score": round(score, 6)} for doc_id, score in best]
+
+
+_index: Optional[NgramIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_lexical_index() -> NgramIndex:
+    """공유 어휘 역색인 (최초 호출 시 디스크에서 로드)"""
+    global _index
+    if _index is not None:
+        return _index
+    with _index_lock:
+        if _index is None:
+            _index = NgramIndex()
+    return _index
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rebuild", action="store_true", help="현재 벡터 백엔드의 모든 문서로 역색인을 다시 만듦")
+    args = ap.parse_args()
+    if args.rebuild:
+        from .vectorstore import get_vector_backend
+
+        # 기존 파일은 읽지 않고 처음부터 다시 만듦
+        if os.path.exists(_INDEX_PATH):
+            os.remove(_INDEX_PATH)
+        index = NgramIndex(path=_INDEX_PATH)
+        for batch in get_vector_backend().iter_documents():
+            index.upsert(batch)
+        index.flush()
+        print(f"Rebuilt lexical index with {len(index)} docs.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from app.core.metrics import inc
+
+load_dotenv()
+
+_TIMEOUT_SEC = float(os.getenv("LLM_TIMEOUT_SEC", "30"))
+_CONNECT_TIMEOUT_SEC = 5.0
+_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+_RETRY_BASE_SEC = 0.5
+_RETRY_MAX_SEC = 8.0
+_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))  # 연속 실패 몇 번이면 차단할지
+_BREAKER_RESET_SEC = float(os.getenv("LLM_BREAKER_RESET_SEC", "30"))  # 차단 후 다시 시도해 볼 때까지
+
+Messages = List[Dict[str, str]]
+
+
+class LLMError(RuntimeError):
+    """LLM 호출 실패 (메시지는 사용자에게 그대로 보여줄 수 있는 형태)"""
+
+
+class LLMUnavailable(LLMError):
+    """서킷 브레이커가 열려 있어 호출하지 않음 (제공자 장애 중)"""
+
+
+class CircuitBreaker:
+    """연속 실패가 쌓이면 일정 시간 호출을 막고, 이후 한 번만 시험 호출(half-open)을 허용"""
+
+    def __init__(self, failure_threshold: int = _BREAKER_FAILURES, reset_sec: float = _BREAKER_RESET_SEC):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_sec = reset_sec
+        self.state = "closed"  # closed | open | half_open
+        self.failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            # open 상태로 reset_sec이 지났거나, 시험 호출이 결과 없이(취소 등) reset_sec 넘게 끝나지 않았으면 다시 시험
+            if time.monotonic() - self._opened_at >= self.reset_sec:
+                self.state = "half_open"
+                self._opened_at = time.monotonic()
+                return True  # 시험 호출 하나만 통과
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    print(f"LLM circuit opened after {self.failures} failures")
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+    def release_probe(self) -> None:
+        """시험 호출이 제공자 장애와 무관한 이유로 끝났으면 다음 요청이 다시 시험하도록 되돌림"""
+        with self._lock:
+            if self.state == "half_open":
+                self.state = "open"
+                self._opened_at = 0.0
+
+
+class LLMClient:
+    """OpenAI 호환 API 클라이언트 (프로세스 전역)
+
+    비동기 클라이언트를 한 번만 만들어 keep-alive 연결을 재사용하고,
+    동시 호출 수 제한, 호출별 타임아웃, 429/5xx 지터 재시도, 서킷 브레이커를 적용한다.
+    OPENAI_BASE_URL이 있으면 그 주소(로컬 mock 서버 등)로 보낸다.
+    """
+
+    def __init__(self, max_concurrency: int = _MAX_CONCURRENCY, max_retries: int = _MAX_RETRIES):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.breaker = CircuitBreaker()
+        self._async_client: Any = None
+        self._async_slots: Optional[asyncio.Semaphore] = None
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.rejected = 0
+        self.inflight = 0
+
+    # 공개 API
+
+    async def complete_async(self, messages: Messages) -> str:
+        self._admit()
+        client = self._get_async_client()
+        attempt = 0
+        async with self._get_async_slots():
+            while True:
+                try:
+                    with self._track():
+                        response = await client.chat.completions.create(**_request(messages))
+                    break
+                except Exception as e:
+                    await asyncio.sleep(self._on_error(e, attempt))
+                    attempt += 1
+        self.breaker.record_success()
+        _record_usage(response)
+        return response.choices[0].message.content
+
+    async def stream_async(self, messages: Messages) -> AsyncIterator[str]:
+        """토큰 스트리밍 (재시도는 첫 응답을 받기 전까지만)"""
+        self._admit()
+        client = self._get_async_client()
+        attempt = 0
+        async with self._get_async_slots():
+            while True:
+                try:
+                    with self._track():
+                        stream = await client.chat.completions.create(**_request(messages), stream=True)
+                    break
+                except Exception as e:
+                    await asyncio.sleep(self._on_error(e, attempt))
+                    attempt += 1
+            # 응답이 오기 시작했으면 제공자는 정상 (소비자가 중간에 끊어도 브레이커 상태가 남지 않게 여기서 기록)
+            self.breaker.record_success()
+            output: List[str] = []
+            try:
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        output.append(chunk.choices[0].delta.content)
+                        yield chunk.choices[0].delta.content
+            except Exception as e:
+                self._count_failure(e)
+                raise LLMError(f"OpenAI API 호출 오류: {e}") from e
+            finally:
+                # 클라이언트 연결이 끊겨 취소된 경우에도 더 이상 토큰을 받지 않도록 정리
+                await stream.close()
+                _record_stream_usage(messages, output)
+
+    async def aclose(self) -> None:
+        with self._lock:
+            async_client, self._async_client = self._async_client, None
+        if async_client is not None:
+            await async_client.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "circuit": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "inflight": self.inflight,
+            "calls": self.calls,
+            "retries": self.retries,
+            "failures": self.failures,
+            "rejected": self.rejected,
+        }
+
+    # 내부
+
+    def _admit(self) -> None:
+        _api_key()
+        if not self.breaker.allow():
+            with self._lock:
+                self.rejected += 1
+            raise LLMUnavailable("LLM 제공자 장애로 잠시 호출을 중단했습니다")
+
+    def _on_error(self, e: Exception, attempt: int) -> float:
+        """재시도할 오류면 대기 시간을 반환하고, 아니면 LLMError를 발생"""
+        retryable = _is_retryable(e)
+        if not retryable or attempt >= self.max_retries:
+            if retryable:
+                self._count_failure(e)
+            else:
+                # 요청 자체의 문제(400/401 등)는 제공자 장애가 아니므로 브레이커에 반영하지 않음
+                self.breaker.release_probe()
+            raise LLMError(f"OpenAI API 호출 오류: {e}") from e
+        with self._lock:
+            self.retries += 1
+        delay = _RETRY_BASE_SEC * (2 ** attempt) * (0.5 + random.random())
+        retry_after = _retry_after(e)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return min(delay, _RETRY_MAX_SEC)
+
+    def _count_failure(self, e: Exception) -> None:
+        print(f"LLM call failed: {e}")
+        with self._lock:
+            self.failures += 1
+        self.breaker.record_failure()
+
+    def _track(self) -> "_Inflight":
+        return _Inflight(self)
+
+    def _get_async_client(self) -> Any:
+        if self._async_client is None:
+            import openai
+
+            with self._lock:
+                if self._async_client is None:
+                    self._async_client = openai.AsyncOpenAI(**_client_options())
+        return self._async_client
+
+    def _get_async_slots(self) -> asyncio.Semaphore:
+        # 이벤트 루프 안에서 처음 호출될 때 생성
+        if self._async_slots is None:
+            self._async_slots = asyncio.Semaphore(self.max_concurrency)
+        return self._async_slots
+
+
+class _Inflight:
+    def __init__(self, client: LLMClient):
+        self.client = client
+
+    def __enter__(self) -> None:
+        with self.client._lock:
+            self.client.calls += 1
+            self.client.inflight += 1
+
+    def __exit__(self, *exc: Any) -> None:
+        with self.client._lock:
+            self.client.inflight -= 1
+
+
+def _api_key() -> str:
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise LLMError("OPENAI_API_KEY가 필요합니다")
+    return api_key
+
+
+def _client_options() -> Dict[str, Any]:
+    import httpx
+
+    options: Dict[str, Any] = {
+        "api_key": _api_key(),
+        "timeout": httpx.Timeout(_TIMEOUT_SEC, connect=_CONNECT_TIMEOUT_SEC),
+        "max_retries": 0,  # 재시도는 LLMClient가 브레이커와 함께 직접 처리
+    }
+    base_url = os.getenv("OPENAI_BASE_URL")
+    if base_url:
+        options["base_url"] = base_url
+    return options
+
+
+def _request(messages: Messages) -> Dict[str, Any]:
+    return {
+        "model": os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
+        "messages": messages,
+        "temperature": 0.4,
+        "max_tokens": 512,
+    }
+
+
+def _record_usage(response: Any) -> None:
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    inc("kauni_llm_tokens_total", usage.prompt_tokens or 0, kind="prompt")
+    inc("kauni_llm_tokens_total", usage.completion_tokens or 0, kind="completion")
+
+
+def _record_stream_usage(messages: Messages, output: List[str]) -> None:
+    # 스트리밍 응답에는 usage가 없으므로 같은 토크나이저로 추정
+    from .tokens import count_tokens
+
+    try:
+        inc("kauni_llm_tokens_total", sum(count_tokens(m.get("content") or "") for m in messages), kind="prompt")
+        inc("kauni_llm_tokens_total", count_tokens("".join(output)), kind="completion")
+    except Exception as e:
+        print(f"Token usage estimate failed: {e}")
+
+
+def _is_retryable(e: Exception) -> bool:
+    import openai
+
+    if isinstance(e, (openai.APIConnectionError, openai.RateLimitError)):  # APITimeoutError 포함
+        return True
+    return isinstance(e, openai.APIStatusError) and e.status_code >= 500
+
+
+def _retry_after(e: Exception) -> Optional[float]:
+    response = getattr(e, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+_client: Optional[LLMClient] = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client() -> LLMClient:
+    global _client
+    if _client is not None:
+        return _client
+    with _client_lock:
+        if _client is None:
+            _client = LLMClient()
+    return _client
+
+
+async def shutdown_llm_client() -> None:
+    global _client
+    with _client_lock:
+        client, _client = _client, None
+    if client is not None:
+        await client.aclose()
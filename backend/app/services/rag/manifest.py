@@ -0,0 +1,63 @@
+import hashlib
+import json
+import os
+import uuid
+from typing import Dict, Iterator, List, Optional
+
+_MANIFEST_DIR = os.getenv("INGEST_MANIFEST_DIR", ".ingest_manifest")
+# 문서 id 생성용 고정 네임스페이스 (바꾸면 모든 id가 바뀌므로 변경 금지)
+_ID_NAMESPACE = uuid.UUID("6f1c2d8e-4b7a-5e39-9a0d-3c5b8e7f1a24")
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def file_hash(path: str, block_size: int = 1024 * 1024) -> str:
+    """파일 전체를 메모리에 올리지 않고 sha256 계산"""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def document_id(source: str, chunk_hash: str) -> str:
+    """source + 내용 해시로 결정되는 문서 id (같은 내용이면 재수집해도 같은 id)"""
+    return str(uuid.uuid5(_ID_NAMESPACE, f"{source}\n{chunk_hash}"))
+
+
+class IngestManifest:
+    """이미 색인된 source의 해시와 문서 id 목록을 로컬 JSON 파일로 관리"""
+
+    def __init__(self, name: str, directory: str = _MANIFEST_DIR):
+        self.path = os.path.join(directory, f"{name}.json")
+        self._sources: Dict[str, Dict] = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._sources = json.load(f).get("sources", {})
+
+    def hash(self, source: str) -> Optional[str]:
+        entry = self._sources.get(source)
+        return entry["hash"] if entry else None
+
+    def ids(self, source: str) -> List[str]:
+        entry = self._sources.get(source)
+        return list(entry["ids"]) if entry else []
+
+    def sources(self) -> Iterator[str]:
+        return iter(list(self._sources))
+
+    def set(self, source: str, source_hash: str, ids: List[str]) -> None:
+        self._sources[source] = {"hash": source_hash, "ids": ids}
+
+    def remove(self, source: str) -> List[str]:
+        entry = self._sources.pop(source, None)
+        return entry["ids"] if entry else []
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "sources": self._sources}, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
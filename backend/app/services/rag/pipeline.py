@@ -1,66 +1,184 @@
-import os
-from typing import Dict
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from dotenv import load_dotenv
 
+from app.core.metrics import inc, observe_stage, span
+from app.core.singleflight import get_singleflight
+from app.services.crowding.forecast import forecast_context
+
 from . import vectorstore
-from .prompt import format_prompt, create_fallback_response
+from .answer_cache import get_answer_cache
+from .guardrail import is_tourism_query, keyword_verdict
+from .llm import LLMError, Messages, get_llm_client
+from .prompt import build_messages, create_fallback_response
+from .query_cache import normalize_query
 
 load_dotenv()
 
 
-def call_llm(prompt: str) -> str:
-    """OpenAI API를 통한 LLM 호출"""
-    import openai
-    api_key = os.getenv("OPENAI_API_KEY")
-    model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
-    
-    if not api_key:
-        return "OPENAI_API_KEY가 필요합니다"
-    
-    try:
-        client = openai.OpenAI(api_key=api_key)
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": "당신은 대전 지역 관광 도우미 까우니입니다. 항상 까우니의 페르소나를 유지하고, 관광 관련 질문에만 답변하세요."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.4,
-            max_tokens=512
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        return f"OpenAI API 호출 오류: {e}"
-
-
-def generate_answer(query: str) -> Dict:
-    """RAG 파이프라인을 통한 답변 생성"""
-    
-    # 1단계: 가드레일 체크 (관광 관련 질문인지 확인)
-    if not _is_tourism_related(query):
-        fallback_response = create_fallback_response(query)
-        return {
-            "answer": fallback_response,
-            "contexts": [],
-            "source": "guardrail",
-            "confidence": "high"
-        }
-    
-    # 2단계: 벡터 검색으로 관련 컨텍스트 찾기
-    docs = vectorstore.query(query, top_k=4)
-    
+async def generate_answer_async(query: str) -> Dict:
+    """RAG 파이프라인을 통한 답변 생성 (챗 엔드포인트용)
+
+    같은 질문이 동시에 몰리면 임베딩/검색/LLM 호출을 한 번만 하고 결과를 함께 받는다.
+    """
+    return await get_singleflight("chat").do(normalize_query(query), lambda: _generate_answer_async(query))
+
+
+async def _generate_answer_async(query: str) -> Dict:
+    # 1단계: 가드레일 체크 (키워드로 범위 밖임이 분명하면 임베딩/검색 전에 바로 거절)
+    if _keyword_rejects(query):
+        return _guardrail_result(query, "keyword")
+    with span("embed"):
+        qv = await _try_embed_async(query)
+    # 키워드로 판단이 안 되면 검색용 쿼리 벡터를 재사용해 임베딩 중심 분류
+    if _classifier_rejects(query, qv):
+        return _guardrail_result(query, "classifier")
+
+    # 2단계: 시맨틱 캐시 확인 후 벡터 검색으로 관련 컨텍스트 찾기
+    # (혼잡 시기 질문은 예측이 계속 바뀌므로 캐시하지 않고, 예측을 첫 컨텍스트로 넣음)
+    forecast = _forecast_context(query)
+    cache_qv = None if forecast else qv
+    cached = _cached_answer(cache_qv)
+    if cached is not None:
+        return cached
+    with span("retrieval"):
+        docs = _with_forecast(forecast, await vectorstore.query_async(query, top_k=4, query_vector=qv))
+
     # 3단계: 프롬프트 포맷팅 및 LLM 호출
-    if docs and docs[0].get('id') != 'dummy_1':  # 실제 데이터가 있는 경우
-        prompt = format_prompt(query, docs)
-        answer = call_llm(prompt)
-        source = "rag"
-        confidence = "high"
+    if _has_real_docs(docs):
+        try:
+            messages = _build_messages(query, docs)
+            with span("llm"):
+                answer = await get_llm_client().complete_async(messages)
+        except LLMError as e:
+            # 제공자 장애/설정 오류 시 오류 문구 대신 기본 응답으로 전환
+            return _llm_fallback(query, docs, e)
+        return _remember(cache_qv, _result(answer, docs, source="rag", confidence="high"))
+    # 더미 데이터인 경우 기본 응답
+    return _no_docs_result(query, docs)
+
+
+async def stream_answer_async(query: str) -> AsyncIterator[Tuple[str, object]]:
+    """스트리밍 답변: 검색된 컨텍스트를 먼저 내보내고 이어서 LLM 토큰을 전달
+
+    ("contexts", docs) -> ("token", text)... -> ("done", {"source", "confidence"}) 순서로 yield
+    """
+    if _keyword_rejects(query):
+        rejected_by: Optional[str] = "keyword"
     else:
-        # 더미 데이터인 경우 기본 응답
-        answer = _generate_basic_response(query)
-        source = "fallback"
-        confidence = "low"
-    
+        with span("embed"):
+            qv = await _try_embed_async(query)
+        rejected_by = "classifier" if _classifier_rejects(query, qv) else None
+    if rejected_by is not None:
+        inc("kauni_guardrail_rejects_total", by=rejected_by)
+        yield "contexts", []
+        yield "token", create_fallback_response(query)
+        yield "done", {"source": "guardrail", "confidence": "high"}
+        return
+
+    forecast = _forecast_context(query)
+    cache_qv = None if forecast else qv
+    cached = _cached_answer(cache_qv)
+    if cached is not None:
+        yield "contexts", cached["contexts"]
+        yield "token", cached["answer"]
+        yield "done", {"source": cached["source"], "confidence": cached["confidence"]}
+        return
+
+    with span("retrieval"):
+        docs = _with_forecast(forecast, await vectorstore.query_async(query, top_k=4, query_vector=qv))
+    yield "contexts", docs
+
+    if _has_real_docs(docs):
+        tokens: List[str] = []
+        try:
+            messages = _build_messages(query, docs)
+            started = time.perf_counter()
+            async for token in get_llm_client().stream_async(messages):
+                if not tokens:
+                    observe_stage("llm_first_token", time.perf_counter() - started)
+                tokens.append(token)
+                yield "token", token
+        except LLMError as e:
+            if not tokens:
+                # 아직 아무것도 보내지 않았으면 기본 응답으로 전환
+                fallback = _llm_fallback(query, docs, e)
+                yield "token", fallback["answer"]
+                yield "done", {"source": fallback["source"], "confidence": fallback["confidence"]}
+                return
+            # 이미 보낸 토큰은 되돌릴 수 없으므로 잘린 답변임을 알리고 캐시하지 않음
+            print(f"LLM stream cut off after {len(tokens)} tokens: {e}")
+            inc("kauni_fallback_total", reason="llm_truncated")
+            yield "done", {"source": "fallback", "confidence": "low", "truncated": True}
+            return
+        # 끝까지 받은 답변만 캐시
+        _remember(cache_qv, _result("".join(tokens), docs, source="rag", confidence="high"))
+        yield "done", {"source": "rag", "confidence": "high"}
+    else:
+        fallback = _no_docs_result(query, docs)
+        yield "token", fallback["answer"]
+        yield "done", {"source": fallback["source"], "confidence": fallback["confidence"]}
+
+
+def _keyword_rejects(query: str) -> bool:
+    with span("guardrail"):
+        return keyword_verdict(query) is False
+
+
+def _classifier_rejects(query: str, qv: Optional[List[float]]) -> bool:
+    with span("guardrail"):
+        return not is_tourism_query(query, qv)
+
+
+def _build_messages(query: str, docs: List[Dict]) -> Messages:
+    with span("prompt"):
+        return build_messages(query, docs)
+
+
+async def _try_embed_async(query: str) -> Optional[List[float]]:
+    try:
+        return await vectorstore.embed_query_async(query)
+    except Exception as e:
+        print(f"Query embedding failed: {e}")
+        return None
+
+
+def _forecast_context(query: str) -> Optional[Dict]:
+    try:
+        with span("forecast"):
+            return forecast_context(query)
+    except Exception as e:
+        print(f"Crowding forecast lookup failed: {e}")
+        return None
+
+
+def _with_forecast(forecast: Optional[Dict], docs: List[Dict]) -> List[Dict]:
+    # 예측 컨텍스트가 있으면 맨 앞에 두고, 더미 검색 결과는 제외
+    if forecast is None:
+        return docs
+    return [forecast] + [d for d in docs if d.get("id") != "dummy_1"]
+
+
+def _cached_answer(qv: Optional[List[float]]) -> Optional[Dict]:
+    if qv is None:
+        return None
+    with span("answer_cache"):
+        return get_answer_cache().lookup(qv)
+
+
+def _remember(qv: Optional[List[float]], result: Dict) -> Dict:
+    """LLM 답변을 시맨틱 캐시에 저장하고 그대로 반환"""
+    if qv is not None:
+        get_answer_cache().store(qv, result)
+    return result
+
+
+def _has_real_docs(docs: List[Dict]) -> bool:
+    """실제 데이터가 검색됐는지 (더미 데이터가 아닌지)"""
+    return bool(docs) and docs[0].get('id') != 'dummy_1'
+
+
+def _result(answer: str, docs: List[Dict], source: str, confidence: str) -> Dict:
     return {
         "answer": answer,
         "contexts": docs,
@@ -69,17 +187,20 @@ def generate_answer(query: str) -> Dict:
     }
 
 
-def _is_tourism_related(query: str) -> bool:
-    """질문이 관광 관련인지 확인하는 함수"""
-    tourism_keywords = [
-        '관광', '여행', '대전', '맛집', '숙박', '교통', '축제', '박물관', 
-        '공원', '쇼핑', '문화', '역사', '자연', '레저', '힐링', '과학관',
-        '시장', '카페', '레스토랑', '호텔', '펜션', '캠핑', '등산', '수영',
-        '스키', '골프', '낚시', '피크닉', '산책', '드라이브'
-    ]
-    
-    query_lower = query.lower()
-    return any(keyword in query_lower for keyword in tourism_keywords)
+def _llm_fallback(query: str, docs: List[Dict], error: LLMError) -> Dict:
+    print(f"LLM unavailable, answering with basic response: {error}")
+    inc("kauni_fallback_total", reason="llm_error")
+    return _result(_generate_basic_response(query), docs, source="fallback", confidence="low")
+
+
+def _no_docs_result(query: str, docs: List[Dict]) -> Dict:
+    inc("kauni_fallback_total", reason="no_documents")
+    return _result(_generate_basic_response(query), docs, source="fallback", confidence="low")
+
+
+def _guardrail_result(query: str, rejected_by: str) -> Dict:
+    inc("kauni_guardrail_rejects_total", by=rejected_by)
+    return _result(create_fallback_response(query), [], source="guardrail", confidence="high")
 
 
 def _generate_basic_response(query: str) -> str:
@@ -1,5 +1,13 @@
+import os
 from typing import List, Dict
 
+from .guardrail import has_tourism_keyword
+from .tokens import estimate_tokens, truncate_tokens
+
+_CONTEXT_TOKEN_BUDGET = int(os.getenv("PROMPT_CONTEXT_TOKEN_BUDGET", "1500"))
+_CONTEXT_OVERHEAD_TOKENS = 16  # 컨텍스트 하나당 머리말/출처 줄
+_MIN_PASSAGE_TOKENS = 48  # 이보다 짧게 잘라야 하면 넣지 않음
+
 # 까우니 페르소나 정의
 KAOUNI_PERSONA = {
     "identity": {
@@ -71,48 +79,75 @@ TOURISM_INFO_PROMPT = """
 5. **연계 정보**: 주변 관광지, 맛집, 숙박시설
 """
 
-def format_prompt(query: str, contexts: List[Dict]) -> str:
-    """고급 프롬프트 포맷팅"""
-    
-    # 컨텍스트 정보 포맷팅
-    ctx = "\n\n".join([
+_INSTRUCTIONS = (
+    "[지시사항]\n"
+    "1. 가드레일 체크를 먼저 수행하세요\n"
+    "2. 관광 관련 질문인 경우 사용자 메시지의 [참고 컨텍스트]를 참고하여 답변하세요\n"
+    "3. 컨텍스트에 없는 정보는 '확인해볼게요'라고 표현하세요\n"
+    "4. 까우니의 페르소나를 유지하며 친근하고 도움이 되는 답변을 제공하세요\n"
+    "5. 답변 후 '더 궁금한 점이 있으시면 언제든 말씀해주세요!'를 추가하세요"
+)
+
+
+# /persona로 지정하는 추가 답변 스타일 (비어 있으면 기본 페르소나만 사용)
+ANSWER_STYLE = ""
+
+
+def static_system_prompt() -> str:
+    """요청마다 똑같은 system 메시지 (맨 앞에 둬서 제공자 측 프롬프트 캐시가 prefix를 재사용할 수 있게 함)
+
+    /persona로 SYSTEM_PROMPT가 바뀔 수 있어 호출 시점의 값으로 만든다.
+    """
+    style = f"\n\n**답변 스타일:**\n{ANSWER_STYLE}" if ANSWER_STYLE else ""
+    return f"{SYSTEM_PROMPT}{style}\n\n{GUARDRAIL_PROMPT}\n\n{TOURISM_INFO_PROMPT}\n\n{_INSTRUCTIONS}"
+
+
+def _passage_tokens(c: Dict) -> int:
+    # 수집 시 저장해 둔 토큰 수를 사용하고, 없는 예전 행은 요청마다 토크나이즈하지 않고 보수적인 추정치 사용
+    # (python -m app.services.rag.ingest --backfill-tokens로 채울 수 있음)
+    n = (c.get("metadata") or {}).get("token_count")
+    return n if isinstance(n, int) else estimate_tokens(c.get("content") or "")
+
+
+def pack_contexts(contexts: List[Dict], budget: int = _CONTEXT_TOKEN_BUDGET) -> List[Dict]:
+    """순위가 높은 문서부터 토큰 예산 안에 담기 (넘치는 문서는 잘라서 넣거나 제외)"""
+    packed: List[Dict] = []
+    remaining = budget
+    for c in contexts:
+        cost = _passage_tokens(c) + _CONTEXT_OVERHEAD_TOKENS
+        if cost <= remaining:
+            packed.append(c)
+            remaining -= cost
+            continue
+        room = remaining - _CONTEXT_OVERHEAD_TOKENS
+        if room >= _MIN_PASSAGE_TOKENS:
+            packed.append({**c, "content": truncate_tokens(c.get("content") or "", room)})
+            remaining = 0
+    return packed
+
+
+def format_contexts(contexts: List[Dict]) -> str:
+    return "\n\n".join([
         f"[컨텍스트 {i+1}]\n"
-        f"내용: {c.get('content', '')}\n"  # text -> content로 변경
-        f"출처: {c.get('metadata', {}).get('source', '알 수 없음')}\n"
-        f"거리: {c.get('distance', 0.0):.4f}"
+        f"내용: {c.get('content', '')}\n"
+        f"출처: {(c.get('metadata') or {}).get('source', '알 수 없음')}"
+        + (f"\n거리: {c['distance']:.4f}" if c.get("distance") is not None else "")
         for i, c in enumerate(contexts)
     ])
-    
-    # 전체 프롬프트 조합
-    full_prompt = (
-        f"{SYSTEM_PROMPT}\n\n"
-        f"{GUARDRAIL_PROMPT}\n\n"
-        f"{TOURISM_INFO_PROMPT}\n\n"
-        f"[사용자 질문]\n{query}\n\n"
-        f"[참고 컨텍스트]\n{ctx}\n\n"
-        f"[지시사항]\n"
-        f"1. 가드레일 체크를 먼저 수행하세요\n"
-        f"2. 관광 관련 질문인 경우 위 컨텍스트를 참고하여 답변하세요\n"
-        f"3. 컨텍스트에 없는 정보는 '확인해볼게요'라고 표현하세요\n"
-        f"4. 까우니의 페르소나를 유지하며 친근하고 도움이 되는 답변을 제공하세요\n"
-        f"5. 답변 후 '더 궁금한 점이 있으시면 언제든 말씀해주세요!'를 추가하세요"
-    )
-    
-    return full_prompt
+
+
+def build_messages(query: str, contexts: List[Dict]) -> List[Dict[str, str]]:
+    """LLM 메시지 구성: 정적 system prompt + (예산 안에 담은 컨텍스트 + 사용자 질문)"""
+    ctx = format_contexts(pack_contexts(contexts))
+    return [
+        {"role": "system", "content": static_system_prompt()},
+        {"role": "user", "content": f"[참고 컨텍스트]\n{ctx}\n\n[사용자 질문]\n{query}"},
+    ]
 
 def create_fallback_response(query: str) -> str:
     """범위 밖 질문에 대한 폴백 응답"""
     
-    # 관광 관련 키워드 체크
-    tourism_keywords = [
-        '관광', '여행', '대전', '맛집', '숙박', '교통', '축제', '박물관', 
-        '공원', '쇼핑', '문화', '역사', '자연', '레저', '힐링'
-    ]
-    
-    query_lower = query.lower()
-    is_tourism_related = any(keyword in query_lower for keyword in tourism_keywords)
-    
-    if not is_tourism_related:
+    if not has_tourism_keyword(query):
         return (
             "안녕하세요! 까우니예요 \n\n"
             "저는 대전 지역 관광 안내를 도와드리는 챗봇이에요. "
@@ -0,0 +1,104 @@
+import os
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+_MAX_BYTES = int(os.getenv("EMBED_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+_TTL_SEC = float(os.getenv("EMBED_CACHE_TTL_SEC", "0"))  # 0이면 만료 없음
+# OrderedDict 노드, 튜플, array 헤더 등 항목당 고정 비용 (대략치)
+_ENTRY_OVERHEAD = 200
+
+_WS = re.compile(r"\s+")
+
+
+def normalize_query(text: str) -> str:
+    """캐시 키용 정규화: 유니코드 NFKC + 소문자 + 공백 정리"""
+    return _WS.sub(" ", unicodedata.normalize("NFKC", text)).strip().lower()
+
+
+class QueryEmbeddingCache:
+    """정규화된 쿼리 문자열 -> 임베딩 벡터 LRU 캐시 (메모리 예산 기준)"""
+
+    def __init__(self, max_bytes: int = _MAX_BYTES, ttl_sec: float = _TTL_SEC):
+        self.max_bytes = max_bytes
+        self.ttl_sec = ttl_sec
+        self._entries: "OrderedDict[str, Tuple[array, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, text: str) -> Optional[List[float]]:
+        key = normalize_query(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            vec, expires_at, _ = entry
+            if expires_at and expires_at < time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return vec.tolist()
+
+    def put(self, text: str, vector: Sequence[float]) -> None:
+        key = normalize_query(text)
+        vec = array("f", vector)  # float32로 저장해 메모리 절약
+        size = len(key.encode("utf-8")) + vec.itemsize * len(vec) + _ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + self.ttl_sec if self.ttl_sec > 0 else 0.0
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (vec, expires_at, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+    def _remove(self, key: str) -> None:
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+
+_cache: Optional[QueryEmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_query_cache() -> QueryEmbeddingCache:
+    """공유 쿼리 임베딩 캐시 반환"""
+    global _cache
+    if _cache is not None:
+        return _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = QueryEmbeddingCache()
+    return _cache
@@ -0,0 +1,69 @@
+import os
+import threading
+from typing import Any, Optional
+
+_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+_FALLBACK_ENCODING = "o200k_base"
+
+_encoding: Any = None
+_encoding_lock = threading.Lock()
+_encoding_loaded = False
+
+
+def get_encoding() -> Optional[Any]:
+    """OPENAI_MODEL에 맞는 tiktoken 인코딩 (tiktoken이 없거나 인코딩 파일을 못 받으면 None)
+
+    처음 부를 때 인코딩 파일을 내려받고 BPE를 파싱하므로 서버는 시작할 때(lifespan) 미리 불러 둔다.
+    """
+    global _encoding, _encoding_loaded
+    if _encoding_loaded:
+        return _encoding
+    with _encoding_lock:
+        if not _encoding_loaded:
+            try:
+                import tiktoken  # 없으면 추정치 사용
+
+                try:
+                    _encoding = tiktoken.encoding_for_model(_MODEL)
+                except KeyError:  # tiktoken이 모르는 모델명
+                    _encoding = tiktoken.get_encoding(_FALLBACK_ENCODING)
+            except Exception as e:
+                print(f"tiktoken encoding unavailable, estimating token counts: {e}")
+            _encoding_loaded = True
+    return _encoding
+
+
+def estimate_tokens(text: str) -> int:
+    # 토크나이저가 없을 때의 보수적인 추정: 한글 등 비ASCII는 글자당 1, ASCII는 4글자당 1
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return non_ascii + (len(text) - non_ascii + 3) // 4
+
+
+def count_tokens(text: str) -> int:
+    enc = get_encoding()
+    if enc is None:
+        return estimate_tokens(text)
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """text를 앞에서부터 max_tokens 토큰 이내로 자름"""
+    if max_tokens <= 0:
+        return ""
+    enc = get_encoding()
+    if enc is None:
+        if estimate_tokens(text) <= max_tokens:
+            return text
+        # 추정치 기준으로 이분 탐색
+        lo, hi = 0, len(text)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if estimate_tokens(text[:mid]) <= max_tokens:
+                lo = mid
+            else:
+                hi = mid - 1
+        return text[:lo]
+    ids = enc.encode(text, disallowed_special=())
+    if len(ids) <= max_tokens:
+        return text
+    return enc.decode(ids[:max_tokens])
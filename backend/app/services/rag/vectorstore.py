@@ -1,81 +1,217 @@
-from typing import List, Dict, Any
+import asyncio
+import os
+import threading
+from typing import List, Dict, Any, Iterable, Optional
 
-from app.core.supabase_client import get_supabase_client
-from .embeddings import get_default_embedder
+from app.core.executors import run_blocking
+from app.core.metrics import inc, span
+from app.core.singleflight import get_singleflight
+
+from .backends import VectorBackend, create_backend
+from .batcher import get_query_batcher
+from .query_cache import get_query_cache, normalize_query
+from .answer_cache import get_answer_cache
+from .lexical import get_lexical_index, reciprocal_rank_fusion
+from .writer import BatchedUpsertWriter, UpsertError
 
 _EMBEDDING_DIM = 384  # all-MiniLM-L6-v2
-_TABLE = "documents"
-_RPC_MATCH = "match_documents"
+_BACKEND = os.getenv("VECTOR_BACKEND", "supabase")  # supabase | local
+_HYBRID = os.getenv("HYBRID_SEARCH", "1") != "0"  # 0이면 벡터 검색만 사용
+_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))  # RRF로 합치기 전 각 검색기의 후보 수
+
+_backend: Optional[VectorBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_vector_backend() -> VectorBackend:
+    """VECTOR_BACKEND로 선택된 공유 벡터 저장소 백엔드"""
+    global _backend
+    if _backend is not None:
+        return _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = create_backend(_BACKEND, dim=_EMBEDDING_DIM)
+    return _backend
+
+
+def open_writer(**kwargs: Any) -> BatchedUpsertWriter:
+    """현재 백엔드로 쓰는 배치 업서트 writer (쓰인 문서는 어휘 색인에도 반영하고 캐시 답변은 무효화)"""
+    return BatchedUpsertWriter(get_vector_backend(), on_written=_on_written, **kwargs)
 
 
-def add_texts(texts: List[str], metadatas: List[Dict[str, Any]] | None = None, ids: List[str] | None = None):
-    sb = get_supabase_client()
-    embedder = get_default_embedder()
-    vectors = embedder.embed(texts)
+def add_texts(texts: List[str], metadatas: List[Dict[str, Any]] | None = None, ids: List[str] | None = None) -> Dict[str, Any]:
     if metadatas is None:
         metadatas = [{} for _ in texts]
-    rows = []
-    for i, (t, m, v) in enumerate(zip(texts, metadatas, vectors)):
-        # float32를 float로 변환하여 JSON 직렬화 문제 해결
-        v_float = [float(x) for x in v]
-        row: Dict[str, Any] = {"content": t, "metadata": m, "embedding": v_float}  # text -> content로 변경
-        if ids and i < len(ids):
-            row["id"] = ids[i]
-        rows.append(row)
-    sb.table(_TABLE).upsert(rows).execute()
-
-
-def query(text: str, top_k: int = 4) -> List[Dict[str, Any]]:
-    sb = get_supabase_client()
-    
+    writer = open_writer()
+    for i, (t, m) in enumerate(zip(texts, metadatas)):
+        writer.add(t, m, ids[i] if ids and i < len(ids) else None)
+    stats = writer.close()
+    flush_indexes()
+    if not ids:
+        # 새 문서가 어떤 질문의 답을 바꿀지 모르므로 캐시 답변 전부 무효화
+        get_answer_cache().clear()
+    if writer.failed_ids:
+        raise UpsertError(f"{len(writer.failed_ids)} rows failed to upsert: {writer.errors[-1]}")
+    return stats
+
+
+def _on_written(rows: List[Dict[str, Any]]) -> None:
+    get_lexical_index().upsert(rows)
+    # 갱신된 문서를 참조하던 캐시 답변 무효화
+    get_answer_cache().invalidate_documents([row["id"] for row in rows])
+
+
+def update_metadata(rows: List[Dict[str, Any]]) -> None:
+    """이미 저장된 문서의 메타데이터만 갱신 ({"id", "metadata"}, 재임베딩 없이)
+
+    내용이 같은 청크도 파일 앞부분이 바뀌면 위치(chunk_index/start_char/end_char)가 달라지므로 재수집 시 호출한다.
+    """
+    if not rows:
+        return
+    get_vector_backend().update_metadata(rows)
+    get_lexical_index().update_metadata(rows)
+    get_answer_cache().invalidate_documents([row["id"] for row in rows])
+
+
+def delete_texts(ids: Iterable[str]) -> None:
+    ids = list(ids)
+    if not ids:
+        return
+    get_vector_backend().delete(ids)
+    get_lexical_index().delete(ids)
+    get_answer_cache().invalidate_documents(ids)
+
+
+def flush_indexes() -> None:
+    """지연된 벡터/어휘 색인 저장을 마무리 (수집 종료/서버 종료 시)"""
+    if _backend is not None:
+        _backend.flush()
+    get_lexical_index().flush()
+
+
+def embed_query(text: str) -> List[float]:
+    """쿼리 임베딩 (캐시 적중 시 모델을 거치지 않음)"""
+    cache = get_query_cache()
+    qv = cache.get(text)
+    if qv is None:
+        # 동시 요청과 묶어서 한 번에 인코딩
+        qv = get_query_batcher().embed(text)
+        cache.put(text, qv)
+    return qv
+
+
+async def embed_query_async(text: str) -> List[float]:
+    """embed_query의 비동기 버전 (인코딩은 배처 스레드에서 수행)"""
+    cache = get_query_cache()
+    qv = cache.get(text)
+    if qv is None:
+        qv = await asyncio.wrap_future(get_query_batcher().submit(text))
+        cache.put(text, qv)
+    return qv
+
+
+def query(text: str, top_k: int = 4, query_vector: Optional[List[float]] = None) -> List[Dict[str, Any]]:
+    backend = get_vector_backend()
+    lexical = _lexical_search(text)
+
     try:
-        # 먼저 RPC 함수 시도
-        embedder = get_default_embedder()
-        qv = embedder.embed([text])[0]
-        qv_float = [float(x) for x in qv]
-        
-        res = sb.rpc(_RPC_MATCH, {"query_embedding": qv_float, "match_count": top_k}).execute()
-        data = res.data or []
-        print("RPC function succeeded!")
-        return [
-            {
-                "id": d.get("id"),
-                "content": d.get("text", ""),  # text -> content로 매핑
-                "metadata": d.get("metadata"),
-                "distance": d.get("distance", 0.0),
-            }
-            for d in data
-        ]
+        # 먼저 벡터 검색 시도 (이미 계산된 쿼리 벡터가 있으면 재사용)
+        qv = query_vector if query_vector is not None else embed_query(text)
+        with span("vector_search"):
+            vector = backend.match(qv, _depth(top_k))
     except Exception as e:
-        print(f"RPC function failed: {e}")
-        print("Falling back to simple text search...")
-        
+        print(f"Vector search failed ({backend.name}): {e}")
+        if lexical:
+            # 벡터 검색이 안 되면 어휘 검색 결과만 사용
+            inc("kauni_fallback_total", reason="lexical_only")
+            return lexical[:top_k]
         try:
-            # RPC 함수가 없으면 간단한 텍스트 검색으로 대체
-            res = sb.table(_TABLE).select("*").limit(top_k).execute()
-            data = res.data or []
-            print("Table query succeeded!")
-            return [
-                {
-                    "id": d.get("id"),
-                    "content": d.get("text", ""),  # text -> content로 매핑
-                    "metadata": d.get("metadata"),
-                    "distance": d.get("distance", 0.0),
-                }
-                for d in data
-            ]
+            inc("kauni_fallback_total", reason="sample")
+            return backend.sample(top_k)
         except Exception as e2:
             print(f"Table query also failed: {e2}")
-            print("Returning dummy data for now...")
-            
-            # 모든 것이 실패하면 더미 데이터 반환
-            return [
-                {
-                    "id": "dummy_1",
-                    "content": "관광지 정보를 찾을 수 없습니다. 현재 데이터베이스가 설정되지 않았습니다.",
-                    "metadata": {"source": "dummy"},
-                    "distance": 0.0,
-                }
-            ]
+            return _dummy_results()
+    return _fuse(vector, lexical, top_k)
+
+
+async def query_async(
+    text: str, top_k: int = 4, query_vector: Optional[List[float]] = None
+) -> List[Dict[str, Any]]:
+    """query의 비동기 버전: 임베딩과 DB 호출 동안 이벤트 루프를 막지 않음
+
+    쿼리 벡터 없이 들어온 같은 검색이 동시에 몰리면 한 번만 실행하고 결과를 함께 받는다.
+    """
+    if query_vector is None:
+        key = (normalize_query(text), top_k)
+        return await get_singleflight("search").do(key, lambda: _query_async(text, top_k, None))
+    return await _query_async(text, top_k, query_vector)
+
+
+async def _query_async(
+    text: str, top_k: int, query_vector: Optional[List[float]]
+) -> List[Dict[str, Any]]:
+    backend = get_vector_backend()
+    lexical = await _lexical_search_async(text)
+
+    try:
+        qv = query_vector if query_vector is not None else await embed_query_async(text)
+        with span("vector_search"):
+            vector = await backend.match_async(qv, _depth(top_k))
+    except Exception as e:
+        print(f"Vector search failed ({backend.name}): {e}")
+        if lexical:
+            inc("kauni_fallback_total", reason="lexical_only")
+            return lexical[:top_k]
+        try:
+            inc("kauni_fallback_total", reason="sample")
+            return await backend.sample_async(top_k)
+        except Exception as e2:
+            print(f"Table query also failed: {e2}")
+            return _dummy_results()
+    return _fuse(vector, lexical, top_k)
+
+
+def _depth(top_k: int) -> int:
+    return max(top_k, _CANDIDATES) if _HYBRID else top_k
+
+
+def _lexical_search(text: str) -> List[Dict[str, Any]]:
+    if not _HYBRID:
+        return []
+    try:
+        with span("lexical_search"):
+            return get_lexical_index().search(text, _CANDIDATES)
+    except Exception as e:
+        print(f"Lexical search failed: {e}")
+        return []
+
+
+async def _lexical_search_async(text: str) -> List[Dict[str, Any]]:
+    # 점수 계산(numpy)과 본문 읽기(파일)는 이벤트 루프 밖에서, 단계 시간은 요청 쪽에서 기록
+    if not _HYBRID:
+        return []
+    try:
+        with span("lexical_search"):
+            return await run_blocking(get_lexical_index().search, text, _CANDIDATES)
+    except Exception as e:
+        print(f"Lexical search failed: {e}")
+        return []
+
+
+def _fuse(vector: List[Dict[str, Any]], lexical: List[Dict[str, Any]], top_k: int) -> List[Dict[str, Any]]:
+    if not lexical:
+        return vector[:top_k]
+    return reciprocal_rank_fusion([vector, lexical], top_k)
 
 
+def _dummy_results() -> List[Dict[str, Any]]:
+    # 모든 것이 실패하면 더미 데이터 반환
+    inc("kauni_fallback_total", reason="dummy")
+    return [
+        {
+            "id": "dummy_1",
+            "content": "관광지 정보를 찾을 수 없습니다. 현재 데이터베이스가 설정되지 않았습니다.",
+            "metadata": {"source": "dummy"},
+            "distance": 0.0,
+        }
+    ]
@@ -0,0 +1,140 @@
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from .backends import VectorBackend
+from .embeddings import LocalEmbeddings, get_default_embedder
+from .tokens import count_tokens
+
+_BATCH_SIZE = int(os.getenv("UPSERT_BATCH_SIZE", "64"))
+_MAX_INFLIGHT = int(os.getenv("UPSERT_MAX_INFLIGHT", "4"))
+_MAX_RETRIES = int(os.getenv("UPSERT_MAX_RETRIES", "3"))
+_RETRY_BASE_SEC = 0.5
+
+
+class UpsertError(RuntimeError):
+    """재시도 후에도 일부 배치 업서트에 실패함"""
+
+
+class BatchedUpsertWriter:
+    """documents 쓰기 파이프라인: 고정 크기 배치로 임베딩 -> 업서트
+
+    호출 스레드에서 다음 배치를 임베딩하는 동안 이전 배치들은 최대 max_inflight개까지 동시에 업서트된다.
+    메모리에는 최대 (max_inflight + 1) 배치만 올라가므로 전체 코퍼스 크기와 무관하다.
+    실패한 배치는 지수 백오프로 재시도하고, 그래도 실패하면 failed_ids에 남기고 계속 진행한다.
+    """
+
+    def __init__(
+        self,
+        backend: VectorBackend,
+        embedder: Optional[LocalEmbeddings] = None,
+        batch_size: int = _BATCH_SIZE,
+        max_inflight: int = _MAX_INFLIGHT,
+        max_retries: int = _MAX_RETRIES,
+        on_written: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ):
+        self.backend = backend
+        self.embedder = embedder
+        self.batch_size = max(1, batch_size)
+        self.max_retries = max_retries
+        self.on_written = on_written
+        self.on_progress = on_progress
+        self._slots = threading.BoundedSemaphore(max(1, max_inflight))
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_inflight), thread_name_prefix="upsert")
+        self._futures: List[Future] = []
+        self._lock = threading.Lock()
+        self._texts: List[str] = []
+        self._metas: List[Dict[str, Any]] = []
+        self._ids: List[Optional[str]] = []
+        self._started = time.perf_counter()
+        self.rows = 0
+        self.batches = 0
+        self.retries = 0
+        self.failed_ids: List[str] = []
+        self.errors: List[str] = []
+
+    def __enter__(self) -> "BatchedUpsertWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def add(self, text: str, metadata: Optional[Dict[str, Any]] = None, doc_id: Optional[str] = None) -> None:
+        self._texts.append(text)
+        self._metas.append(metadata or {})
+        self._ids.append(doc_id)
+        if len(self._texts) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """버퍼에 쌓인 행을 임베딩하고 업서트 요청 (in-flight 한도에 걸리면 대기)"""
+        if not self._texts:
+            return
+        texts, metas, ids = self._texts, self._metas, self._ids
+        self._texts, self._metas, self._ids = [], [], []
+        vectors = (self.embedder or get_default_embedder()).embed(texts)
+        # id가 없는 행도 여기서 id를 정해 두어 벡터 저장소와 어휘 색인이 같은 id를 쓰게 함
+        ids = [doc_id or str(uuid.uuid4()) for doc_id in ids]
+        # 토큰 수를 메타데이터에 저장해 두면 프롬프트 구성 시 다시 토큰화하지 않아도 됨
+        rows = [
+            {"id": doc_id, "content": t, "metadata": {**m, "token_count": count_tokens(t)}, "embedding": v}
+            for t, m, v, doc_id in zip(texts, metas, vectors, ids)
+        ]
+        self._slots.acquire()
+        fut = self._pool.submit(self._upsert, rows, ids)
+        fut.add_done_callback(lambda _: self._slots.release())
+        self._futures.append(fut)
+        self._futures = [f for f in self._futures if not f.done()]
+
+    def close(self) -> Dict[str, Any]:
+        """남은 행을 쓰고 모든 업서트가 끝날 때까지 기다린 뒤 통계 반환"""
+        try:
+            self.flush()
+            for fut in self._futures:
+                fut.result()
+            self.backend.flush()
+        finally:
+            self._pool.shutdown(wait=True)
+        stats = self.stats()
+        print(f"Upserted {stats['rows']} rows in {stats['elapsed_sec']}s ({stats['rows_per_sec']} rows/s)")
+        return stats
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            elapsed = time.perf_counter() - self._started
+            return {
+                "rows": self.rows,
+                "batches": self.batches,
+                "retries": self.retries,
+                "failed_rows": len(self.failed_ids),
+                "elapsed_sec": round(elapsed, 3),
+                "rows_per_sec": round(self.rows / elapsed, 1) if elapsed > 0 else 0.0,
+            }
+
+    def _upsert(self, rows: List[Dict[str, Any]], ids: List[str]) -> None:
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.backend.upsert(rows)
+                break
+            except Exception as e:
+                if attempt == self.max_retries:
+                    print(f"Upsert batch failed after {attempt + 1} attempts: {e}")
+                    with self._lock:
+                        self.failed_ids.extend(ids)
+                        self.errors.append(str(e))
+                    return
+                with self._lock:
+                    self.retries += 1
+                time.sleep(_RETRY_BASE_SEC * (2 ** attempt) * (0.5 + random.random()))
+        with self._lock:
+            self.rows += len(rows)
+            self.batches += 1
+        if self.on_written is not None:
+            self.on_written(rows)
+        if self.on_progress is not None:
+            self.on_progress(self.stats())
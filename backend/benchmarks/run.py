@@ -0,0 +1,340 @@
+"""오프라인 end-to-end 벤치마크
+
+로컬 대역(메모리 PostgREST, 지연을 조절하는 mock OpenAI, 결정적 임베딩)으로 앱을 실제 HTTP 서버로 띄우고
+수집(/api/ingest)과 /api/chat, /api/chat/stream, /api/search, /api/crowding을 지정한 동시성으로 호출해
+p50/p95/p99 지연, 처리량, 수집 docs/s를 JSON으로 남긴다. --compare로 이전 결과와 비교할 수 있다.
+시나리오는 같은 앱 프로세스에서 순서대로 돌기 때문에 앞 시나리오가 채운 캐시를 뒤 시나리오가 재사용한다
+(캐시 적중률은 --unique-queries로 조절, 비교할 때는 같은 옵션으로 실행).
+
+    cd backend
+    python benchmarks/run.py --out bench.json
+    python benchmarks/run.py --concurrency 32 --requests 500 --llm-latency-ms 800 --compare bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from standins import STANDIN_KEY, ServerThread, fake_postgrest_app, free_port, mock_openai_app  # noqa: E402
+
+SCENARIOS = ("chat", "chat_stream", "search", "crowding")
+
+_PLACES = ["엑스포과학공원", "한빛탑", "국립중앙과학관", "대전중앙시장", "유성온천", "계족산 황톳길", "대청호", "성심당", "장태산 자연휴양림", "으능정이 거리"]
+_TEMPLATES = ["{p} 추천해줘", "{p} 가는 방법 알려줘", "{p} 근처 맛집 어디야?", "{p} 운영 시간이 궁금해", "주말에 {p} 여행 코스 짜줘"]
+_FILLER = [
+    "대전은 과학과 문화가 어우러진 도시로 가족 단위 관광객이 많이 찾는다.",
+    "주말에는 방문객이 몰리므로 오전 일찍 방문하는 것이 좋다.",
+    "대중교통으로는 지하철 1호선과 시내버스를 이용할 수 있다.",
+    "근처에는 지역 특산물을 파는 상점과 칼국수 맛집이 모여 있다.",
+    "야간에는 조명이 켜져 산책하기 좋은 코스로 알려져 있다.",
+]
+
+
+def _queries(n: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    return [rng.choice(_TEMPLATES).format(p=rng.choice(_PLACES)) + ("" if i < 10 else f" ({i})") for i in range(n)]
+
+
+def _write_corpus(directory: str, docs: int, seed: int) -> None:
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    for i in range(docs):
+        place = _PLACES[i % len(_PLACES)]
+        body = " ".join(rng.choice(_FILLER) for _ in range(8))
+        with open(os.path.join(directory, f"doc_{i:05d}.txt"), "w", encoding="utf-8") as f:
+            f.write(f"{place} 안내 {i}\n{place}은(는) 대전의 대표 관광지다. {body}\n")
+
+
+def _percentiles(latencies_ms: List[float]) -> Dict[str, float]:
+    if not latencies_ms:
+        return {}
+    a = np.asarray(latencies_ms)
+    return {
+        "p50": round(float(np.percentile(a, 50)), 2),
+        "p95": round(float(np.percentile(a, 95)), 2),
+        "p99": round(float(np.percentile(a, 99)), 2),
+        "mean": round(float(a.mean()), 2),
+        "max": round(float(a.max()), 2),
+    }
+
+
+class AppProcess:
+    """벤치마크 대상 앱을 하위 프로세스로 실행 (로그는 작업 디렉터리에 저장)"""
+
+    def __init__(self, env: Dict[str, str], workdir: str):
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.log_path = os.path.join(workdir, "app.log")
+        self._log = open(self.log_path, "w", encoding="utf-8")
+        self._proc = subprocess.Popen(
+            [sys.executable, os.path.join(BENCH_DIR, "serve_app.py"), "--port", str(self.port)],
+            cwd=workdir,
+            env={**os.environ, **env},
+            stdout=self._log,
+            stderr=subprocess.STDOUT,
+        )
+
+    def wait_ready(self, timeout: float = 120.0) -> float:
+        """/api/health가 ok가 될 때까지 대기 -> 걸린 초"""
+        start = time.monotonic()
+        while time.monotonic() - start < timeout:
+            if self._proc.poll() is not None:
+                raise RuntimeError(f"app exited with {self._proc.returncode}; see {self.log_path}")
+            try:
+                r = httpx.get(f"{self.url}/api/health", timeout=2.0)
+                if r.status_code == 200 and r.json().get("status") == "ok":
+                    return time.monotonic() - start
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.1)
+        raise RuntimeError(f"app did not become ready in {timeout}s; see {self.log_path}")
+
+    def stop(self) -> None:
+        self._proc.terminate()
+        try:
+            self._proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self._proc.kill()
+        self._log.close()
+
+
+async def _run_load(
+    name: str, call: Callable[[httpx.AsyncClient, int], Awaitable[Optional[float]]],
+    base_url: str, requests: int, concurrency: int, warmup: int,
+) -> Dict[str, Any]:
+    """call(client, i)를 requests번, concurrency개 동시에 실행 (call은 TTFT(ms)를 돌려줄 수 있음)"""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120.0, limits=limits) as client:
+        for i in range(warmup):
+            try:
+                await call(client, -1 - i)
+            except Exception:
+                pass
+        latencies: List[float] = []
+        ttfts: List[float] = []
+        errors: Dict[str, int] = {}
+        counter = iter(range(requests))
+
+        async def worker() -> None:
+            for i in counter:
+                t = time.perf_counter()
+                try:
+                    ttft = await call(client, i)
+                except Exception as e:
+                    key = type(e).__name__ + (f" {e}" if isinstance(e, AssertionError) else "")
+                    errors[key] = errors.get(key, 0) + 1
+                    continue
+                latencies.append((time.perf_counter() - t) * 1000.0)
+                if ttft is not None:
+                    ttfts.append(ttft)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - start
+    result = {
+        "requests": requests,
+        "concurrency": concurrency,
+        "ok": len(latencies),
+        "errors": errors,
+        "wall_sec": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 2) if wall > 0 else 0.0,
+        "latency_ms": _percentiles(latencies),
+    }
+    if ttfts:
+        result["ttft_ms"] = _percentiles(ttfts)
+    print(
+        f"{name:12s} ok {len(latencies):5d}  err {sum(errors.values()):4d}  {result['throughput_rps']:8.1f} req/s  "
+        f"p50 {result['latency_ms'].get('p50', 0):8.1f}  p95 {result['latency_ms'].get('p95', 0):8.1f}  "
+        f"p99 {result['latency_ms'].get('p99', 0):8.1f} ms"
+        + (f"  ttft p50 {result['ttft_ms']['p50']:.1f} ms" if ttfts else "")
+    )
+    return result
+
+
+def _scenario_calls(queries: List[str], locations: List[Optional[str]]) -> Dict[str, Callable[..., Awaitable[Optional[float]]]]:
+    def q(i: int) -> str:
+        return queries[i % len(queries)]
+
+    async def chat(client: httpx.AsyncClient, i: int) -> None:
+        r = await client.post("/api/chat", json={"query": q(i)})
+        r.raise_for_status()
+        assert r.json().get("answer"), "empty answer"
+
+    async def chat_stream(client: httpx.AsyncClient, i: int) -> Optional[float]:
+        t = time.perf_counter()
+        ttft = None
+        async with client.stream("POST", "/api/chat/stream", json={"query": q(i)}) as r:
+            r.raise_for_status()
+            async for line in r.aiter_lines():
+                if ttft is None and line == "event: token":
+                    ttft = (time.perf_counter() - t) * 1000.0
+        return ttft
+
+    async def search(client: httpx.AsyncClient, i: int) -> None:
+        r = await client.get("/api/search", params={"q": q(i), "k": 4})
+        r.raise_for_status()
+        assert r.json().get("results"), "no results"
+
+    async def crowding(client: httpx.AsyncClient, i: int) -> None:
+        loc = locations[i % len(locations)]
+        r = await client.get("/api/crowding", params={"location_id": loc} if loc else None)
+        r.raise_for_status()
+        assert "data" in r.json(), "no data"
+
+    return {"chat": chat, "chat_stream": chat_stream, "search": search, "crowding": crowding}
+
+
+def _ingest(base_url: str, path: str, docs: int, label: str = "ingest") -> Dict[str, Any]:
+    """POST /api/ingest 후 작업이 끝날 때까지 폴링"""
+    t = time.perf_counter()
+    r = httpx.post(f"{base_url}/api/ingest", json={"path": path}, timeout=30.0)
+    r.raise_for_status()
+    job_id = r.json()["job_id"]
+    while True:
+        job = httpx.get(f"{base_url}/api/ingest/jobs/{job_id}", timeout=30.0).json()
+        if job["status"] not in ("queued", "running"):
+            break
+        time.sleep(0.05)
+    wall = time.perf_counter() - t
+    result = {
+        "docs": docs,
+        "status": job["status"],
+        "rows_written": job["rows_written"],
+        "wall_sec": round(wall, 3),
+        "docs_per_sec": round(docs / wall, 2) if wall > 0 else 0.0,
+        "job_docs_per_sec": job["docs_per_sec"],
+        "result": job["result"],
+        "errors": job["errors"][:5],
+    }
+    print(
+        f"{label:16s} {docs:5d} docs  {result['status']:9s}  {result['docs_per_sec']:8.1f} docs/s  "
+        f"rows {result['rows_written']}  wall {result['wall_sec']:.2f}s"
+    )
+    return result
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def _compare(current: Dict[str, Any], baseline_path: str) -> None:
+    with open(baseline_path, encoding="utf-8") as f:
+        base = json.load(f)
+
+    def pct(new: float, old: float) -> str:
+        return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+    print(f"\ncompared with {baseline_path} ({base.get('meta', {}).get('git_commit')})")
+    for name, cur in current["scenarios"].items():
+        old = base.get("scenarios", {}).get(name)
+        if not old or not cur.get("latency_ms") or not old.get("latency_ms"):
+            continue
+        print(
+            f"{name:12s} p50 {pct(cur['latency_ms']['p50'], old['latency_ms']['p50']):>8s}  "
+            f"p95 {pct(cur['latency_ms']['p95'], old['latency_ms']['p95']):>8s}  "
+            f"rps {pct(cur['throughput_rps'], old['throughput_rps']):>8s}"
+        )
+    for name in ("ingest", "ingest_unchanged"):
+        if current.get(name) and base.get(name):
+            print(f"{name:16s} docs/s {pct(current[name]['docs_per_sec'], base[name]['docs_per_sec']):>8s}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="로컬 대역을 이용한 end-to-end 벤치마크")
+    parser.add_argument("--scenarios", nargs="*", default=list(SCENARIOS), choices=SCENARIOS)
+    parser.add_argument("--requests", type=int, default=200, help="시나리오당 요청 수")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=5, help="측정 전 시나리오당 예열 요청 수")
+    parser.add_argument("--unique-queries", type=int, default=50, help="서로 다른 질문 수 (작을수록 캐시 적중이 많음)")
+    parser.add_argument("--docs", type=int, default=500, help="수집할 합성 문서 수 (0이면 수집 생략)")
+    parser.add_argument("--backend", choices=("supabase", "local"), default="supabase", help="supabase는 메모리 PostgREST 대역 사용")
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0, help="mock OpenAI 첫 응답 지연")
+    parser.add_argument("--token-delay-ms", type=float, default=10.0, help="mock OpenAI 토큰 간 지연")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--env", nargs="*", default=[], metavar="KEY=VALUE", help="앱에 추가로 넘길 환경변수")
+    parser.add_argument("--out", help="결과 JSON 저장 경로")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON")
+    parser.add_argument("--keep", action="store_true", help="작업 디렉터리(색인/로그)를 지우지 않음")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="kauni-bench-")
+    postgrest = ServerThread(fake_postgrest_app()).start()
+    openai = ServerThread(mock_openai_app(args.llm_latency_ms, args.token_delay_ms)).start()
+    env = {
+        "APP_MODE": "full",
+        "VECTOR_BACKEND": args.backend,
+        "SUPABASE_URL": postgrest.url,
+        "SUPABASE_SERVICE_KEY": STANDIN_KEY,
+        "OPENAI_API_KEY": "sk-bench",
+        "OPENAI_BASE_URL": f"{openai.url}/v1",
+        "LOCAL_INDEX_DIR": os.path.join(workdir, "vector_index"),
+        "LEXICAL_INDEX_PATH": os.path.join(workdir, "lexical_index", "docs.jsonl"),
+        "INGEST_MANIFEST_DIR": os.path.join(workdir, "manifest"),
+        "CROWDING_SIMULATOR": "1",  # 혼잡도/예측 시나리오용 가상 샘플
+        "PYTHONUNBUFFERED": "1",
+    }
+    env.update(kv.split("=", 1) for kv in args.env)
+    app = AppProcess(env, workdir)
+    results: Dict[str, Any] = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args),
+        },
+        "scenarios": {},
+    }
+    try:
+        results["startup_sec"] = round(app.wait_ready(), 3)
+        print(f"app ready in {results['startup_sec']:.2f}s ({args.backend} backend, log {app.log_path})")
+        if args.docs > 0:
+            corpus = os.path.join(workdir, "corpus")
+            _write_corpus(corpus, args.docs, args.seed)
+            results["ingest"] = _ingest(app.url, corpus, args.docs)
+            # 바뀐 파일이 없을 때의 재수집 (manifest로 건너뛰는 속도)
+            results["ingest_unchanged"] = _ingest(app.url, corpus, args.docs, "ingest_unchanged")
+        calls = _scenario_calls(_queries(max(1, args.unique_queries), args.seed), [None, "science-museum", "central-market", "expo-park"])
+        for name in args.scenarios:
+            results["scenarios"][name] = asyncio.run(
+                _run_load(name, calls[name], app.url, args.requests, args.concurrency, args.warmup)
+            )
+        results["app_health"] = httpx.get(f"{app.url}/api/health", timeout=10.0).json()
+    finally:
+        app.stop()
+        openai.stop()
+        postgrest.stop()
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"saved {args.out}")
+    if args.compare:
+        _compare(results, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,29 @@
+"""벤치마크용 앱 실행기: 결정적 임베딩(HashEmbedder)을 넣은 뒤 uvicorn으로 app.main을 띄움
+
+run.py가 하위 프로세스로 실행하며, 대역 서버 주소 등은 환경변수로 받는다.
+"""
+import argparse
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, required=True)
+    parser.add_argument("--dim", type=int, default=384)
+    args = parser.parse_args()
+
+    import uvicorn
+    from standins import HashEmbedder
+    from app.services.rag.embeddings import set_default_embedder
+
+    set_default_embedder(HashEmbedder(args.dim))
+    uvicorn.run("app.main:app", host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""벤치마크용 로컬 대역 (네트워크/모델 없이 앱 전체 경로를 돌리기 위함)
+
+- HashEmbedder: 글자 bigram 해싱으로 만드는 결정적 임베딩 (sentence-transformers 대신)
+- fake_postgrest_app: 테이블 CRUD(id 기본 키)와 match_documents RPC를 흉내 내는 메모리 PostgREST
+- mock_openai_app: 지연 시간을 조절할 수 있는 OpenAI 호환 chat.completions 서버
+- fake_kto_app: 페이지 단위로 응답하는 data.go.kr KTO 목록 API
+- ServerThread: 위 ASGI 앱을 백그라운드 스레드의 uvicorn으로 띄움
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import socket
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# supabase 클라이언트가 JWT 모양인지 검사하므로 점 세 마디 형태로 둠
+STANDIN_KEY = "bench.standin.key"
+_MAX_URL_LENGTH = 8192  # nginx/Kong 기본 요청 줄 한도 수준
+
+
+class HashEmbedder:
+    """텍스트 -> 정규화된 dim차원 벡터 (같은 입력이면 항상 같은 출력, 비슷한 글자 구성이면 가까움)"""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+        self.model_name = f"hash-bigram-{dim}"
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            s = re.sub(r"\s+", " ", text.lower())
+            for j in range(max(1, len(s) - 1)):
+                h = int.from_bytes(hashlib.blake2b(s[j:j + 2].encode("utf-8"), digest_size=4).digest(), "little")
+                out[i, h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        out /= np.maximum(norms, 1e-9)
+        return [list(v) for v in out]
+
+    def warmup(self) -> None:
+        self.embed(["warmup"])
+
+
+def _parse_vector(value: Any) -> np.ndarray:
+    if isinstance(value, str):
+        value = json.loads(value)
+    return np.asarray(value, dtype=np.float32)
+
+
+def fake_postgrest_app() -> FastAPI:
+    """/rest/v1/{table} 조회/삽입/업서트/부분 수정/삭제/개수 + /rest/v1/rpc/match_documents
+
+    모든 테이블은 id가 기본 키인 것처럼 동작한다: Prefer resolution이 없는 POST가 이미 있는 id를 쓰면
+    실제 PostgREST처럼 409를 돌려주고, merge-duplicates는 덮어쓰며, ignore-duplicates는 건너뛴다.
+    PATCH/DELETE는 id=eq.x 또는 id=in.(...) 필터만 지원하고, 앞단 프록시처럼 너무 긴 URL은 414로 거절한다.
+    """
+    app = FastAPI()
+    tables: Dict[str, Dict[str, Dict[str, Any]]] = {"documents": {}}
+    docs = tables["documents"]
+    index: Dict[str, Any] = {"ids": [], "matrix": None}  # 검색용 행렬은 쓰기 후 처음 검색할 때 다시 만듦
+    app.state.tables = tables
+    app.state.fail_next = []  # 장애 주입: 다음 요청들을 이 상태 코드로 실패시킴 (앞에서부터 하나씩 소비)
+    app.state.requests = []  # (method, table) 요청 기록
+
+    def unauthorized(request: Request) -> Optional[Response]:
+        app.state.requests.append((request.method, request.path_params.get("table", "rpc")))
+        if len(str(request.url)) > _MAX_URL_LENGTH:
+            return JSONResponse({"message": "URI too long"}, status_code=414)
+        if request.headers.get("apikey") != STANDIN_KEY:
+            return JSONResponse({"message": "Invalid API key"}, status_code=401)
+        if app.state.fail_next:
+            return JSONResponse({"message": "injected failure"}, status_code=app.state.fail_next.pop(0))
+        return None
+
+    def matrix() -> np.ndarray:
+        if index["matrix"] is None:
+            index["ids"] = list(docs)
+            vectors = [docs[i]["_vector"] for i in index["ids"]]
+            index["matrix"] = np.vstack(vectors) if vectors else np.zeros((0, 1), dtype=np.float32)
+        return index["matrix"]
+
+    @app.post("/rest/v1/rpc/match_documents")
+    async def match(request: Request):
+        if (err := unauthorized(request)) is not None:
+            return err
+        body = await request.json()
+        m = matrix()
+        if not len(m):
+            return []
+        sims = m @ _parse_vector(body["query_embedding"])
+        k = min(int(body.get("match_count", 4)), len(sims))
+        top = np.argpartition(-sims, k - 1)[:k]
+        top = top[np.argsort(-sims[top])]
+        return [
+            {
+                "id": index["ids"][i],
+                "text": docs[index["ids"][i]]["content"],
+                "metadata": docs[index["ids"][i]].get("metadata"),
+                "distance": float(1.0 - sims[i]),
+            }
+            for i in top
+        ]
+
+    @app.api_route("/rest/v1/{table}", methods=["GET", "HEAD", "POST", "PATCH", "DELETE"])
+    async def table(table: str, request: Request):
+        if (err := unauthorized(request)) is not None:
+            return err
+        rows_by_id = tables.setdefault(table, {})
+        prefer = request.headers.get("prefer", "")
+        params = request.query_params
+        if request.method == "PATCH":
+            values = await request.json()
+            for row_id in _id_filter(params.get("id", "")):
+                if row_id in rows_by_id:
+                    rows_by_id[row_id].update(values)
+            return Response(status_code=204)
+        if request.method == "POST":
+            rows = await request.json()
+            rows = rows if isinstance(rows, list) else [rows]
+            parsed = []
+            for row in rows:
+                row = dict(row)
+                if "embedding" in row:
+                    row["_vector"] = _parse_vector(row.pop("embedding"))
+                row_id = str(row.get("id") or os.urandom(16).hex())
+                row["id"] = row.get("id") or row_id
+                parsed.append((row_id, row))
+            if "resolution=" not in prefer:
+                # 요청 단위 트랜잭션: 하나라도 중복이면 아무것도 쓰지 않음
+                duplicate = next((i for i, _ in parsed if i in rows_by_id), None)
+                if duplicate is not None:
+                    return JSONResponse(
+                        {"code": "23505", "message": f'duplicate key value violates unique constraint "{table}_pkey"'},
+                        status_code=409,
+                    )
+            ignore = "resolution=ignore-duplicates" in prefer
+            for row_id, row in parsed:
+                if not (ignore and row_id in rows_by_id):
+                    rows_by_id[row_id] = row
+            if table == "documents":
+                index["matrix"] = None
+            if "return=minimal" in prefer:
+                return Response(status_code=201)
+            return JSONResponse([_public(r) for _, r in parsed], status_code=201)
+        if request.method == "DELETE":
+            for doc_id in _id_filter(params.get("id", "")):
+                rows_by_id.pop(doc_id, None)
+            if table == "documents":
+                index["matrix"] = None
+            return Response(status_code=204)
+        headers = {}
+        if "count=exact" in prefer:
+            headers["content-range"] = f"0-0/{len(rows_by_id)}" if rows_by_id else "*/0"
+        if request.method == "HEAD":
+            return Response(status_code=200, headers=headers)
+        offset = int(params.get("offset", 0))
+        limit = int(params.get("limit", 1000))
+        rows = [_public(r) for r in list(rows_by_id.values())[offset:offset + limit]]
+        columns = params.get("select", "*")
+        if columns != "*":
+            keep = columns.split(",")
+            rows = [{k: r.get(k) for k in keep} for r in rows]
+        return JSONResponse(rows, headers=headers)
+
+    return app
+
+
+def _id_filter(value: str) -> List[str]:
+    """PostgREST id 필터 "eq.x" / "in.(a,b)" / 'in.("a","b")' -> id 목록"""
+    if value.startswith("eq."):
+        return [value[3:]]
+    m = re.match(r"^in\.\((.*)\)$", value)
+    if not m or not m.group(1):
+        return []
+    if m.group(1).startswith('"'):
+        return [str(v) for v in json.loads("[" + m.group(1) + "]")]
+    return m.group(1).split(",")
+
+
+def _public(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in row.items() if k != "_vector"}
+
+
+_ANSWER = (
+    "안녕하세요, 까우니예요! 대전에서는 엑스포과학공원과 한빛탑, 국립중앙과학관을 함께 둘러보시면 좋아요. "
+    "점심은 중앙시장에서 칼국수를 드셔 보시고, 저녁에는 유성온천에서 족욕으로 마무리해 보세요."
+)
+
+
+def mock_openai_app(latency_ms: float = 300.0, token_delay_ms: float = 10.0) -> FastAPI:
+    """latency_ms 후 첫 응답, 스트리밍이면 이후 토큰마다 token_delay_ms
+
+    app.state.fail_next에 (상태 코드, Retry-After 또는 None)을 넣으면 다음 요청들이 그 오류로 실패하고,
+    app.state.cut_next에 토큰 수를 넣으면 다음 스트리밍 응답이 그만큼 보낸 뒤 [DONE] 없이 연결을 끊는다.
+    """
+    app = FastAPI()
+    tokens = re.findall(r"\S+\s*", _ANSWER)
+    state = {"calls": 0}
+    app.state.fail_next = []
+    app.state.cut_next = []
+
+    @app.post("/v1/chat/completions")
+    async def completions(request: Request):
+        body = await request.json()
+        state["calls"] += 1
+        if app.state.fail_next:
+            status, retry_after = app.state.fail_next.pop(0)
+            headers = {"retry-after": str(retry_after)} if retry_after is not None else None
+            error = {"error": {"message": "injected failure", "type": "server_error", "code": None}}
+            return JSONResponse(error, status_code=status, headers=headers)
+        await asyncio.sleep(latency_ms / 1000.0)
+        created = int(time.time())
+        if body.get("stream"):
+            cut_after = app.state.cut_next.pop(0) if app.state.cut_next else None
+
+            async def events():
+                for i, tok in enumerate(tokens):
+                    if i == cut_after:
+                        raise ConnectionResetError("injected disconnect")
+                    chunk = {
+                        "id": "bench", "object": "chat.completion.chunk", "created": created, "model": body.get("model"),
+                        "choices": [{"index": 0, "delta": {"content": tok}, "finish_reason": None}],
+                    }
+                    yield "data: " + json.dumps(chunk, ensure_ascii=False) + "\n\n"
+                    await asyncio.sleep(token_delay_ms / 1000.0)
+                yield "data: [DONE]\n\n"
+            return StreamingResponse(events(), media_type="text/event-stream")
+        await asyncio.sleep(token_delay_ms * len(tokens) / 1000.0)
+        return {
+            "id": "bench", "object": "chat.completion", "created": created, "model": body.get("model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": _ANSWER}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": len(tokens), "total_tokens": len(tokens)},
+        }
+
+    @app.get("/stats")
+    async def stats():
+        return state
+
+    app.state.stats = state
+    return app
+
+
+def fake_kto_app(total_per_endpoint: int = 250, latency_ms: float = 20.0, shared_items: int = 0) -> FastAPI:
+    """data.go.kr KTO 목록 API(/{service}/areaBasedList1) 흉내: pageNo/numOfRows로 페이지를 나눠 totalCount와 함께 응답
+
+    앞쪽 shared_items개 항목은 실제 API처럼 모든 서비스에 같은 contentid로 나온다.
+
+    app.state.max_active에 지금까지 동시에 처리 중이던 요청 수의 최댓값을 기록하고,
+    app.state.fail_next에 상태 코드를 넣으면 다음 요청들이 그 코드로 실패한다.
+    """
+    app = FastAPI()
+    app.state.active = 0
+    app.state.max_active = 0
+    app.state.requests = 0
+    app.state.fail_next = []
+
+    @app.get("/{service}/areaBasedList1")
+    async def area_based_list(service: str, request: Request):
+        params = request.query_params
+        if not params.get("serviceKey"):
+            return JSONResponse({"response": {"header": {"resultCode": "30", "resultMsg": "SERVICE KEY IS NOT REGISTERED"}}})
+        app.state.requests += 1
+        app.state.active += 1
+        app.state.max_active = max(app.state.max_active, app.state.active)
+        try:
+            await asyncio.sleep(latency_ms / 1000.0)
+            if app.state.fail_next:
+                return Response(status_code=app.state.fail_next.pop(0))
+        finally:
+            app.state.active -= 1
+        page, rows = int(params.get("pageNo", 1)), int(params.get("numOfRows", 10))
+        start = (page - 1) * rows
+        items = [
+            {"contentid": str(i), "title": f"공통 관광지 {i}", "addr1": "대전광역시"} if i < shared_items else
+            {"contentid": f"{service}-{i}", "title": f"{service} 관광지 {i}", "addr1": "대전광역시"}
+            for i in range(start, min(start + rows, total_per_endpoint))
+        ]
+        return {
+            "response": {
+                "header": {"resultCode": "0000", "resultMsg": "OK"},
+                "body": {"items": {"item": items} if items else "", "numOfRows": rows, "pageNo": page,
+                         "totalCount": total_per_endpoint},
+            }
+        }
+
+    return app
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class ServerThread:
+    """ASGI 앱을 백그라운드 스레드의 uvicorn으로 실행"""
+
+    def __init__(self, app: Any, port: Optional[int] = None):
+        import uvicorn
+
+        self.app = app
+        self.port = port or free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        config = uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning", lifespan="off")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, name=f"standin-{self.port}", daemon=True)
+
+    def start(self, timeout: float = 10.0) -> "ServerThread":
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError(f"stand-in server on port {self.port} did not start")
+            time.sleep(0.02)
+        return self
+
+    def stop(self) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=5.0)
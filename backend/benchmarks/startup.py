@@ -0,0 +1,148 @@
+"""모듈별 import 시간과 메모리(RSS) 측정
+
+각 대상 모듈을 새 파이썬 프로세스에서 import해서 (이미 로드된 모듈의 영향 없이) 걸린 시간과
+import 전후 RSS를 기록하고, -X importtime 출력에서 누적 시간이 큰 하위 모듈을 함께 보여준다.
+
+    cd backend
+    python benchmarks/startup.py                       # 기본 대상 전체
+    python benchmarks/startup.py --out startup.json    # JSON으로 저장
+    python benchmarks/startup.py --budget-ms 1500 --budget-rss-mb 200   # lite 모드 app.main 예산 검사
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (이름, import할 모듈, 추가 환경변수)
+TARGETS = [
+    ("app.main (full)", "app.main", {"APP_MODE": "full"}),
+    ("app.main (lite)", "app.main", {"APP_MODE": "lite"}),
+    ("app.routes.crowding", "app.routes.crowding", {}),
+    ("app.routes.persona", "app.routes.persona", {}),
+    ("app.services.rag.pipeline", "app.services.rag.pipeline", {}),
+    ("app.services.rag.vectorstore", "app.services.rag.vectorstore", {}),
+    ("app.core.supabase_dal", "app.core.supabase_dal", {}),
+    ("numpy", "numpy", {}),
+    ("httpx", "httpx", {}),
+    ("requests", "requests", {}),
+    ("supabase", "supabase", {}),
+    ("sentence_transformers", "sentence_transformers", {}),
+]
+
+# 하위 프로세스에서 실행할 측정 코드 (마지막 줄에 JSON 한 줄 출력)
+_PROBE = """
+import json, sys, time
+def rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    import resource
+    r = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return r / (1024.0 * 1024.0) if sys.platform == "darwin" else r / 1024.0
+before = rss_mb()
+t = time.perf_counter()
+error = None
+try:
+    import {module}
+except Exception as e:
+    error = f"{{type(e).__name__}}: {{e}}"
+elapsed = time.perf_counter() - t
+heavy = [m for m in ("torch", "sentence_transformers", "supabase", "requests", "httpx", "numpy", "tiktoken", "openai") if m in sys.modules]
+print(json.dumps({{"import_ms": elapsed * 1000, "rss_before_mb": before, "rss_after_mb": rss_mb(), "heavy_modules": heavy, "error": error}}))
+"""
+
+
+def _top_imports(stderr: str, top: int) -> List[Dict[str, Any]]:
+    """-X importtime 출력 -> 누적 시간이 큰 모듈 top개"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        rows.append({"module": parts[2].strip(), "cumulative_ms": int(parts[1]) / 1000.0})
+    rows.sort(key=lambda r: r["cumulative_ms"], reverse=True)
+    return rows[:top]
+
+
+def measure(module: str, env: Dict[str, str], repeat: int, top: int) -> Dict[str, Any]:
+    runs = []
+    top_imports: List[Dict[str, Any]] = []
+    for i in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _PROBE.format(module=module)],
+            cwd=BACKEND_DIR,
+            env={**os.environ, **env},
+            capture_output=True,
+            text=True,
+        )
+        lines = proc.stdout.strip().splitlines()
+        if proc.returncode != 0 or not lines:
+            return {"error": (proc.stderr.strip().splitlines() or ["failed"])[-1]}
+        runs.append(json.loads(lines[-1]))
+        if i == 0:
+            top_imports = _top_imports(proc.stderr, top)
+    best = min(runs, key=lambda r: r["import_ms"])  # 디스크 캐시 등 잡음이 가장 적은 실행
+    return {
+        "import_ms": round(best["import_ms"], 1),
+        "import_ms_runs": [round(r["import_ms"], 1) for r in runs],
+        "rss_mb": round(best["rss_after_mb"], 1),
+        "rss_delta_mb": round(best["rss_after_mb"] - best["rss_before_mb"], 1),
+        "heavy_modules": best["heavy_modules"],
+        "error": best["error"],
+        "top_imports": top_imports,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="모듈별 import 시간/RSS 측정")
+    parser.add_argument("--repeat", type=int, default=3, help="대상마다 새 프로세스로 반복할 횟수 (최솟값 기록)")
+    parser.add_argument("--top", type=int, default=8, help="대상마다 보여줄 느린 하위 import 수")
+    parser.add_argument("--only", nargs="*", help="이름에 이 문자열이 들어간 대상만 측정")
+    parser.add_argument("--out", help="결과 JSON 저장 경로")
+    parser.add_argument("--budget-ms", type=float, help="lite 모드 app.main import 시간 상한 (넘으면 종료 코드 1)")
+    parser.add_argument("--budget-rss-mb", type=float, help="lite 모드 app.main RSS 상한 (넘으면 종료 코드 1)")
+    args = parser.parse_args(argv)
+
+    results: Dict[str, Any] = {}
+    for name, module, env in TARGETS:
+        if args.only and not any(o in name for o in args.only):
+            continue
+        r = results[name] = measure(module, env, max(1, args.repeat), args.top)
+        if r.get("error") and "import_ms" not in r:
+            print(f"{name:32s} failed: {r['error']}")
+            continue
+        note = f"  ({r['error']})" if r["error"] else ""
+        print(f"{name:32s} {r['import_ms']:8.1f} ms  rss {r['rss_mb']:7.1f} MB (+{r['rss_delta_mb']:.1f}){note}")
+        if r["heavy_modules"]:
+            print(f"{'':32s} loaded: {', '.join(r['heavy_modules'])}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"saved {args.out}")
+
+    lite = results.get("app.main (lite)")
+    if lite and "import_ms" in lite:
+        over = []
+        if args.budget_ms is not None and lite["import_ms"] > args.budget_ms:
+            over.append(f"import {lite['import_ms']} ms > {args.budget_ms} ms")
+        if args.budget_rss_mb is not None and lite["rss_mb"] > args.budget_rss_mb:
+            over.append(f"rss {lite['rss_mb']} MB > {args.budget_rss_mb} MB")
+        if over:
+            print("startup budget exceeded: " + ", ".join(over))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
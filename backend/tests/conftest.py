@@ -0,0 +1,80 @@
+"""공용 픽스처: benchmarks/standins.py의 로컬 대역 서버를 테스트 세션 동안 한 번씩 띄움
+
+    cd backend
+    python -m pytest -q
+"""
+import asyncio
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "benchmarks"))
+
+from standins import STANDIN_KEY, HashEmbedder, ServerThread, fake_kto_app, fake_postgrest_app, mock_openai_app  # noqa: E402
+
+from app.core.supabase_dal import shutdown_supabase_dal  # noqa: E402
+from app.services.rag import answer_cache, embeddings, lexical, vectorstore  # noqa: E402
+from app.services.rag.answer_cache import SemanticAnswerCache  # noqa: E402
+from app.services.rag.backends.local import LocalVectorBackend  # noqa: E402
+from app.services.rag.lexical import NgramIndex  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def postgrest():
+    server = ServerThread(fake_postgrest_app()).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def supabase_env(postgrest, monkeypatch):
+    """get_supabase_dal()이 메모리 PostgREST를 가리키게 함 (DAL은 테스트의 이벤트 루프 안에서 만들고 닫을 것)
+
+    동기 경로(run_supabase_dal)가 만든 전용 루프의 DAL은 테스트가 끝나면 닫는다.
+    """
+    monkeypatch.setenv("SUPABASE_URL", postgrest.url)
+    monkeypatch.setenv("SUPABASE_SERVICE_KEY", STANDIN_KEY)
+    yield postgrest
+    asyncio.run(shutdown_supabase_dal())
+
+
+@pytest.fixture(scope="session")
+def mock_openai():
+    server = ServerThread(mock_openai_app(latency_ms=0.0, token_delay_ms=0.0)).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def openai_env(mock_openai, monkeypatch):
+    """LLMClient가 mock OpenAI 서버로 보내게 함 (주입한 장애는 테스트가 끝나면 비움)"""
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("OPENAI_BASE_URL", mock_openai.url + "/v1")
+    mock_openai.app.state.fail_next.clear()
+    mock_openai.app.state.cut_next.clear()
+    yield mock_openai
+    mock_openai.app.state.fail_next.clear()
+    mock_openai.app.state.cut_next.clear()
+
+
+@pytest.fixture
+def kto(monkeypatch):
+    """테스트마다 새 KTO 가짜 서버 (요청 수/동시성 기록이 테스트 사이에 섞이지 않게)"""
+    monkeypatch.setenv("KTO_SERVICE_KEY", "test-service-key")
+    server = ServerThread(fake_kto_app(total_per_endpoint=250, latency_ms=20.0)).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def local_store(tmp_path, monkeypatch):
+    """임베딩 모델/Supabase 없이 로컬 인덱스로 수집 (매니페스트와 색인 파일은 tmp_path 아래)"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(embeddings, "_embedder", HashEmbedder())
+    monkeypatch.setattr(vectorstore, "_backend", LocalVectorBackend(index_dir=str(tmp_path / "idx")))
+    monkeypatch.setattr(lexical, "_index", NgramIndex(path=None))
+    monkeypatch.setattr(answer_cache, "_cache", SemanticAnswerCache())
+    return vectorstore.get_vector_backend()
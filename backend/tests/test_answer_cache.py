@@ -0,0 +1,93 @@
+import time
+
+import numpy as np
+
+from app.services.rag import answer_cache, vectorstore
+from app.services.rag.answer_cache import SemanticAnswerCache
+from app.services.rag.lexical import NgramIndex
+
+
+def _unit(*values):
+    v = np.asarray(values, dtype=np.float32)
+    return (v / np.linalg.norm(v)).tolist()
+
+
+def _result(answer, *doc_ids):
+    return {
+        "answer": answer,
+        "contexts": [{"id": d, "content": f"{d} 본문", "metadata": {}} for d in doc_ids],
+        "source": "rag",
+        "confidence": "high",
+    }
+
+
+def test_similar_query_hits_and_dissimilar_query_misses():
+    cache = SemanticAnswerCache(capacity=4, threshold=0.9, ttl_sec=0)
+    cache.store(_unit(1, 0, 0), _result("엑스포공원 안내", "doc-a"))
+    assert cache.lookup(_unit(1, 0.1, 0))["answer"] == "엑스포공원 안내"  # cos ~0.995
+    assert cache.lookup(_unit(1, 1, 0)) is None  # cos ~0.707
+    hit = cache.lookup(_unit(1, 0, 0))
+    hit["answer"] = "변경"  # 반환값을 고쳐도 캐시 내용은 그대로
+    assert cache.lookup(_unit(1, 0, 0))["answer"] == "엑스포공원 안내"
+
+
+def test_invalidate_drops_only_entries_that_used_the_document():
+    cache = SemanticAnswerCache(capacity=4, threshold=0.9, ttl_sec=0)
+    cache.store(_unit(1, 0, 0), _result("a와 b", "doc-a", "doc-b"))
+    cache.store(_unit(0, 1, 0), _result("b와 c", "doc-b", "doc-c"))
+    cache.store(_unit(0, 0, 1), _result("c만", "doc-c"))
+    assert cache.invalidate_documents(["doc-a"]) == 1
+    assert cache.lookup(_unit(1, 0, 0)) is None
+    assert cache.lookup(_unit(0, 1, 0)) is not None
+    assert cache.invalidate_documents(["doc-c", "doc-c", "missing"]) == 2
+    assert cache.lookup(_unit(0, 1, 0)) is None and cache.lookup(_unit(0, 0, 1)) is None
+    assert cache.stats()["entries"] == 0 and cache.stats()["invalidations"] == 3
+    # 비운 슬롯은 다시 쓰이고, 예전 문서 id가 새 항목을 지우지 않아야 함
+    cache.store(_unit(1, 0, 0), _result("새 답변", "doc-d"))
+    assert cache.invalidate_documents(["doc-a", "doc-b"]) == 0
+    assert cache.lookup(_unit(1, 0, 0))["answer"] == "새 답변"
+
+
+def test_least_recently_used_entry_is_replaced_and_ttl_expires():
+    cache = SemanticAnswerCache(capacity=2, threshold=0.9, ttl_sec=0)
+    cache.store(_unit(1, 0, 0), _result("a", "doc-a"))
+    cache.store(_unit(0, 1, 0), _result("b", "doc-b"))
+    cache.lookup(_unit(1, 0, 0))
+    cache.store(_unit(0, 0, 1), _result("c", "doc-c"))
+    assert cache.lookup(_unit(0, 1, 0)) is None
+    assert cache.lookup(_unit(1, 0, 0))["answer"] == "a"
+    assert cache.invalidate_documents(["doc-b"]) == 0  # 밀려난 항목의 문서 색인도 정리됨
+
+    short = SemanticAnswerCache(capacity=2, threshold=0.9, ttl_sec=0.05)
+    short.store(_unit(1, 0, 0), _result("a", "doc-a"))
+    time.sleep(0.08)
+    assert short.lookup(_unit(1, 0, 0)) is None
+
+
+class _MemoryBackend:
+    name = "memory"
+
+    def __init__(self):
+        self.deleted = []
+
+    def delete(self, ids):
+        self.deleted.extend(ids)
+
+
+def test_document_writes_invalidate_cached_answers(monkeypatch):
+    cache = SemanticAnswerCache(capacity=4, threshold=0.9, ttl_sec=0)
+    lexical = NgramIndex(path=None)
+    monkeypatch.setattr(answer_cache, "_cache", cache)
+    monkeypatch.setattr(vectorstore, "get_lexical_index", lambda: lexical)
+    monkeypatch.setattr(vectorstore, "_backend", _MemoryBackend())
+    cache.store(_unit(1, 0, 0), _result("수목원 안내", "doc-a"))
+    cache.store(_unit(0, 1, 0), _result("야구장 안내", "doc-b"))
+
+    # writer가 문서를 다시 쓰면 그 문서를 쓴 답변만 무효화
+    vectorstore._on_written([{"id": "doc-a", "content": "한밭수목원 개장 시간 변경", "metadata": {}}])
+    assert cache.lookup(_unit(1, 0, 0)) is None
+    assert cache.lookup(_unit(0, 1, 0)) is not None
+
+    vectorstore.delete_texts(["doc-b"])
+    assert cache.lookup(_unit(0, 1, 0)) is None
+    assert vectorstore.get_vector_backend().deleted == ["doc-b"]
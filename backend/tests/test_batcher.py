@@ -0,0 +1,96 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from standins import HashEmbedder
+
+from app.services.rag import embeddings
+from app.services.rag.batcher import EmbeddingBatcher
+
+
+class CountingEmbedder(HashEmbedder):
+    """embed 호출마다 배치 크기를 기록 (encode 비용 흉내로 조금 쉼)"""
+
+    def __init__(self, delay_sec: float = 0.01, fail: bool = False):
+        super().__init__(dim=16)
+        self.calls = []
+        self.delay_sec = delay_sec
+        self.fail = fail
+
+    def embed(self, texts):
+        self.calls.append(len(texts))
+        time.sleep(self.delay_sec)
+        if self.fail:
+            raise RuntimeError("encode failed")
+        return super().embed(texts)
+
+
+def test_concurrent_queries_share_batches_and_keep_order():
+    embedder = CountingEmbedder()
+    batcher = EmbeddingBatcher(embedder, max_batch_size=8, max_wait_ms=20)
+    texts = [f"대전 관광지 {i}" for i in range(32)]
+    try:
+        with ThreadPoolExecutor(32) as pool:
+            vectors = list(pool.map(batcher.embed, texts))
+    finally:
+        batcher.stop()
+    # 각 요청은 자기 텍스트의 벡터를 받아야 함
+    assert vectors == HashEmbedder(dim=16).embed(texts)
+    assert sum(embedder.calls) == 32
+    assert max(embedder.calls) <= 8
+    assert len(embedder.calls) < 32
+    stats = batcher.stats()
+    assert stats["items"] == 32 and stats["batches"] == len(embedder.calls)
+
+
+def test_encode_error_reaches_every_waiter():
+    batcher = EmbeddingBatcher(CountingEmbedder(fail=True), max_batch_size=4, max_wait_ms=20)
+    try:
+        futures = [batcher.submit(f"q{i}") for i in range(4)]
+        for fut in futures:
+            with pytest.raises(RuntimeError, match="encode failed"):
+                fut.result(timeout=5)
+    finally:
+        batcher.stop()
+
+
+def test_cancelled_requests_are_not_encoded():
+    embedder = CountingEmbedder(delay_sec=0.1)
+    batcher = EmbeddingBatcher(embedder, max_batch_size=1, max_wait_ms=0)
+    try:
+        first = batcher.submit("첫 요청")  # 워커가 이걸 인코딩하는 동안 나머지는 큐에서 대기
+        time.sleep(0.02)
+        waiting = batcher.submit("취소될 요청")
+        assert waiting.cancel()
+        last = batcher.submit("마지막 요청")
+        first.result(timeout=5)
+        last.result(timeout=5)
+    finally:
+        batcher.stop()
+    assert embedder.calls == [1, 1]
+
+
+def test_default_embedder_is_loaded_once(monkeypatch):
+    created = []
+
+    class FakeLocalEmbeddings(HashEmbedder):
+        def __init__(self):
+            time.sleep(0.05)  # 모델 로드 중에 다른 스레드가 들어와도 한 번만 만들어야 함
+            super().__init__(dim=16)
+            created.append(self)
+
+    monkeypatch.setattr(embeddings, "LocalEmbeddings", FakeLocalEmbeddings)
+    monkeypatch.setattr(embeddings, "_embedder", None)
+    monkeypatch.setattr(embeddings, "_ready", False)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(embeddings.get_default_embedder())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(created) == 1
+    assert all(r is created[0] for r in results)
+    assert not embeddings.is_embedder_ready()
+    assert embeddings.preload_embedder() is created[0]
+    assert embeddings.is_embedder_ready()
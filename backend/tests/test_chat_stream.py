@@ -0,0 +1,115 @@
+import asyncio
+import json
+import time
+
+from app.core.metrics import get_metrics
+from app.routes import chat
+from app.services.rag import pipeline
+from app.services.rag.answer_cache import SemanticAnswerCache
+from app.services.rag.llm import LLMError
+
+
+def _fake_stream(state, pause_sec: float):
+    async def stream(query):
+        try:
+            yield "contexts", []
+            yield "token", "대전"
+            yield "token", "에는 "
+            await asyncio.sleep(pause_sec)  # LLM이 잠시 멈춤
+            yield "token", "엑스포"
+            yield "done", {"source": "rag", "confidence": "high"}
+        finally:
+            state["closed"] = True
+
+    return stream
+
+
+def _parse(frame: str):
+    event, data = frame.strip().split("\n")
+    return event.split(": ", 1)[1], json.loads(data.split(": ", 1)[1])
+
+
+def test_buffered_tokens_are_flushed_while_the_llm_pauses(monkeypatch):
+    state = {}
+    monkeypatch.setattr(chat, "stream_answer_async", _fake_stream(state, pause_sec=0.5))
+    monkeypatch.setattr(chat, "_FLUSH_CHARS", 1000)
+    monkeypatch.setattr(chat, "_FLUSH_INTERVAL", 0.05)
+
+    async def run():
+        started = time.monotonic()
+        return [(time.monotonic() - started, _parse(frame)) async for frame in chat._chat_events("q")]
+
+    frames = asyncio.run(run())
+    assert [f for _, f in frames] == [
+        ("contexts", []),
+        ("token", {"text": "대전"}),  # 첫 토큰은 바로
+        ("token", {"text": "에는 "}),  # 다음 토큰을 기다리지 않고 flush 간격이 지나면 보냄
+        ("token", {"text": "엑스포"}),
+        ("done", {"source": "rag", "confidence": "high"}),
+    ]
+    assert frames[2][0] < 0.3
+    assert state["closed"]
+
+
+def test_disconnect_while_waiting_closes_the_llm_stream(monkeypatch):
+    state = {}
+    monkeypatch.setattr(chat, "stream_answer_async", _fake_stream(state, pause_sec=10))
+    monkeypatch.setattr(chat, "_FLUSH_CHARS", 1000)
+    monkeypatch.setattr(chat, "_FLUSH_INTERVAL", 0.05)
+
+    async def run():
+        frames = []
+
+        async def consume():
+            async for frame in chat._chat_events("q"):
+                frames.append(_parse(frame))
+
+        task = asyncio.create_task(consume())
+        while len(frames) < 3:
+            await asyncio.sleep(0.01)
+        task.cancel()  # 클라이언트 연결 끊김
+        await asyncio.wait({task})
+        return frames
+
+    frames = asyncio.run(run())
+    assert frames[-1] == ("token", {"text": "에는 "})
+    assert state["closed"]
+
+
+class _CutStream:
+    """토큰 두 개를 보낸 뒤 끊기는 LLM"""
+
+    async def stream_async(self, messages):
+        yield "대전에는 "
+        yield "엑스포"
+        raise LLMError("OpenAI API 호출 오류: connection reset")
+
+
+def test_stream_cut_by_the_llm_is_marked_truncated_and_not_cached(monkeypatch):
+    cache = SemanticAnswerCache(capacity=4, threshold=0.9, ttl_sec=0)
+
+    async def embed(text):
+        return [1.0, 0.0]
+
+    async def search(*args, **kwargs):
+        return [{"id": "doc-1", "content": "엑스포과학공원 안내", "metadata": {"source": "expo.txt"}}]
+
+    monkeypatch.setattr(pipeline.vectorstore, "embed_query_async", embed)
+    monkeypatch.setattr(pipeline.vectorstore, "query_async", search)
+    monkeypatch.setattr(pipeline, "_forecast_context", lambda query: None)
+    monkeypatch.setattr(pipeline, "get_answer_cache", lambda: cache)
+    monkeypatch.setattr(pipeline, "get_llm_client", lambda: _CutStream())
+    before = _counter("kauni_fallback_total", reason="llm_truncated")
+
+    async def run():
+        return [item async for item in pipeline.stream_answer_async("대전 엑스포 추천")]
+
+    events = asyncio.run(run())
+    assert [e for e, _ in events] == ["contexts", "token", "token", "done"]
+    assert events[-1][1] == {"source": "fallback", "confidence": "low", "truncated": True}
+    assert _counter("kauni_fallback_total", reason="llm_truncated") == before + 1
+    assert cache.lookup([1.0, 0.0]) is None
+
+
+def _counter(name, **labels):
+    return get_metrics()._counters.get(name, {}).get(tuple(sorted(labels.items())), 0.0)
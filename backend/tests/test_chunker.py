@@ -0,0 +1,48 @@
+import io
+import random
+
+from app.services.rag.chunker import iter_chunks, iter_sentences
+
+_SENTENCES = [
+    "대전은 과학의 도시입니다.",
+    "엑스포과학공원에는 한빛탑이 있어요!",
+    "주말에는 가족 단위 관광객이 많이 찾습니다.",
+    "성심당 빵을 사려면 줄을 서야 하나요?",
+    "유성온천에서는 족욕 체험을 할 수 있다.",
+    "계족산 황톳길은 맨발로 걷기 좋은 숲길로, 매년 마라톤 행사가 열리고 주변에 쉼터와 카페가 많아 하루 코스로 인기가 높다.",
+]
+
+
+def _document(seed: int, n: int = 300) -> str:
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        out.append(rng.choice(_SENTENCES))
+        out.append(rng.choice([" ", "  ", "\n", "\n\n"]))
+    return "".join(out)
+
+
+def _chunks(text: str, chunk_size: int, overlap: int):
+    return list(iter_chunks(iter_sentences(io.StringIO(text), max_len=chunk_size), chunk_size, overlap))
+
+
+def test_chunks_never_exceed_chunk_size_with_overlap():
+    for seed in range(5):
+        for chunk_size, overlap in ((60, 30), (100, 40), (40, 35)):
+            chunks = _chunks(_document(seed), chunk_size, overlap)
+            assert chunks
+            assert max(len(c.text) for c in chunks) <= chunk_size
+
+
+def test_offsets_point_at_chunk_text():
+    for seed in range(5):
+        text = "\n\n  " + _document(seed) + "  \n"
+        for chunk in _chunks(text, 80, 30):
+            assert text[chunk.start:chunk.end] == chunk.text
+
+
+def test_overlap_repeats_previous_tail():
+    chunks = _chunks(_document(0), 100, 40)
+    overlapping = sum(1 for a, b in zip(chunks, chunks[1:]) if b.start < a.end)
+    assert overlapping >= len(chunks) // 2
+    assert [c.index for c in chunks] == list(range(len(chunks)))
@@ -0,0 +1,85 @@
+import importlib
+import time
+
+import numpy as np
+
+from app.services.crowding import simulator
+from app.services.crowding.forecast import CrowdingForecaster
+from app.services.crowding.simulator import CrowdingSimulator
+from app.services.crowding.store import CrowdingStore
+
+
+def _counts(store):
+    _, _, count = store.history()
+    return count
+
+
+def _slots(store, location_id):
+    return [a.slot for a in store.registry.location(location_id).areas]
+
+
+def test_backfill_runs_only_on_an_empty_store():
+    store = CrowdingStore(history_size=4096)
+    sim = CrowdingSimulator(store, interval_sec=60)
+    sim.backfill(1)
+    assert (_counts(store) == 288).all()  # 하루치 5분 간격
+
+    populated = CrowdingStore(history_size=4096)
+    populated.ingest([("expo-park", "main", 120, None)])
+    sim = CrowdingSimulator(populated, interval_sec=60)
+    sim.start()
+    sim.stop()
+    counts = _counts(populated)
+    # 실제 샘플이 있으니 과거 이력을 만들지 않고, 현재 값만 다른 장소에 한 번 넣음
+    assert counts.max() == 1
+    assert counts[_slots(populated, "expo-park")].tolist() == [1, 0]
+
+
+def test_location_with_real_samples_is_no_longer_simulated():
+    store = CrowdingStore(history_size=4096)
+    sim = CrowdingSimulator(store, interval_sec=60)
+    sim.backfill(1)
+
+    # 실제 센서가 붙으면 그 장소의 가상 값과 이력은 버림
+    assert store.ingest([("expo-park", "main", 321, None)]) == {"accepted": 1, "rejected": 0}
+    payload = store.location_payload("expo-park")
+    assert payload["total_visitors"] == 321 and [a["current_visitors"] for a in payload["areas"]] == [321, 0]
+    assert _counts(store)[_slots(store, "expo-park")].tolist() == [1, 0]
+
+    # 이후 시뮬레이터 샘플은 그 장소에는 반영되지 않음
+    sim.backfill(1)
+    assert store.location_payload("expo-park")["total_visitors"] == 321
+    assert _counts(store)[_slots(store, "expo-park")].tolist() == [1, 0]
+    assert (_counts(store)[_slots(store, "central-market")] == 576).all()
+
+
+def test_simulator_is_off_unless_enabled(monkeypatch):
+    monkeypatch.delenv("CROWDING_SIMULATOR", raising=False)
+    try:
+        assert not importlib.reload(simulator)._ENABLED
+        simulator.start_simulator()
+        assert simulator._simulator is None
+        monkeypatch.setenv("CROWDING_SIMULATOR", "1")
+        assert importlib.reload(simulator)._ENABLED
+    finally:
+        monkeypatch.undo()
+        importlib.reload(simulator)
+
+
+def test_forecast_forgets_simulated_history_once_real_samples_arrive():
+    store = CrowdingStore(history_size=4096)
+    forecaster = CrowdingForecaster(store)
+    CrowdingSimulator(store, interval_sec=60).backfill(2)
+    forecaster.refit()
+    main = store.registry.area("expo-park", "main").slot
+    assert forecaster._counts[main].sum() == 576
+
+    now = time.time()
+    store.ingest([("expo-park", "main", 100, now - 60), ("expo-park", "garden", 50, now - 60)])
+    forecaster.refit()
+    # 시뮬레이터가 만든 이틀치는 빠지고 실제 샘플 하나만 남음
+    assert forecaster._counts[main].sum() == 1
+    _, ratios = forecaster.predict(24)
+    assert np.allclose(ratios[main], 0.1)  # 100 / 1000
+    other = store.registry.area("central-market", "area1").slot
+    assert forecaster._counts[other].sum() == 576
@@ -0,0 +1,90 @@
+import asyncio
+import os
+
+from app.core.supabase_dal import shutdown_supabase_dal
+from app.services.feedback import FeedbackSink, _write_supabase, feedback_event
+
+
+async def _wait_until(predicate, timeout: float = 5.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def _committed_then_failed(times: int):
+    """실제로 저장한 뒤 응답을 잃어버린 것처럼 예외를 던지는 writer (처음 times번만)"""
+    state = {"left": times}
+
+    async def writer(rows):
+        await _write_supabase(rows)
+        if state["left"] > 0:
+            state["left"] -= 1
+            raise TimeoutError("response lost after commit")
+
+    return writer
+
+
+def test_retry_after_committed_write_does_not_fail_batch(supabase_env, tmp_path):
+    spill = str(tmp_path / "spill.jsonl")
+
+    async def run():
+        sink = FeedbackSink(_committed_then_failed(1), batch_size=3, flush_interval_sec=0.05, max_retries=1, spill_path=spill)
+        sink.start()
+        events = [feedback_event(f"retry-{i}") for i in range(3)]
+        for event in events:
+            assert sink.submit(event)
+        await _wait_until(lambda: sink.written == 3)
+        await sink.stop()
+        await shutdown_supabase_dal()
+        return sink, events
+
+    sink, events = asyncio.run(run())
+    stored = supabase_env.app.state.tables["feedback"]
+    assert all(e["id"] in stored for e in events)
+    assert sink.retries == 1 and sink.spilled == 0
+    assert not os.path.exists(spill)
+
+
+def test_spilled_batch_that_was_committed_is_replayed(supabase_env, tmp_path):
+    spill = str(tmp_path / "spill.jsonl")
+
+    async def run():
+        sink = FeedbackSink(_committed_then_failed(1), batch_size=3, flush_interval_sec=0.05, max_retries=0, spill_path=spill)
+        sink.start()
+        first = [feedback_event(f"first-{i}", query="엑스포 추천", document_ids=["a", "b"], answer_source="rag") for i in range(3)]
+        for event in first:
+            sink.submit(event)
+        await _wait_until(lambda: sink.spilled == 3)
+        assert os.path.exists(spill)
+        # 다음 배치가 성공하면 spill 파일을 재전송 (이미 저장된 id는 건너뛰어야 나머지도 저장됨)
+        second = [feedback_event("second-0"), feedback_event("second-1")]
+        for event in second:
+            sink.submit(event)
+        await _wait_until(lambda: sink.replayed == 3)
+        await sink.stop()
+        await shutdown_supabase_dal()
+        return sink, first + second
+
+    sink, events = asyncio.run(run())
+    stored = supabase_env.app.state.tables["feedback"]
+    assert all(e["id"] in stored for e in events)
+    assert stored[events[0]["id"]]["document_ids"] == ["a", "b"]
+    assert sink.written == 2 + 3  # 두 번째 배치 + 재전송한 첫 배치 (이미 저장된 행은 저장소에서 무시)
+    assert not os.path.exists(spill) and not os.path.exists(spill + ".replay")
+
+
+def test_drain_on_stop_writes_queued_events(supabase_env, tmp_path):
+    async def run():
+        sink = FeedbackSink(batch_size=50, flush_interval_sec=30.0, spill_path=str(tmp_path / "spill.jsonl"))
+        sink.start()
+        events = [feedback_event(f"drain-{i}") for i in range(7)]
+        for event in events:
+            sink.submit(event)
+        await sink.stop()
+        await shutdown_supabase_dal()
+        return events
+
+    events = asyncio.run(run())
+    stored = supabase_env.app.state.tables["feedback"]
+    assert all(e["id"] in stored for e in events)
@@ -0,0 +1,87 @@
+import json
+import time
+from datetime import datetime
+
+import numpy as np
+
+from app.services.crowding import forecast
+from app.services.crowding.forecast import CrowdingForecaster, _smooth, _week_hour, forecast_context
+from app.services.crowding.store import CrowdingStore
+
+_QUIET_HOUR = 4
+
+
+def test_timestamps_fall_into_monday_based_week_hours():
+    monday = 4 * 86400  # 1970-01-05은 월요일
+    ts = np.array([0.0, monday, monday + 10 * 3600 + 59 * 60, monday + 6 * 86400 + 23 * 3600])
+    assert _week_hour(ts, 0.0).tolist() == [3 * 24, 0, 10, 167]
+    # KST(+9시간)에서는 UTC 1970-01-01 00:00이 목요일 9시
+    assert _week_hour(np.array([0.0]), 9 * 3600.0).tolist() == [3 * 24 + 9]
+
+
+def test_sparse_cells_are_pulled_toward_hour_and_area_means():
+    sums = np.zeros((2, 168))
+    counts = np.zeros((2, 168))
+    sums[0, 10], counts[0, 10] = 1.6, 2  # 월 10시: 0.8 두 번
+    sums[0, 34], counts[0, 34] = 0.2, 1  # 화 10시: 0.2 한 번
+    profile = _smooth(sums, counts)
+    # 구역 평균 0.6, 10시 평균 (1.8 + 3*0.6) / (3 + 3) = 0.6
+    assert np.isclose(profile[0, 10], (1.6 + 3 * 0.6) / (2 + 3))
+    assert np.isclose(profile[0, 34], (0.2 + 3 * 0.6) / (1 + 3))
+    assert np.allclose(np.delete(profile[0], [10, 34]), 0.6)  # 표본이 없는 칸은 상위 평균
+    assert np.isnan(profile[1]).all()  # 샘플이 없는 구역은 예측하지 않음
+
+
+def _week_of_samples(store, now, days=7):
+    """모든 구역에 지난 days일 동안 매시 샘플 (새벽 4시만 한산)"""
+    samples = []
+    for h in range(days * 24, 0, -1):
+        ts = (np.floor(now / 3600.0) - h) * 3600.0 + 60
+        ratio = 0.1 if datetime.fromtimestamp(ts).hour == _QUIET_HOUR else 0.8
+        samples.extend((a.location_id, a.id, int(a.max_capacity * ratio), ts) for a in store.registry.areas)
+    return samples
+
+
+def test_incremental_refit_matches_a_full_fit():
+    now = time.time()
+    samples = _week_of_samples(CrowdingStore(), now)
+    half = len(samples) // 2
+    incremental, full = CrowdingStore(history_size=512), CrowdingStore(history_size=512)
+    step = CrowdingForecaster(incremental)
+    once = CrowdingForecaster(full)
+    assert np.isnan(step.predict(3)[1]).all()  # 학습 전
+
+    incremental.ingest(samples[:half])
+    assert step.refit()
+    incremental.ingest(samples[half:])
+    assert step.refit() and not step.refit()  # 새 샘플이 없으면 다시 학습하지 않음
+    full.ingest(samples)
+    once.refit()
+    assert step.samples_seen == once.samples_seen == len(samples)
+    assert np.allclose(step._profile, once._profile)
+
+
+def test_forecast_points_to_the_quiet_hour_and_reuses_the_body(monkeypatch):
+    store = CrowdingStore(history_size=512)
+    store.ingest(_week_of_samples(store, time.time()))
+    forecaster = CrowdingForecaster(store)
+    forecaster.refit()
+
+    body = forecaster.forecast_json(24, "expo-park")
+    data = json.loads(body)["data"]
+    assert datetime.fromisoformat(data["best_time"]).hour == _QUIET_HOUR
+    assert len(data["forecast"]) == 24 and [a["id"] for a in data["areas"]] == ["main", "garden"]
+    quiet = [h for h in data["forecast"] if datetime.fromisoformat(h["time"]).hour == _QUIET_HOUR][0]
+    assert quiet["crowding_ratio"] < 0.3 and quiet["congestion_level"] == "low"
+    assert forecaster.forecast_json(24, "expo-park") is body  # 같은 시간대는 캐시된 응답
+    assert forecaster.forecast_json(24, "nowhere") is None
+
+    expo = store.registry.location("expo-park")
+    assert f"가장 한산할 것으로 예상되는 시간: {_QUIET_HOUR}시" in forecaster.describe(expo, hours=24)
+
+    monkeypatch.setattr(forecast, "_forecaster", forecaster)
+    context = forecast_context("엑스포공원 언제 가면 한산해?")
+    assert context["id"] == "crowding:expo-park" and context["metadata"]["source"] == "crowding_forecast"
+    assert context["content"] == forecaster.describe(expo)
+    assert forecast_context("엑스포공원 입장료 알려줘") is None  # 시기를 묻는 질문이 아님
+    assert forecast_context("언제 가면 한산해?") is None  # 장소가 없음
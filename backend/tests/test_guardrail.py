@@ -0,0 +1,81 @@
+import asyncio
+
+from app.services.rag import guardrail, pipeline, vectorstore
+from app.services.rag.guardrail import CentroidClassifier, is_tourism_query, keyword_verdict
+
+
+class AxisEmbedder:
+    """관광 예시 문장은 x축, 비관광 예시 문장은 y축으로 보내는 임베더"""
+
+    def embed(self, texts):
+        return [[1.0, 0.0, 0.0] if t in guardrail._ON_TOPIC_EXAMPLES else [0.0, 1.0, 0.0] for t in texts]
+
+
+class RecordingClassifier:
+    def __init__(self, on_topic: bool):
+        self.on_topic = on_topic
+        self.vectors = []
+
+    def is_on_topic(self, query_vector):
+        self.vectors.append(query_vector)
+        return self.on_topic
+
+
+def test_keyword_verdicts():
+    assert keyword_verdict("대전 맛집 추천해줘") is True
+    assert keyword_verdict("한빛탑 야경 보러 가볼 만한가요") is True
+    assert keyword_verdict("비트코인 시세 알려줘") is False
+    # 관광 키워드가 있으면 범위 밖 단어가 섞여도 관광 질문
+    assert keyword_verdict("대전 주식 박람회 전시 일정") is True
+    assert keyword_verdict("오늘 저녁 뭐 먹지") is None
+
+
+def test_centroid_classifier_compares_similarity_gap_with_margin(monkeypatch):
+    monkeypatch.setattr(guardrail, "get_default_embedder", lambda: AxisEmbedder())
+    lenient = CentroidClassifier(margin=0.0)
+    assert lenient.is_on_topic([0.8, 0.6, 0.0])  # 관광 쪽 유사도가 0.2 높음
+    assert not lenient.is_on_topic([0.6, 0.8, 0.0])
+    assert not lenient.is_on_topic([0.0, 0.0, 0.0])
+    strict = CentroidClassifier(margin=0.3)
+    assert not strict.is_on_topic([0.8, 0.6, 0.0])
+    assert strict.is_on_topic([8.0, 1.0, 0.0])  # 벡터 크기와 상관없이 방향만 봄
+
+
+def test_classifier_is_consulted_only_for_ambiguous_queries(monkeypatch):
+    classifier = RecordingClassifier(on_topic=True)
+    monkeypatch.setattr(guardrail, "get_centroid_classifier", lambda: classifier)
+    assert is_tourism_query("성심당 빵 사러 갈래", [0.1, 0.2])
+    assert not is_tourism_query("코인 어디서 사?", [0.1, 0.2])
+    assert classifier.vectors == []
+    assert is_tourism_query("아이랑 주말에 갈 곳", [0.1, 0.2]) and classifier.vectors == [[0.1, 0.2]]
+    assert not is_tourism_query("아이랑 주말에 갈 곳", None)  # 임베딩 실패 시 보수적으로 거절
+
+    def broken():
+        raise RuntimeError("model missing")
+
+    monkeypatch.setattr(guardrail, "get_centroid_classifier", broken)
+    assert not is_tourism_query("아이랑 주말에 갈 곳", [0.1, 0.2])
+
+
+def test_pipeline_rejects_off_topic_queries_before_retrieval(monkeypatch):
+    embedded = []
+    classifier = RecordingClassifier(on_topic=False)
+
+    async def embed(text):
+        embedded.append(text)
+        return [0.5, 0.5]
+
+    async def no_search(*args, **kwargs):
+        raise AssertionError("retrieval should not run for rejected queries")
+
+    monkeypatch.setattr(vectorstore, "embed_query_async", embed)
+    monkeypatch.setattr(vectorstore, "query_async", no_search)
+    monkeypatch.setattr(guardrail, "get_centroid_classifier", lambda: classifier)
+
+    # 키워드로 분명하면 임베딩도 하지 않음
+    result = asyncio.run(pipeline._generate_answer_async("비트코인 시세 알려줘"))
+    assert result["source"] == "guardrail" and result["contexts"] == [] and embedded == []
+    # 애매하면 검색용 쿼리 벡터를 그대로 분류기에 넘김
+    result = asyncio.run(pipeline._generate_answer_async("연애 상담 좀 해줘"))
+    assert result["source"] == "guardrail" and embedded == ["연애 상담 좀 해줘"]
+    assert classifier.vectors == [[0.5, 0.5]]
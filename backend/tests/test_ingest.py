@@ -0,0 +1,88 @@
+import threading
+import uuid
+
+from app.core import supabase_dal
+
+from app.services.rag import lexical
+from app.services.rag.backends.supabase import SupabaseVectorBackend
+from app.services.rag.ingest import index_directory
+
+_SENTENCES = [f"대전 명소 {i}번은 사계절 내내 방문객이 많은 곳입니다. " for i in range(40)]
+
+
+def _docs(backend):
+    return {d["id"]: d for page in backend.iter_documents() for d in page}
+
+
+def test_retained_chunks_get_their_new_offsets(local_store, tmp_path):
+    root = tmp_path / "docs"
+    root.mkdir()
+    path = root / "guide.txt"
+    path.write_text("".join(_SENTENCES), encoding="utf-8")
+    first = index_directory(str(root))
+    before = _docs(local_store)
+    assert first["indexed"] == len(before) > 2
+
+    # 파일 앞에 청크 하나 분량을 넣으면 기존 청크는 내용은 그대로지만 위치가 밀림
+    text = "".join(f"새 소식 {j:02d}번: 전망대가 문을 열었습니다. " for j in range(13)) + "".join(_SENTENCES)
+    path.write_text(text, encoding="utf-8")
+    second = index_directory(str(root))
+    after = _docs(local_store)
+    retained = set(before) & set(after)
+    assert retained and second["indexed"] == len(after) - len(retained)
+    for doc_id in retained:
+        doc = after[doc_id]
+        meta = doc["metadata"]
+        assert text[meta["start_char"]:meta["end_char"]] == doc["content"]
+        assert meta["start_char"] > before[doc_id]["metadata"]["start_char"]
+        assert meta["chunk_index"] > before[doc_id]["metadata"]["chunk_index"]
+        assert meta["token_count"] == before[doc_id]["metadata"]["token_count"]
+    # 어휘 색인도 같은 메타데이터를 돌려줌
+    hits = lexical.get_lexical_index().search(after[next(iter(retained))]["content"], 50)
+    assert all(h["metadata"] == after[h["id"]]["metadata"] for h in hits)
+
+
+def test_supabase_deletes_are_sent_in_batches(supabase_env):
+    backend = SupabaseVectorBackend()
+    rows = [
+        {"id": str(uuid.uuid4()), "content": f"doc {i}", "metadata": {}, "embedding": [0.0] * 8}
+        for i in range(450)
+    ]
+    backend.upsert(rows)
+    app = supabase_env.app
+    app.state.requests.clear()
+    # uuid 450개를 한 URL에 넣으면 약 17KB라 프록시 한도를 넘음
+    backend.delete([r["id"] for r in rows[:-1]])
+    assert app.state.requests == [("DELETE", "documents")] * 3
+    assert list(app.state.tables["documents"]) == [rows[-1]["id"]]
+
+    backend.update_metadata([{"id": rows[-1]["id"], "metadata": {"chunk_index": 7}}])
+    stored = app.state.tables["documents"][rows[-1]["id"]]
+    assert stored["metadata"] == {"chunk_index": 7} and stored["content"] == "doc 449"
+
+
+def test_supabase_backend_writes_go_through_the_shared_dal(supabase_env):
+    backend = SupabaseVectorBackend()
+    app = supabase_env.app
+    app.state.tables.pop("documents", None)
+    rows = [
+        {"id": f"doc-{i}", "content": f"doc {i}", "metadata": {"chunk_index": i}, "embedding": [0.1] * 8}
+        for i in range(5)
+    ]
+    # 쓰기 스레드 여러 개가 동시에 불러도 전용 루프의 DAL 하나를 함께 씀
+    threads = [threading.Thread(target=backend.upsert, args=([row],)) for row in rows]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    backend.update_metadata([{"id": f"doc-{i}", "metadata": {"chunk_index": i + 10}} for i in range(3)])
+    backend.delete(["doc-4"])
+
+    pages = list(backend.iter_documents(page_size=2))
+    assert [len(p) for p in pages] == [2, 2]
+    docs = {d["id"]: d for page in pages for d in page}
+    assert {i: d["metadata"]["chunk_index"] for i, d in docs.items()} == {
+        "doc-0": 10, "doc-1": 11, "doc-2": 12, "doc-3": 3,
+    }
+    stats = supabase_dal._blocking[1].stats()
+    assert stats["requests"] == 5 + 3 + 1 + 3 and stats["errors"] == 0
@@ -0,0 +1,113 @@
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.routes import ingest as ingest_route
+from app.services import jobs
+from app.services.jobs import IngestJobRunner, JobConflictError
+
+
+def _wait(job, *statuses, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while job.status not in statuses:
+        assert time.monotonic() < deadline, f"job stuck in {job.status}"
+        time.sleep(0.005)
+    return job.to_dict()
+
+
+def test_progress_is_reported_and_result_kept():
+    runner = IngestJobRunner(max_workers=2)
+    release = threading.Event()
+
+    def work(job):
+        job.report(40, total=100)
+        job.report_rows(120)
+        release.wait(5)
+        job.report(100)
+        return {"indexed": 100, "skipped": 0}
+
+    try:
+        job = runner.submit("files:/data", "files", work)
+        _wait(job, "running")
+        deadline = time.monotonic() + 5
+        while job.to_dict()["processed"] < 40:
+            assert time.monotonic() < deadline
+            time.sleep(0.005)
+        time.sleep(0.02)
+        status = job.to_dict()
+        assert status["total"] == 100 and status["rows_written"] == 120
+        assert status["docs_per_sec"] > 0 and status["eta_sec"] is not None
+        release.set()
+        done = _wait(job, "succeeded")
+        assert done["result"] == {"indexed": 100, "skipped": 0}
+        assert done["eta_sec"] is None and done["errors"] == []
+        assert runner.get(job.id) is job and runner.list()[0] is job
+    finally:
+        release.set()
+        runner.shutdown()
+
+
+def test_same_source_conflicts_until_the_job_finishes(monkeypatch):
+    runner = IngestJobRunner(max_workers=2)
+    monkeypatch.setattr(jobs, "_runner", runner)
+    release = threading.Event()
+    try:
+        first = runner.submit("kto", "kto", lambda job: release.wait(5) and {})
+        with pytest.raises(JobConflictError):
+            runner.submit("kto", "kto", lambda job: {})
+        # 라우트는 409로 돌려줌
+        with pytest.raises(HTTPException) as e:
+            ingest_route._start_job("kto", "kto", lambda job: {})
+        assert e.value.status_code == 409 and first.id in e.value.detail
+        # 다른 source는 막지 않음
+        other = runner.submit("files:/other", "files", lambda job: {"indexed": 1})
+        _wait(other, "succeeded")
+
+        release.set()
+        _wait(first, "succeeded")
+        again = ingest_route._start_job("kto", "kto", lambda job: {"indexed": 3, "failed": 2})
+        job = runner.get(again.job_id)
+        done = _wait(job, "succeeded")
+        assert done["result"]["failed"] == 2 and "2 rows failed" in done["errors"][0]
+    finally:
+        release.set()
+        runner.shutdown()
+
+
+def test_cancel_stops_the_loop_and_failures_are_recorded():
+    runner = IngestJobRunner(max_workers=2)
+    steps = []
+
+    def loop(job):
+        for i in range(1000):
+            job.check_cancelled()
+            steps.append(i)
+            time.sleep(0.005)
+        return {}
+
+    def broken(job):
+        raise ValueError("manifest is corrupt")
+
+    try:
+        job = runner.submit("files:/slow", "files", loop)
+        _wait(job, "running")
+        while not steps:
+            time.sleep(0.005)
+        assert runner.cancel(job.id) is job
+        status = _wait(job, "cancelled")
+        assert len(steps) < 1000 and status["result"] is None
+
+        failed = runner.submit("files:/broken", "files", broken)
+        status = _wait(failed, "failed")
+        assert status["errors"] == ["manifest is corrupt"]
+        # 끝난 작업의 취소 요청은 상태를 바꾸지 않음
+        runner.cancel(failed.id)
+        assert failed.status == "failed"
+        assert runner.cancel("missing") is None
+        # 같은 source를 다시 돌릴 수 있음
+        rerun = runner.submit("files:/slow", "files", lambda job: {"indexed": 0})
+        _wait(rerun, "succeeded")
+    finally:
+        runner.shutdown()
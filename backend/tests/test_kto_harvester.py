@@ -0,0 +1,76 @@
+import threading
+
+import pytest
+from standins import ServerThread, fake_kto_app
+
+from app.services.ingestors import kto_api
+from app.services.ingestors.kto_api import KtoHarvester
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(kto_api, "_RETRY_BASE_SEC", 0.01)
+
+
+def _urls(server):
+    return [f"{server.url}/LocgoHubTarService1/areaBasedList1", f"{server.url}/TarRlteTarService1/areaBasedList1"]
+
+
+def test_fetches_every_page(kto):
+    harvester = KtoHarvester(max_concurrency=3)
+    url = _urls(kto)[0]
+    ids = [item["contentid"] for item in harvester.iter_items(url, num_rows=20)]
+    assert len(ids) == 250 and len(set(ids)) == 250  # totalCount 기준 13페이지 전부
+    assert harvester.pages == 13 and harvester.total_items == 250 and harvester.complete
+
+
+def test_per_host_concurrency_cap_is_shared_across_endpoints(kto):
+    # 같은 호스트의 두 endpoint를 동시에 수집해도 호스트 전체 동시 요청 수는 max_concurrency 이하
+    harvester = KtoHarvester(max_concurrency=2)
+    counts = {}
+
+    def harvest(url):
+        counts[url] = sum(1 for _ in harvester.iter_items(url, num_rows=10))
+
+    threads = [threading.Thread(target=harvest, args=(url,)) for url in _urls(kto)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=30)
+    assert list(counts.values()) == [250, 250]
+    assert kto.app.state.max_active == 2
+
+
+def test_retries_transient_errors(kto):
+    kto.app.state.fail_next.extend([503, 429])
+    harvester = KtoHarvester(max_concurrency=1)
+    items = list(harvester.iter_items(_urls(kto)[0], num_rows=100))
+    assert len(items) == 250 and harvester.complete
+    assert kto.app.state.requests == 3 + 2
+
+
+def test_failed_page_marks_harvest_incomplete(kto, monkeypatch):
+    monkeypatch.setattr(kto_api, "_MAX_RETRIES", 1)
+    harvester = KtoHarvester(max_concurrency=1)
+    url = _urls(kto)[0]
+    first = harvester.fetch_page(url, 1, 100)  # 첫 페이지는 정상
+    assert len(first[0]) == 100 and first[1] == 250
+    kto.app.state.fail_next.extend([500, 500])
+    assert harvester._fetch_page_safe(url, 2, 100) == []
+    assert harvester.failed_pages == 1 and not harvester.complete
+
+
+def test_items_listed_by_both_endpoints_are_indexed_once(local_store, monkeypatch):
+    server = ServerThread(fake_kto_app(total_per_endpoint=120, latency_ms=0.0, shared_items=30)).start()
+    try:
+        monkeypatch.setenv("KTO_SERVICE_KEY", "test-service-key")
+        monkeypatch.setattr(kto_api, "KTO_BASE_1", _urls(server)[0])
+        monkeypatch.setattr(kto_api, "KTO_BASE_2", _urls(server)[1])
+        stats = kto_api.ingest_kto(num_rows=50)
+        again = kto_api.ingest_kto(num_rows=50)
+    finally:
+        server.stop()
+    sources = [d["metadata"]["contentid"] for page in local_store.iter_documents() for d in page]
+    assert len(sources) == len(set(sources)) == 120 + 90
+    assert stats["indexed"] == 210 and stats["skipped"] == 0
+    assert again["indexed"] == 0 and again["skipped"] == 210 and again["deleted"] == 0
@@ -0,0 +1,87 @@
+from app.services.rag import lexical
+from app.services.rag.lexical import NgramIndex, reciprocal_rank_fusion, tokenize
+
+
+def _doc(doc_id, content, **meta):
+    return {"id": doc_id, "content": content, "metadata": meta}
+
+
+def _ids(index, query, top_k=10):
+    return [hit["id"] for hit in index.search(query, top_k)]
+
+
+def test_bm25_prefers_rare_terms_and_shorter_documents():
+    assert tokenize("한밭수목원 A") == ["한밭", "밭수", "수목", "목원", "a"]
+    index = NgramIndex(path=None)
+    index.upsert([
+        _doc("arboretum", "한밭수목원은 대전 도심의 수목원입니다"),
+        _doc("expo", "엑스포공원은 대전 명소입니다"),
+        _doc("expo-long", "엑스포공원은 대전 명소입니다 주말에는 가족 단위 방문객이 많고 저녁에는 분수 공연도 열립니다"),
+        _doc("station", "대전역 근처 성심당 본점"),
+    ])
+    # "대전"은 모든 문서에 있어 점수가 낮고, 드문 "수목원" 쪽이 앞섬
+    assert _ids(index, "대전 수목원")[0] == "arboretum"
+    # 같은 단어를 담은 문서끼리는 짧은 문서가 앞섬
+    assert _ids(index, "엑스포공원") == ["expo", "expo-long"]
+    hits = index.search("대전 엑스포공원", 2)
+    assert [h["id"] for h in hits] == ["expo", "expo-long"] and hits[0]["bm25"] > hits[1]["bm25"] > 0
+    assert hits[0]["content"] == "엑스포공원은 대전 명소입니다"
+    assert index.search("부산 해운대", 5) == [] and index.search("", 5) == []
+
+
+def test_reciprocal_rank_fusion_orders_by_summed_ranks():
+    vector = [{"id": "a", "distance": 0.1}, {"id": "b", "distance": 0.2}, {"id": "c", "distance": 0.3}]
+    lexical_hits = [{"id": "c", "bm25": 9.0}, {"id": "b", "bm25": 5.0}, {"id": "d", "bm25": 1.0}]
+    fused = reciprocal_rank_fusion([vector, lexical_hits], top_k=3, k=60)
+    # c: 1/63 + 1/61, b: 1/62 + 1/62, a: 1/61, d: 1/63 (한쪽 1위가 양쪽 2위보다 조금 앞섬)
+    assert [d["id"] for d in fused] == ["c", "b", "a"]
+    assert fused[0]["score"] == round(1 / 63 + 1 / 61, 6) and fused[1]["score"] == round(2 / 62, 6)
+    # 양쪽에 나온 문서는 벡터 검색 결과의 필드를 유지하고 BM25 점수도 함께 가짐
+    assert fused[0]["distance"] == 0.3 and fused[0]["bm25"] == 9.0
+    assert [d["id"] for d in reciprocal_rank_fusion([vector, lexical_hits], top_k=10)] == ["c", "b", "a", "d"]
+
+
+def test_writes_survive_reload_without_keeping_content_in_memory(tmp_path):
+    path = str(tmp_path / "lex" / "docs.jsonl")
+    index = NgramIndex(path=path)
+    index.upsert([_doc("a", "유성온천 족욕 체험장", n=1), _doc("b", "대청호 오백리길 산책"), _doc("c", "으능정이 거리 스카이로드")])
+    index.flush()
+    assert not index._pending  # 저장 후에는 본문을 파일에서 읽음
+
+    index.upsert([_doc("a", "유성온천 야간 족욕", n=2)])  # 내용이 바뀐 재수집
+    index.delete(["b", "missing"])
+    index.update_metadata([{"id": "c", "metadata": {"chunk_index": 3}}])
+    index.upsert([_doc("d", "대청호 벚꽃길")])
+    index.delete(["d"])  # 저장 전에 지운 새 문서
+    assert _ids(index, "대청호") == []
+    assert index.search("족욕", 5)[0]["metadata"] == {"n": 2}
+    index.flush()
+
+    reloaded = NgramIndex(path=path)
+    assert len(reloaded) == len(index) == 2
+    for query in ("유성온천 족욕", "대청호", "스카이로드", "체험장"):
+        assert reloaded.search(query, 5) == index.search(query, 5)
+    hit = reloaded.search("스카이로드", 1)[0]
+    assert hit["content"] == "으능정이 거리 스카이로드" and hit["metadata"] == {"chunk_index": 3}
+
+    # 저장된 문서를 새 버전으로 바꾼 뒤 저장 전에 지워도 예전 버전이 되살아나지 않음
+    reloaded.upsert([_doc("c", "스카이로드 공연 일정")])
+    reloaded.delete(["c"])
+    reloaded.flush()
+    assert _ids(NgramIndex(path=path), "스카이로드") == []
+
+
+def test_log_is_compacted_once_old_versions_dominate(tmp_path, monkeypatch):
+    monkeypatch.setattr(lexical, "_COMPACT_MIN_ROWS", 10)
+    path = str(tmp_path / "docs.jsonl")
+    index = NgramIndex(path=path)
+    for version in range(6):
+        index.upsert([_doc(f"doc-{i}", f"대전 명소 {i}번 안내 {version}판") for i in range(5)])
+        index.flush()
+    with open(path, encoding="utf-8") as f:
+        lines = f.readlines()
+    assert len(lines) < 15  # 30개를 썼지만 이전 버전은 정리됨
+    hits = NgramIndex(path=path).search("명소 5판", 10)
+    assert sorted(h["id"] for h in hits) == [f"doc-{i}" for i in range(5)]
+    assert all(h["content"].endswith("5판") for h in hits)
+    assert index.search("명소 5판", 10) == hits
@@ -0,0 +1,46 @@
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# APP_MODE는 import 시점에 읽으므로 새 프로세스에서 앱을 띄우고 결과를 JSON으로 받음
+_SCRIPT = """
+import json, sys
+from fastapi.testclient import TestClient
+from app.main import app
+
+with TestClient(app) as client:
+    status = {path: client.get(path).status_code for path in (
+        "/api/health", "/api/persona", "/api/crowding", "/api/metrics", "/api/chat", "/api/search", "/api/db/health",
+    )}
+    health = client.get("/api/health").json()
+# persona가 쓰는 prompt(와 그 키워드 규칙)는 가벼우므로 허용하고, 모델/토크나이저/검색/DB 계층만 확인
+heavy = (
+    "sentence_transformers", "torch", "tiktoken", "supabase", "openai",
+    "app.services.rag.vectorstore", "app.services.rag.lexical", "app.services.rag.backends",
+    "app.services.rag.llm", "app.services.rag.pipeline", "app.services.rag.batcher", "app.services.feedback",
+)
+loaded = sorted(m for m in sys.modules if any(m == h or m.startswith(h + ".") for h in heavy))
+print(json.dumps({"status": status, "health": health, "loaded": loaded}))
+"""
+
+
+def _run_app(mode: str):
+    env = {**os.environ, "APP_MODE": mode, "CROWDING_SIMULATOR": "0"}
+    out = subprocess.run(
+        [sys.executable, "-c", _SCRIPT], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert out.returncode == 0, out.stderr
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def test_lite_mode_serves_only_light_routes_without_loading_the_rag_stack():
+    result = _run_app("lite")
+    assert result["status"] == {
+        "/api/health": 200, "/api/persona": 200, "/api/crowding": 200, "/api/metrics": 200,
+        "/api/chat": 404, "/api/search": 404, "/api/db/health": 404,
+    }
+    assert result["health"]["mode"] == "lite" and "embedder" not in result["health"]
+    assert result["loaded"] == []
@@ -0,0 +1,182 @@
+import asyncio
+import time
+
+import openai
+import pytest
+
+from app.services.rag import llm
+from app.services.rag.llm import CircuitBreaker, LLMClient, LLMError, LLMUnavailable
+
+_MESSAGES = [{"role": "user", "content": "대전 관광지 추천해줘"}]
+
+
+def _client(max_retries: int, failure_threshold: int = 5, reset_sec: float = 30.0) -> LLMClient:
+    client = LLMClient(max_concurrency=4, max_retries=max_retries)
+    client.breaker = CircuitBreaker(failure_threshold=failure_threshold, reset_sec=reset_sec)
+    return client
+
+
+def _calls(server) -> int:
+    return server.app.state.stats["calls"]
+
+
+def _run(client: LLMClient, scenario):
+    """테스트마다 새 이벤트 루프에서 실행하고 HTTP 클라이언트를 닫음"""
+
+    async def main():
+        try:
+            return await scenario()
+        finally:
+            await client.aclose()
+
+    return asyncio.run(main())
+
+
+async def _expect(exc_type, coro):
+    with pytest.raises(exc_type):
+        await coro
+
+
+async def _collect(client: LLMClient):
+    return [token async for token in client.stream_async(_MESSAGES)]
+
+
+def test_breaker_opens_then_half_open_probe_closes_it(openai_env):
+    client = _client(max_retries=0, failure_threshold=2, reset_sec=0.2)
+    openai_env.app.state.fail_next.extend([(500, None), (500, None)])
+
+    async def scenario():
+        for _ in range(2):
+            await _expect(LLMError, client.complete_async(_MESSAGES))
+        assert client.breaker.state == "open"
+
+        # 열려 있는 동안에는 제공자를 호출하지 않고 바로 거절
+        before = _calls(openai_env)
+        await _expect(LLMUnavailable, client.complete_async(_MESSAGES))
+        assert _calls(openai_env) == before and client.rejected == 1
+
+        await asyncio.sleep(0.25)
+        assert await client.complete_async(_MESSAGES)  # half-open 시험 호출 성공
+        assert client.breaker.state == "closed" and client.breaker.failures == 0
+
+    _run(client, scenario)
+
+
+def test_failed_half_open_probe_reopens_breaker(openai_env):
+    client = _client(max_retries=0, failure_threshold=1, reset_sec=0.2)
+    openai_env.app.state.fail_next.extend([(503, None), (503, None)])
+
+    async def scenario():
+        await _expect(LLMError, client.complete_async(_MESSAGES))
+        await asyncio.sleep(0.25)
+        await _expect(LLMError, client.complete_async(_MESSAGES))  # 시험 호출도 실패
+        assert client.breaker.state == "open"
+        await _expect(LLMUnavailable, client.complete_async(_MESSAGES))
+
+    _run(client, scenario)
+
+
+def test_probe_ending_with_a_client_error_is_released(openai_env):
+    client = _client(max_retries=0, failure_threshold=1, reset_sec=0.2)
+    openai_env.app.state.fail_next.extend([(503, None), (400, None)])
+
+    async def scenario():
+        await _expect(LLMError, client.complete_async(_MESSAGES))
+        await asyncio.sleep(0.25)
+        # 시험 호출이 요청 자체의 문제(400)로 끝나면 제공자 상태를 알 수 없으므로 다음 요청이 바로 다시 시험
+        await _expect(LLMError, client.complete_async(_MESSAGES))
+        assert client.breaker.state == "open" and client.failures == 1
+        assert await client.complete_async(_MESSAGES)
+        assert client.breaker.state == "closed"
+
+    _run(client, scenario)
+
+
+def test_429_waits_for_retry_after(openai_env):
+    client = _client(max_retries=1)
+    openai_env.app.state.fail_next.append((429, 1.0))
+
+    async def scenario():
+        started = time.monotonic()
+        answer = await client.complete_async(_MESSAGES)
+        return answer, time.monotonic() - started
+
+    answer, elapsed = _run(client, scenario)
+    assert answer
+    assert client.retries == 1 and client.failures == 0
+    # 자체 백오프(최대 0.75초)보다 긴 Retry-After를 따름
+    assert elapsed >= 1.0
+
+
+def test_client_errors_are_not_retried_or_counted(openai_env):
+    client = _client(max_retries=2, failure_threshold=1)
+    openai_env.app.state.fail_next.append((400, None))
+    before = _calls(openai_env)
+    _run(client, lambda: _expect(LLMError, client.complete_async(_MESSAGES)))
+    assert _calls(openai_env) == before + 1
+    assert client.retries == 0 and client.breaker.state == "closed"
+
+
+def test_stream_is_retried_before_the_first_token(openai_env, monkeypatch):
+    monkeypatch.setattr(llm, "_RETRY_BASE_SEC", 0.01)
+    client = _client(max_retries=2)
+    openai_env.app.state.fail_next.extend([(503, None), (502, None)])
+    before = _calls(openai_env)
+    tokens = _run(client, lambda: _collect(client))
+    assert "".join(tokens).startswith("안녕하세요, 까우니예요!") and len(tokens) > 5
+    assert _calls(openai_env) == before + 3
+    assert client.retries == 2 and client.failures == 0 and client.breaker.state == "closed"
+
+
+def test_stream_cut_after_the_first_token_is_not_retried(openai_env, monkeypatch):
+    monkeypatch.setattr(llm, "_RETRY_BASE_SEC", 0.01)
+    client = _client(max_retries=2)
+    openai_env.app.state.cut_next.append(3)
+    before = _calls(openai_env)
+    received = []
+
+    async def scenario():
+        with pytest.raises(LLMError):
+            async for token in client.stream_async(_MESSAGES):
+                received.append(token)
+
+    _run(client, scenario)
+    # 이미 보낸 토큰을 다시 보낼 수 없으므로 재시도하지 않고 실패로 기록
+    assert len(received) == 3 and _calls(openai_env) == before + 1
+    assert client.retries == 0 and client.failures == 1 and client.inflight == 0
+
+
+def test_cancelled_consumer_closes_the_provider_stream(openai_env, monkeypatch):
+    closed = []
+    original_close = openai.AsyncStream.close
+
+    async def close(self):
+        closed.append(self)
+        await original_close(self)
+
+    monkeypatch.setattr(openai.AsyncStream, "close", close)
+    client = LLMClient(max_concurrency=1, max_retries=0)
+
+    async def scenario():
+        first = asyncio.Event()
+
+        async def consume():
+            # 챗 라우트처럼 소비자가 끊기면 스트림을 닫음
+            stream = client.stream_async(_MESSAGES)
+            try:
+                async for _ in stream:
+                    first.set()
+                    await asyncio.sleep(10)  # 클라이언트가 느린 사이 연결이 끊김
+            finally:
+                await stream.aclose()
+
+        task = asyncio.create_task(consume())
+        await first.wait()
+        task.cancel()
+        await asyncio.wait({task})
+        # 하나뿐인 슬롯이 반환되어 다음 호출이 그대로 진행됨
+        return await _collect(client)
+
+    tokens = _run(client, scenario)
+    assert len(closed) == 2 and tokens
+    assert client.inflight == 0 and client.breaker.state == "closed"
@@ -0,0 +1,89 @@
+import os
+
+import numpy as np
+import pytest
+
+from app.services.rag.backends import local
+from app.services.rag.backends.local import LocalVectorBackend
+
+_DIM = 16
+
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch):
+    monkeypatch.setattr(local, "_IVF_MIN_ROWS", 256)
+    return LocalVectorBackend(index_dir=str(tmp_path / "idx"), dim=_DIM, nprobe=64)
+
+
+def _rows(rng, ids):
+    return [{"id": i, "content": f"doc {i}", "embedding": rng.standard_normal(_DIM).tolist()} for i in ids]
+
+
+def _assert_lists_match_assignment(b: LocalVectorBackend):
+    for c, lst in enumerate(b._lists):
+        assert np.array_equal(lst, np.flatnonzero(b._assign == c))
+
+
+def test_updates_move_rows_between_ivf_lists(backend):
+    rng = np.random.default_rng(0)
+    backend.upsert(_rows(rng, [f"d{i}" for i in range(600)]))
+    assert backend._centroids is not None
+    _assert_lists_match_assignment(backend)
+
+    # 기존 행 일부를 새 벡터로 갱신 (같은 배치 안에 새 행과 중복 id도 섞음)
+    updates = _rows(rng, [f"d{i}" for i in range(0, 600, 7)] + ["new-1", "new-1", "d3"])
+    backend.upsert(updates)
+    _assert_lists_match_assignment(backend)
+    assert len(backend._pos) == 601
+
+    latest = {r["id"]: r for r in updates}
+    for doc_id in ("d0", "d7", "d3", "new-1"):
+        hit = backend.match(latest[doc_id]["embedding"], 1)[0]
+        assert hit["id"] == doc_id and hit["distance"] < 1e-5
+
+
+def test_lists_survive_delete_compaction_and_reload(backend, tmp_path):
+    rng = np.random.default_rng(1)
+    backend.upsert(_rows(rng, [f"d{i}" for i in range(600)]))
+    backend.delete([f"d{i}" for i in range(0, 600, 3)])  # 1/3 삭제 -> 압축
+    _assert_lists_match_assignment(backend)
+    backend.flush()
+
+    reloaded = LocalVectorBackend(index_dir=backend.index_dir, dim=_DIM, nprobe=64)
+    _assert_lists_match_assignment(reloaded)
+    assert len(reloaded._pos) == 400
+
+
+def test_appends_grow_the_buffer_geometrically(backend):
+    rng = np.random.default_rng(2)
+    buffers = set()
+    for b in range(150):
+        backend.upsert(_rows(rng, [f"b{b}-{i}" for i in range(64)]))
+        buffers.add(id(backend._vec_buf))
+    assert len(backend._pos) == 150 * 64 and backend._vectors.shape == (150 * 64, _DIM)
+    assert len(buffers) <= 5  # 1024 -> 2048 -> ... -> 16384
+    _assert_lists_match_assignment(backend)
+
+
+def test_writes_persist_on_flush_only(backend):
+    rng = np.random.default_rng(3)
+    rows = _rows(rng, ["a", "b", "c"])
+    backend.upsert(rows)
+    assert not os.path.exists(os.path.join(backend.index_dir, local._VECTORS_FILE))
+    backend.flush()
+
+    # mmap으로 연 인덱스에 다시 쓰고 저장해도 기존 행이 유지됨
+    reopened = LocalVectorBackend(index_dir=backend.index_dir, dim=_DIM)
+    reopened.upsert(_rows(rng, ["d"]))
+    reopened.delete(["b"])
+    reopened.flush()
+    again = LocalVectorBackend(index_dir=backend.index_dir, dim=_DIM)
+    assert sorted(again._pos) == ["a", "c", "d"]
+    assert again.match(rows[0]["embedding"], 1)[0]["id"] == "a"
+
+
+def test_loading_an_index_built_with_another_dim_fails(backend):
+    backend.upsert(_rows(np.random.default_rng(4), ["a"]))
+    backend.flush()
+    with pytest.raises(RuntimeError, match="dim 16 != embedding dim 384"):
+        LocalVectorBackend(index_dir=backend.index_dir, dim=384)
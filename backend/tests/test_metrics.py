@@ -0,0 +1,124 @@
+import asyncio
+import re
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core import metrics as metrics_mod
+from app.core.metrics import HTTP_SECONDS, Metrics, MetricsMiddleware, get_metrics, inc, span
+from app.routes import metrics as metrics_route
+
+
+def test_render_counters_histograms_and_collectors():
+    m = Metrics(buckets=(1.0, 0.1))
+    m.inc("kauni_fallback_total", reason="timeout")
+    m.inc("kauni_fallback_total", 2, reason="timeout")
+    m.inc("kauni_fallback_total", reason='say "hi"\n')
+    for seconds in (0.05, 0.1, 0.5, 3.0):
+        m.observe("kauni_stage_duration_seconds", seconds, stage="llm")
+
+    def broken():
+        raise RuntimeError("stats unavailable")
+
+    m.add_collector(lambda: [("kauni_cache_entries", "gauge", {"cache": "answer"}, 12)])
+    m.add_collector(broken)  # 실패한 수집기는 건너뛰고 나머지는 그대로 내보냄
+    assert m.render() == "\n".join([
+        "# HELP kauni_fallback_total Requests answered by a fallback path",
+        "# TYPE kauni_fallback_total counter",
+        'kauni_fallback_total{reason="say \\"hi\\"\\n"} 1',
+        'kauni_fallback_total{reason="timeout"} 3',
+        "# HELP kauni_stage_duration_seconds Time spent in each request-path stage",
+        "# TYPE kauni_stage_duration_seconds histogram",
+        # 버킷은 누적이고 경계값과 같은 관측은 그 버킷에 들어감
+        'kauni_stage_duration_seconds_bucket{stage="llm",le="0.1"} 2',
+        'kauni_stage_duration_seconds_bucket{stage="llm",le="1"} 3',
+        'kauni_stage_duration_seconds_bucket{stage="llm",le="+Inf"} 4',
+        'kauni_stage_duration_seconds_sum{stage="llm"} 3.65',
+        'kauni_stage_duration_seconds_count{stage="llm"} 4',
+        "# TYPE kauni_cache_entries gauge",
+        'kauni_cache_entries{cache="answer"} 12',
+    ]) + "\n"
+
+
+def test_disabled_metrics_record_nothing(monkeypatch):
+    monkeypatch.setattr(metrics_mod, "_ENABLED", False)
+    m = Metrics()
+    m.inc("kauni_fallback_total", reason="timeout")
+    m.observe("kauni_stage_duration_seconds", 0.2, stage="llm")
+    assert m.render() == "\n"
+
+
+def _timing(header: str):
+    return {name: float(dur) for name, dur in re.findall(r"(\w+);dur=([\d.]+)", header)}
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: str):
+        for _ in range(2):
+            with span("retrieval"):
+                await asyncio.sleep(0.01)
+        with span("llm"):
+            await asyncio.sleep(0.02)
+        return {"id": item_id}
+
+    @app.get("/stream")
+    async def stream():
+        with span("retrieval"):
+            await asyncio.sleep(0.01)
+
+        async def body():
+            yield "first"
+            with span("llm"):  # 헤더를 보낸 뒤의 단계는 Server-Timing에 들어가지 않음
+                await asyncio.sleep(0.01)
+            yield "second"
+
+        return StreamingResponse(body(), media_type="text/plain")
+
+    return app
+
+
+def _http_count(route: str, status: int) -> float:
+    key = (("method", "GET"), ("route", route), ("status", str(status)))
+    row = get_metrics()._histograms.get(HTTP_SECONDS, {}).get(key)
+    return sum(row[:-1]) if row else 0.0  # [버킷별 개수..., +Inf 개수, 합계]
+
+
+def test_server_timing_header_sums_stages_and_histogram_groups_by_route():
+    client = TestClient(_app())
+    before = _http_count("/items/{item_id}", 200), _http_count("unmatched", 404)
+
+    res = client.get("/items/a")
+    timing = _timing(res.headers["server-timing"])
+    assert list(timing) == ["retrieval", "llm", "total"]
+    assert timing["retrieval"] >= 20 and timing["llm"] >= 20  # 같은 단계 두 번은 합산
+    assert timing["total"] >= timing["retrieval"] + timing["llm"]
+
+    client.get("/items/b")
+    client.get("/missing")
+    # 경로 값이 달라도 템플릿 하나로, 매칭 안 된 요청은 unmatched로 묶임
+    assert _http_count("/items/{item_id}", 200) == before[0] + 2
+    assert _http_count("unmatched", 404) == before[1] + 1
+
+    res = client.get("/stream")
+    assert res.text == "firstsecond"
+    assert list(_timing(res.headers["server-timing"])) == ["retrieval", "total"]
+
+
+def test_metrics_route_exposes_counters_and_collected_stats(openai_env):
+    app = FastAPI()
+    app.include_router(metrics_route.router, prefix="/api")
+    inc("kauni_guardrail_rejects_total", reason="keyword")
+
+    res = TestClient(app).get("/api/metrics")
+    assert res.status_code == 200 and res.headers["content-type"].startswith("text/plain; version=0.0.4")
+    lines = res.text.splitlines()
+    assert "# TYPE kauni_guardrail_rejects_total counter" in lines
+    assert any(re.fullmatch(r'kauni_guardrail_rejects_total\{reason="keyword"\} \d+', line) for line in lines)
+    for gauge in ("kauni_crowding_subscribers", "kauni_llm_inflight", "kauni_feedback_queued"):
+        assert f"# TYPE {gauge} gauge" in lines
+    assert 'kauni_cache_hits_total{cache="answer"}' in res.text
@@ -0,0 +1,55 @@
+from app.services.rag import prompt, tokens
+from app.services.rag.ingest import backfill_token_counts
+from app.services.rag.prompt import pack_contexts
+from app.services.rag.tokens import count_tokens, estimate_tokens
+
+_LONG = "엑스포다리는 밤이 되면 조명이 켜져 갑천을 따라 산책하기 좋습니다. " * 20
+
+
+def _ctx(doc_id, token_count=None, content=_LONG):
+    meta = {"source": f"{doc_id}.txt"}
+    if token_count is not None:
+        meta["token_count"] = token_count
+    return {"id": doc_id, "content": content, "metadata": meta}
+
+
+def test_higher_ranked_passages_are_packed_first_and_overflow_is_truncated():
+    overhead = prompt._CONTEXT_OVERHEAD_TOKENS
+    packed = pack_contexts([_ctx("a", 100), _ctx("b", 100), _ctx("c", 10)], budget=200)
+    # a가 116을 쓰고 남은 84에서 머리말 16을 빼고 68토큰만큼 b를 잘라 넣으면 예산이 끝남
+    assert [c["id"] for c in packed] == ["a", "b"]
+    assert packed[0]["content"] == _LONG
+    room = 200 - (100 + overhead) - overhead
+    assert 0 < count_tokens(packed[1]["content"]) <= room and _LONG.startswith(packed[1]["content"])
+
+
+def test_passages_too_short_to_be_useful_are_skipped():
+    packed = pack_contexts([_ctx("a", 150), _ctx("b", 100), _ctx("c", 10, content="한빛탑 전망대")], budget=200)
+    # b를 넣을 자리(18토큰)는 최소 길이보다 짧아 건너뛰고, 뒤의 짧은 c는 그대로 들어감
+    assert [c["id"] for c in packed] == ["a", "c"] and packed[1]["content"] == "한빛탑 전망대"
+
+
+def test_rows_without_token_count_are_estimated_without_the_tokenizer(monkeypatch):
+    def no_tokenizer():
+        raise AssertionError("tokenizer should not be used on the request path")
+
+    monkeypatch.setattr(tokens, "get_encoding", no_tokenizer)
+    short = "유성온천 족욕체험장 운영시간 안내"
+    packed = pack_contexts([_ctx("a", content=short), _ctx("b", content=short)], budget=2 * (estimate_tokens(short) + 16))
+    assert [c["id"] for c in packed] == ["a", "b"]
+    # 추정치는 한글 등 비ASCII 글자당 1토큰, ASCII는 4글자당 1토큰 (15 + ceil(3/4))
+    assert estimate_tokens(short) == 16 and estimate_tokens("abcd efgh") == 3
+
+
+def test_backfill_fills_missing_token_counts_once(local_store):
+    rows = [
+        {"id": f"doc-{i}", "content": f"대전 명소 {i}번 안내문", "metadata": {"source": "old.txt"}, "embedding": [0.1] * 384}
+        for i in range(3)
+    ]
+    rows[0]["metadata"]["token_count"] = 99
+    local_store.upsert(rows)
+    assert backfill_token_counts() == 2
+    docs = {d["id"]: d for page in local_store.iter_documents() for d in page}
+    assert docs["doc-0"]["metadata"]["token_count"] == 99
+    assert docs["doc-1"]["metadata"] == {"source": "old.txt", "token_count": count_tokens("대전 명소 1번 안내문")}
+    assert backfill_token_counts() == 0
@@ -0,0 +1,101 @@
+import asyncio
+import json
+
+from app.services.crowding.push import CrowdingPushHub
+from app.services.crowding.store import CrowdingStore
+
+
+def _parse(frame: bytes):
+    event, version, data = frame.decode("utf-8").strip().split("\n")
+    return event.split(": ", 1)[1], int(version.split(": ", 1)[1]), json.loads(data.split(": ", 1)[1])
+
+
+def _drain(sub):
+    frames = []
+    while not sub.queue.empty():
+        frame = sub.queue.get_nowait()
+        frames.append(None if frame is None else _parse(frame))
+    return frames
+
+
+def test_deltas_carry_only_changed_areas_to_matching_topics():
+    store = CrowdingStore()
+    hub = CrowdingPushHub(store, queue_size=8, max_lag=3)
+    everything, expo, market = hub.subscribe(), hub.subscribe("expo-park"), hub.subscribe("central-market")
+    assert hub.subscribe("nowhere") is None
+    assert not hub.tick()  # 바뀐 게 없으면 보내지 않음
+
+    store.ingest([("expo-park", "garden", 120, None), ("science-museum", "human", 40, None)])
+    assert hub.tick()
+    (event, version, body), = _drain(expo)
+    assert event == "delta" and version == body["version"] == store.version
+    assert [(d["id"], [a["id"] for a in d["areas"]]) for d in body["data"]] == [("expo-park", ["garden"])]
+    assert body["data"][0]["total_visitors"] == 120 and body["data"][0]["areas"][0]["current_visitors"] == 120
+    (_, _, body), = _drain(everything)
+    assert sorted(d["id"] for d in body["data"]) == ["expo-park", "science-museum"]
+    assert _drain(market) == []
+
+    # 값이 같은 샘플은 version만 올리고 delta는 만들지 않음
+    store.ingest([("expo-park", "garden", 120, None)])
+    assert not hub.tick() and _drain(everything) == []
+
+
+def test_slow_subscriber_is_resynced_then_dropped():
+    store = CrowdingStore()
+    hub = CrowdingPushHub(store, queue_size=2, max_lag=2)
+    slow = hub.subscribe("expo-park")
+
+    def change(visitors):
+        store.ingest([("expo-park", "main", visitors, None)])
+        hub.tick()
+
+    change(1)
+    change(2)
+    change(3)  # 큐가 가득 참 -> 밀린 delta를 버리고 snapshot 하나로 대체
+    assert slow.queue.qsize() == 1 and slow.lagged == 1 and hub.resyncs == 1
+
+    change(4)
+    change(5)  # 두 번째로 밀림 -> 다시 snapshot
+    assert slow.lagged == 2 and hub.resyncs == 2
+    change(6)
+    change(7)  # 한도를 넘으면 연결을 끊음
+    assert hub.dropped == 1 and hub.stats()["subscribers"] == 0
+    assert _drain(slow) == [None]
+
+    async def consume():
+        return [_parse(f)[0] async for f in hub.events(slow)]
+
+    # 끊긴 구독은 첫 snapshot 뒤에 바로 끝남
+    slow.queue.put_nowait(None)
+    assert asyncio.run(consume()) == ["snapshot"]
+
+
+def test_subscriber_that_catches_up_is_no_longer_counted_as_lagging():
+    store = CrowdingStore()
+    hub = CrowdingPushHub(store, queue_size=1, max_lag=1)
+    sub = hub.subscribe()
+
+    async def run():
+        events = hub.events(sub)
+        first = _parse(await events.__anext__())
+        for visitors in (10, 20):
+            store.ingest([("expo-park", "main", visitors, None)])
+            hub.tick()
+        assert sub.lagged == 1  # 두 번째 delta에서 밀려 snapshot으로 대체
+        resync = _parse(await events.__anext__())
+        assert sub.lagged == 0  # 큐를 비웠으니 다시 정상
+        store.ingest([("expo-park", "main", 30, None)])
+        hub.tick()
+        delta = _parse(await events.__anext__())
+        await events.aclose()
+        return first, resync, delta
+
+    first, resync, delta = asyncio.run(run())
+    assert first[0] == "snapshot" and resync[0] == "snapshot" and delta[0] == "delta"
+    expo = [d for d in resync[2]["data"] if d["id"] == "expo-park"][0]
+    assert expo["total_visitors"] == 20
+    assert delta[2]["data"][0]["areas"] == [
+        {"id": "main", "name": "메인광장", "current_visitors": 30, "max_capacity": 1000,
+         "congestion_level": "low", "crowding_ratio": 0.03}
+    ]
+    assert hub.dropped == 0 and hub.stats()["subscribers"] == 1
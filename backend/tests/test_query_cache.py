@@ -0,0 +1,44 @@
+import time
+
+from app.services.rag.query_cache import QueryEmbeddingCache, normalize_query
+
+
+def test_normalized_queries_share_an_entry():
+    cache = QueryEmbeddingCache(max_bytes=1 << 20)
+    cache.put("대전  관광지 추천", [0.5, 0.25])
+    assert normalize_query("  대전 관광지\n추천 ") == normalize_query("대전  관광지 추천")
+    assert cache.get("  대전 관광지\n추천 ") == [0.5, 0.25]
+    assert normalize_query("ＥＸＰＯ Park") == "expo park"  # 전각 문자와 대소문자
+    assert cache.get("엑스포") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_entry_is_evicted_by_byte_budget():
+    probe = QueryEmbeddingCache()
+    probe.put("a", [0.0] * 64)
+    entry_bytes = probe.stats()["bytes"]
+    cache = QueryEmbeddingCache(max_bytes=entry_bytes * 3)
+    for key in ("a", "b", "c"):
+        cache.put(key, [0.0] * 64)
+    assert cache.get("a") is not None  # a를 최근 사용으로 올림
+    cache.put("d", [0.0] * 64)
+    assert cache.get("b") is None
+    assert all(cache.get(k) is not None for k in ("a", "c", "d"))
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["entries"] == 3 and stats["bytes"] <= cache.max_bytes
+
+
+def test_entries_expire_after_ttl():
+    cache = QueryEmbeddingCache(max_bytes=1 << 20, ttl_sec=0.05)
+    cache.put("야경 명소", [1.0])
+    assert cache.get("야경 명소") == [1.0]
+    time.sleep(0.08)
+    assert cache.get("야경 명소") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_vectors_are_stored_as_float32():
+    cache = QueryEmbeddingCache(max_bytes=1 << 20)
+    cache.put("성심당", [0.1])
+    assert cache.get("성심당") != [0.1]
+    assert abs(cache.get("성심당")[0] - 0.1) < 1e-7
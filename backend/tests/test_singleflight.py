@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+from app.core.singleflight import SingleFlight, get_singleflight
+
+
+class Counter:
+    """호출 횟수를 세고, 풀어 줄 때까지 기다렸다가 값을 돌려주는 작업"""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    def fn(self, value, error=None):
+        async def run():
+            self.calls += 1
+            await self.release.wait()
+            if error is not None:
+                raise error
+            return value
+
+        return run
+
+
+def test_concurrent_calls_with_the_same_key_share_one_execution():
+    group = SingleFlight("test", max_waiters=16)
+
+    async def run():
+        work = Counter()
+        calls = [asyncio.create_task(group.do("대전 맛집", work.fn({"answer": 1}))) for _ in range(5)]
+        other = asyncio.create_task(group.do("유성 온천", work.fn({"answer": 2})))
+        await asyncio.sleep(0)
+        work.release.set()
+        results = await asyncio.gather(*calls, other)
+        assert work.calls == 2
+        assert all(r is results[0] for r in results[:5]) and results[5] == {"answer": 2}
+        # 결과를 캐시하지 않으므로 끝난 뒤의 호출은 다시 실행
+        assert await group.do("대전 맛집", work.fn({"answer": 3})) == {"answer": 3}
+        assert work.calls == 3
+
+    asyncio.run(run())
+    stats = group.stats()
+    assert stats["executions"] == 3 and stats["coalesced"] == 4 and stats["calls"] == 7
+    assert stats["inflight"] == 0 and stats["hot_keys"][0] == {
+        "key": "대전 맛집", "calls": 6, "executions": 2, "coalesced": 4, "overflow": 0, "errors": 0,
+    }
+
+
+def test_errors_reach_every_waiter_and_are_not_remembered():
+    group = SingleFlight("test", max_waiters=16)
+
+    async def run():
+        work = Counter()
+        calls = [asyncio.create_task(group.do("q", work.fn(None, error=ConnectionError("db down")))) for _ in range(3)]
+        await asyncio.sleep(0)
+        work.release.set()
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        assert work.calls == 1
+        assert all(isinstance(r, ConnectionError) and str(r) == "db down" for r in results)
+        # 실패한 결과가 다음 요청에 재사용되지 않음
+        assert await group.do("q", work.fn("ok")) == "ok"
+
+    asyncio.run(run())
+    assert group.stats()["errors"] == 1 and group.stats()["executions"] == 2
+
+
+def test_cancelled_leader_does_not_cancel_the_shared_execution():
+    group = SingleFlight("test", max_waiters=16)
+
+    async def run():
+        work = Counter()
+        leader = asyncio.create_task(group.do("q", work.fn("answer")))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(group.do("q", work.fn("answer")))
+        await asyncio.sleep(0)
+        leader.cancel()  # 첫 요청의 클라이언트가 끊김
+        await asyncio.sleep(0)
+        work.release.set()
+        assert await follower == "answer"
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        assert work.calls == 1
+
+    asyncio.run(run())
+    assert group.stats()["errors"] == 0
+
+
+def test_waiters_over_the_limit_run_their_own_call():
+    group = SingleFlight("test", max_waiters=1)
+
+    async def run():
+        work = Counter()
+        calls = [asyncio.create_task(group.do("q", work.fn(i))) for i in range(3)]
+        await asyncio.sleep(0)
+        work.release.set()
+        results = await asyncio.gather(*calls)
+        return work.calls, results
+
+    calls, results = asyncio.run(run())
+    assert calls == 2 and results == [0, 0, 2]
+    stats = group.stats()
+    assert stats["executions"] == 1 and stats["coalesced"] == 1 and stats["overflow"] == 1
+
+
+def test_groups_are_shared_by_name():
+    assert get_singleflight("search") is get_singleflight("search")
+    assert get_singleflight("search") is not get_singleflight("chat")
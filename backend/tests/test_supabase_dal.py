@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from app.core import supabase_dal
+from app.core.supabase_dal import SupabaseDAL, SupabaseError
+from standins import STANDIN_KEY
+
+
+def _run(postgrest, fn, **kwargs):
+    async def run():
+        dal = SupabaseDAL(postgrest.url, STANDIN_KEY, **kwargs)
+        try:
+            return await fn(dal), dal
+        finally:
+            await dal.aclose()
+
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def postgrest(postgrest):
+    postgrest.app.state.tables.pop("dal_rows", None)
+    postgrest.app.state.fail_next.clear()
+    yield postgrest
+    postgrest.app.state.fail_next.clear()
+
+
+def test_upsert_select_count_roundtrip(postgrest):
+    async def fn(dal):
+        await dal.upsert("dal_rows", [{"id": "a", "v": 1}, {"id": "b", "v": 2}])
+        await dal.upsert("dal_rows", [{"id": "a", "v": 10}])  # merge-duplicates: 덮어씀
+        await dal.upsert("dal_rows", [{"id": "b", "v": 20}], ignore_duplicates=True)  # 기존 행 유지
+        return await dal.select("dal_rows", "id,v"), await dal.count("dal_rows")
+
+    (rows, count), _ = _run(postgrest, fn)
+    assert sorted((r["id"], r["v"]) for r in rows) == [("a", 10), ("b", 2)]
+    assert count == 2
+
+
+def test_update_and_batched_delete(postgrest, monkeypatch):
+    monkeypatch.setattr(supabase_dal, "_IN_FILTER_BATCH", 2)
+    ids = ["a", "b,c", 'd"e', "f"]  # in 필터 구분자가 들어간 id도 그대로 지워짐
+
+    async def fn(dal):
+        await dal.upsert("dal_rows", [{"id": i, "v": 0} for i in ids])
+        await dal.update("dal_rows", {"v": 5}, "f")
+        await dal.update("dal_rows", {"v": 5}, "missing")  # 없는 행은 무시
+        postgrest.app.state.requests.clear()
+        await dal.delete("dal_rows", ids[:3])
+        await dal.delete("dal_rows", [])
+        return await dal.select("dal_rows", "id,v")
+
+    rows, _ = _run(postgrest, fn)
+    assert rows == [{"id": "f", "v": 5}]
+    assert postgrest.app.state.requests == [("DELETE", "dal_rows")] * 2 + [("GET", "dal_rows")]
+
+
+def test_retries_5xx_then_succeeds(postgrest):
+    postgrest.app.state.fail_next.extend([503, 502])
+
+    async def fn(dal):
+        await dal.upsert("dal_rows", [{"id": "x"}])
+        return await dal.count("dal_rows")
+
+    count, dal = _run(postgrest, fn, max_retries=2)
+    assert count == 1
+    assert dal.retries == 2 and dal.requests == 4 and dal.errors == 2
+
+
+def test_gives_up_after_max_retries(postgrest):
+    postgrest.app.state.fail_next.extend([500, 500, 500])
+
+    async def fn(dal):
+        with pytest.raises(SupabaseError) as exc:
+            await dal.select("dal_rows")
+        return exc.value.status_code
+
+    status, dal = _run(postgrest, fn, max_retries=2)
+    assert status == 500
+    assert dal.requests == 3 and dal.retries == 2
+
+
+def test_client_errors_are_not_retried(postgrest):
+    async def fn(dal):
+        with pytest.raises(SupabaseError) as exc:
+            await dal.select("dal_rows")
+        return exc.value.status_code
+
+    async def run():
+        dal = SupabaseDAL(postgrest.url, "wrong.api.key", max_retries=2)
+        try:
+            return await fn(dal), dal
+        finally:
+            await dal.aclose()
+
+    status, dal = asyncio.run(run())
+    assert status == 401
+    assert dal.requests == 1 and dal.retries == 0
@@ -0,0 +1,76 @@
+import threading
+import time
+
+from standins import HashEmbedder
+
+from app.services.rag import writer
+from app.services.rag.backends import VectorBackend
+from app.services.rag.writer import BatchedUpsertWriter
+
+
+class RecordingBackend(VectorBackend):
+    """업서트 배치를 기록하고 동시에 진행 중인 요청 수의 최댓값을 잼 (처음 fail_first번은 실패)"""
+
+    name = "recording"
+
+    def __init__(self, delay_sec: float = 0.02, fail_first: int = 0, fail_ids=()):
+        self.batches = []
+        self.flushed = 0
+        self.delay_sec = delay_sec
+        self.fail_first = fail_first
+        self.fail_ids = set(fail_ids)
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def upsert(self, rows):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.delay_sec)
+            with self._lock:
+                if self.fail_first > 0:
+                    self.fail_first -= 1
+                    raise ConnectionError("transient")
+            if self.fail_ids & {r["id"] for r in rows}:
+                raise ValueError("rejected row")
+            with self._lock:
+                self.batches.append(rows)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def flush(self):
+        self.flushed += 1
+
+
+def test_rows_are_embedded_and_upserted_in_bounded_concurrent_batches():
+    backend = RecordingBackend()
+    written = []
+    w = BatchedUpsertWriter(backend, HashEmbedder(dim=8), batch_size=10, max_inflight=3, on_written=written.extend)
+    for i in range(95):
+        w.add(f"대전 문서 {i}", {"n": i}, f"id-{i}" if i % 2 else None)
+    stats = w.close()
+    assert stats["rows"] == 95 and stats["batches"] == 10 and stats["failed_rows"] == 0
+    assert sorted(len(b) for b in backend.batches) == [5] + [10] * 9
+    assert 1 < backend.max_active <= 3
+    assert backend.flushed == 1
+    rows = [r for b in backend.batches for r in b]
+    assert {r["metadata"]["n"] for r in rows} == set(range(95))
+    # id 없는 행도 writer가 정한 id로 벡터 저장소와 on_written에 같이 전달됨
+    assert all(r["id"] for r in rows) and {r["id"] for r in written} == {r["id"] for r in rows}
+    assert all(r["metadata"]["token_count"] > 0 and len(r["embedding"]) == 8 for r in rows)
+
+
+def test_failed_batches_are_retried_then_reported(monkeypatch):
+    monkeypatch.setattr(writer, "_RETRY_BASE_SEC", 0.001)
+    backend = RecordingBackend(fail_first=2, fail_ids={"bad"})
+    w = BatchedUpsertWriter(backend, HashEmbedder(dim=8), batch_size=2, max_inflight=1, max_retries=2)
+    for doc_id in ("a", "b", "bad", "c"):
+        w.add(doc_id, {}, doc_id)
+    stats = w.close()
+    assert stats["rows"] == 2 and stats["failed_rows"] == 2
+    assert sorted(w.failed_ids) == ["bad", "c"]
+    assert w.retries == 4  # 일시 장애 2번 + 거절된 배치 재시도 2번
+    assert "rejected row" in w.errors[-1]